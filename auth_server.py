@@ -1,16 +1,20 @@
-from fastapi import FastAPI, HTTPException, Form
+from fastapi import FastAPI, HTTPException, Form, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import psycopg2
+import asyncio
+import time
 import uuid
 import os
-import bcrypt
 from dotenv import load_dotenv
+from browser_pool import BrowserPool, GROCERIES_URL, accept_cookies
+from password_hashing import PasswordHasher, HasherBusy
+from profile_cache import ProfileCache, etag_matches
+from credential_verifier import CredentialVerifier, VerificationQueueFull, FAILED, PENDING, VERIFIED
+from session_store import restore_session, save_session, is_logged_in
+from user_registry import get_registry
 
 load_dotenv()
 
@@ -19,6 +23,8 @@ DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+VERIFY_MAX_WAIT = float(os.getenv("VERIFY_MAX_WAIT", "25"))
 
 app = FastAPI(title="User Auth & Profile API")
 
@@ -33,6 +39,7 @@ app.add_middleware(
 # Database connection
 # ----------------------------
 def get_db():
+    import psycopg2
     return psycopg2.connect(
         host=DB_HOST,
         port=DB_PORT,
@@ -53,105 +60,230 @@ class UserProfile(BaseModel):
     postcode: Optional[str] = None
     address: Optional[str] = None
 
+# ----------------------------
+# Browser pool
+# ----------------------------
+def create_driver(profile_dir: str):
+    from selenium import webdriver
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    return webdriver.Chrome(options=options)
+
+browser_pool = BrowserPool(create_driver, size=BROWSER_POOL_SIZE, name="auth-pool")
+
+@app.on_event("startup")
+def start_browser_pool():
+    browser_pool.start()
+
+@app.on_event("shutdown")
+def stop_browser_pool():
+    credential_verifier.shutdown()
+    password_hasher.shutdown()
+    browser_pool.close()
+
 # ----------------------------
 # Verify login via Selenium
 # ----------------------------
 def verify_sainsburys_credentials(login: str, password: str) -> bool:
+    from selenium.webdriver.common.by import By
     try:
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless=new")
-        driver = webdriver.Chrome(options=options)
-
-        driver.get("https://www.sainsburys.co.uk/gol-ui/groceries")
-        WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//button[text()='Accept all']"))
-        ).click()
-        driver.find_element(By.LINK_TEXT, "Log in / Register").click()
-        WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//button[text()='Accept all cookies']"))
-        ).click()
-        driver.find_element(By.ID, "username").send_keys(login)
-        driver.find_element(By.ID, "password").send_keys(password)
-        driver.find_element(By.XPATH, "//button[@type='submit']").click()
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "account-link"))
-        )
-        driver.quit()
+        with browser_pool.lease() as driver:
+            if restore_session(driver, login, password):
+                return True
+            if GROCERIES_URL not in driver.current_url:
+                driver.get(GROCERIES_URL)
+            accept_cookies(driver, timeout=3)
+            driver.find_element(By.LINK_TEXT, "Log in / Register").click()
+            accept_cookies(driver, "Accept all cookies")
+            driver.find_element(By.ID, "username").send_keys(login)
+            driver.find_element(By.ID, "password").send_keys(password)
+            driver.find_element(By.XPATH, "//button[@type='submit']").click()
+            if not is_logged_in(driver, timeout=10):
+                return False
+            save_session(driver, login, password)
         return True
     except Exception as e:
         print(f"[LOGIN ERROR] {e}")
         return False
 
 # ----------------------------
-# POST /login
+# Password hashing
 # ----------------------------
-@app.post("/login")
-def login_user(login: str = Form(...), password: str = Form(...)):
+# bcrypt runs on its own bounded pool so a login storm cannot take every core
+# or the request threadpool away from /profile
+password_hasher = PasswordHasher()
+
+def find_user(login: str):
+    conn = get_db()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM users WHERE login = %s", (login,))
+        return cur.fetchone()
+    finally:
+        conn.close()
+
+def update_password_hash(user_uuid: str, password_hash: str):
     conn = get_db()
-    cur = conn.cursor()
+    try:
+        cur = conn.cursor()
+        cur.execute("UPDATE users SET password = %s WHERE uuid = %s", (password_hash, user_uuid))
+        conn.commit()
+    finally:
+        conn.close()
 
-    cur.execute("SELECT * FROM users WHERE login = %s", (login,))
-    user = cur.fetchone()
+def create_user(login: str, password: str) -> dict:
+    conn = get_db()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT uuid FROM users WHERE login = %s", (login,))
+        row = cur.fetchone()
+        if row:
+            user_uuid = row[0]
+        else:
+            user_uuid = str(uuid.uuid4())
+            hashed_password = password_hasher.hash(password)
+            cur.execute("""
+                INSERT INTO users (uuid, login, password)
+                VALUES (%s, %s, %s)
+            """, (user_uuid, login, hashed_password))
+            conn.commit()
+    finally:
+        conn.close()
+    get_registry().register(login, user_uuid)
+    return {"uuid": user_uuid}
+
+# Sign-ups are verified on their own pool, so they never hold the request
+# threadpool that existing-user logins and profile calls run on
+credential_verifier = CredentialVerifier(verify_sainsburys_credentials, on_verified=create_user)
+
+# ----------------------------
+# POST /login
+# ----------------------------
+@app.post("/login")
+async def login_user(login: str = Form(...), password: str = Form(...)):
+    user = await run_in_threadpool(find_user, login)
 
     if user:
         stored_hash = user[3]
-        if not bcrypt.checkpw(password.encode("utf-8"), stored_hash.encode("utf-8")):
+        try:
+            matches, new_hash = await asyncio.wrap_future(password_hasher.verify_async(password, stored_hash))
+        except HasherBusy:
+            raise HTTPException(status_code=503, detail="Too many logins in progress, please retry shortly.",
+                                headers={"Retry-After": "2"})
+        if not matches:
             raise HTTPException(status_code=403, detail="Incorrect password.")
+        if new_hash:
+            await run_in_threadpool(update_password_hash, user[1], new_hash)
+        await run_in_threadpool(get_registry().register, login, user[1])
         return {"status": "existing_user", "uuid": user[1]}
-    else:
-        if not verify_sainsburys_credentials(login, password):
-            raise HTTPException(status_code=401, detail="Invalid Sainsbury's credentials.")
-
-        user_uuid = str(uuid.uuid4())
-        hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-        cur.execute("""
-            INSERT INTO users (uuid, login, password)
-            VALUES (%s, %s, %s)
-        """, (user_uuid, login, hashed_password))
-        conn.commit()
-        return {"status": "created", "uuid": user_uuid}
+
+    try:
+        verification = credential_verifier.submit(login, password)
+    except VerificationQueueFull:
+        raise HTTPException(status_code=503, detail="Too many sign-ups in progress, please retry shortly.",
+                            headers={"Retry-After": "10"})
+    if verification["status"] == FAILED:
+        raise HTTPException(status_code=401, detail=verification["error"])
+    return JSONResponse(status_code=202, content={
+        "status": "pending",
+        "verification_id": verification["verification_id"],
+    })
 
 # ----------------------------
-# GET /profile
+# GET /login/status/{verification_id}
 # ----------------------------
-@app.get("/profile/{uuid}")
-def get_profile(uuid: str):
+@app.get("/login/status/{verification_id}")
+async def get_login_status(verification_id: str, wait: float = 0):
+    deadline = time.monotonic() + min(max(wait, 0), VERIFY_MAX_WAIT)
+    while True:
+        verification = credential_verifier.status(verification_id)
+        if verification is None:
+            raise HTTPException(status_code=404, detail="Verification not found.")
+        if verification["status"] != PENDING or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(0.25)
+
+    return {
+        "status": "created" if verification["status"] == VERIFIED else verification["status"],
+        "uuid": verification.get("uuid"),
+        "detail": verification["error"],
+    }
+
+# ----------------------------
+# Profile cache
+# ----------------------------
+PROFILE_FIELDS = ("first_name", "last_name", "phone", "postcode", "address")
+
+profile_cache = ProfileCache()
+
+def load_profile(uuid: str):
+    cached = profile_cache.get(uuid)
+    if cached:
+        return cached
+
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute("SELECT first_name, last_name, phone, postcode, address FROM users WHERE uuid = %s", (uuid,))
-    row = cur.fetchone()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT first_name, last_name, phone, postcode, address FROM users WHERE uuid = %s", (uuid,))
+        row = cur.fetchone()
+    finally:
+        conn.close()
     if not row:
+        return None
+    profile = dict(zip(PROFILE_FIELDS, row))
+    return profile, profile_cache.put(uuid, profile)
+
+# ----------------------------
+# GET /profile
+# ----------------------------
+@app.get("/profile/{uuid}")
+def get_profile(uuid: str, response: Response, if_none_match: Optional[str] = Header(None)):
+    loaded = load_profile(uuid)
+    if not loaded:
         raise HTTPException(status_code=404, detail="User not found.")
-    return {
-        "first_name": row[0],
-        "last_name": row[1],
-        "phone": row[2],
-        "postcode": row[3],
-        "address": row[4]
-    }
+    profile, etag = loaded
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return profile
 
 # ----------------------------
 # POST /profile/{uuid}
 # ----------------------------
 @app.post("/profile/{uuid}")
-def update_profile(uuid: str, data: UserProfile):
+def update_profile(uuid: str, data: UserProfile, response: Response):
+    profile = {field: getattr(data, field) for field in PROFILE_FIELDS}
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE users SET
-            first_name = %s,
-            last_name = %s,
-            phone = %s,
-            postcode = %s,
-            address = %s
-        WHERE uuid = %s
-    """, (
-        data.first_name,
-        data.last_name,
-        data.phone,
-        data.postcode,
-        data.address,
-        uuid
-    ))
-    conn.commit()
-    return {"status": "updated"}
+    try:
+        cur = conn.cursor()
+        # The database decides whether anything changed, so a stale cached copy can never swallow a write
+        cur.execute(
+            "UPDATE users SET " + ", ".join(f"{field} = %s" for field in PROFILE_FIELDS) +
+            " WHERE uuid = %s AND (" + " OR ".join(f"{field} IS DISTINCT FROM %s" for field in PROFILE_FIELDS) + ")",
+            (*profile.values(), uuid, *profile.values())
+        )
+        updated = cur.rowcount
+        if not updated:
+            cur.execute("SELECT 1 FROM users WHERE uuid = %s", (uuid,))
+            exists = cur.fetchone() is not None
+        conn.commit()
+    except Exception:
+        profile_cache.invalidate(uuid)
+        raise
+    finally:
+        conn.close()
+    if not updated and not exists:
+        profile_cache.invalidate(uuid)
+        raise HTTPException(status_code=404, detail="User not found.")
+    response.headers["ETag"] = profile_cache.put(uuid, profile)
+    return {"status": "updated" if updated else "unchanged"}
+
+# ----------------------------
+# GET /pool/metrics
+# ----------------------------
+@app.get("/pool/metrics")
+def get_pool_metrics():
+    return {**browser_pool.metrics(), "verification": credential_verifier.metrics(),
+            "profile_cache": profile_cache.metrics(), "password_hashing": password_hasher.metrics()}
@@ -0,0 +1,297 @@
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+GROCERIES_URL = "https://www.sainsburys.co.uk/gol-ui/groceries"
+RESPAWN_DELAY = 5
+RESPAWN_MAX_DELAY = 300
+RESET_ORIGINS = [
+    "https://www.sainsburys.co.uk",
+    "https://account.sainsburys.co.uk",
+]
+
+
+def accept_cookies(driver, button_text="Accept all", timeout=10):
+    """
+    Clicks the cookie consent button if the banner is shown
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+        button_text (str): Exact text of the consent button
+        timeout (int): Seconds to wait for the banner
+
+    Returns:
+        bool: True if the button was clicked, False if no banner appeared
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.element_to_be_clickable((By.XPATH, f"//button[text()='{button_text}']"))
+        ).click()
+        return True
+    except Exception:
+        return False
+
+
+def warm_up(driver):
+    """
+    Opens the groceries page and accepts cookies so the browser is ready for a request
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+    """
+    driver.get(GROCERIES_URL)
+    accept_cookies(driver)
+
+
+def reset_driver(driver):
+    """
+    Removes all per-request state from a browser: extra tabs, cookies and site storage
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+    """
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        for origin in RESET_ORIGINS:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    except Exception:
+        driver.delete_all_cookies()
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+
+
+class BrowserPool:
+    """
+    Keeps a fixed number of warm Chrome instances and leases them to requests.
+    Every instance runs in its own temporary profile. After a lease the browser
+    is reset and warmed up again in the background; browsers that stop
+    responding or fail to reset are replaced with fresh ones. Consecutive
+    start or warm-up failures (e.g. while the site is down) delay the next
+    replacement exponentially, from RESPAWN_DELAY up to RESPAWN_MAX_DELAY
+    """
+
+    def __init__(self, driver_factory, size=2, warm=warm_up, max_leases=50, name="browser-pool"):
+        """
+        Args:
+            driver_factory (Callable[[str], webdriver.Chrome]): Creates a driver for a profile directory
+            size (int): Number of browsers kept in the pool
+            warm (Callable[[webdriver.Chrome], None]): Prepares a fresh or reset browser
+            max_leases (int): Browsers are recycled after this many leases
+            name (str): Name used in log messages
+        """
+        self.driver_factory = driver_factory
+        self.size = size
+        self.warm = warm
+        self.max_leases = max_leases
+        self.name = name
+
+        self._idle = queue.Queue()
+        self._profiles = {}
+        self._lease_counts = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stop = threading.Event()
+        self._started = False
+        self._consecutive_failures = 0
+
+        self._stats = {
+            "leases": 0,
+            "leased": 0,
+            "created": 0,
+            "recycled": 0,
+            "failures": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+            "timeouts": 0,
+        }
+
+    def start(self):
+        """
+        Launches the pool browsers in background threads
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.size):
+            self._spawn()
+
+    def _spawn(self, delay=0.0):
+        threading.Thread(target=self._create, args=(delay,), daemon=True).start()
+
+    def _failed(self):
+        """
+        Counts a start or warm-up failure
+
+        Returns:
+            float: Seconds to wait before the replacement browser is started
+        """
+        with self._lock:
+            self._stats["failures"] += 1
+            self._consecutive_failures += 1
+            return min(RESPAWN_MAX_DELAY, RESPAWN_DELAY * 2 ** (self._consecutive_failures - 1))
+
+    def _create(self, delay=0.0):
+        if delay and self._stop.wait(delay):
+            return
+        if self._closed:
+            return
+
+        profile_dir = tempfile.mkdtemp(prefix=f"{self.name}-")
+        try:
+            driver = self.driver_factory(profile_dir)
+        except Exception as e:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            delay = self._failed()
+            print(f"[{self.name}] Could not start browser, retrying in {delay:.0f}s: {e}")
+            if not self._closed:
+                self._spawn(delay)
+            return
+
+        with self._lock:
+            self._profiles[id(driver)] = profile_dir
+            self._lease_counts[id(driver)] = 0
+            self._stats["created"] += 1
+        self._prepare(driver)
+
+    def _prepare(self, driver, reset=False):
+        try:
+            if reset:
+                reset_driver(driver)
+            self.warm(driver)
+        except Exception as e:
+            delay = self._failed()
+            print(f"[{self.name}] Browser failed to warm up, replacing it in {delay:.0f}s: {e}")
+            self._recycle(driver, delay)
+            return
+
+        with self._lock:
+            self._consecutive_failures = 0
+        if self._closed:
+            self._destroy(driver)
+        else:
+            self._idle.put(driver)
+
+    def _destroy(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            profile_dir = self._profiles.pop(id(driver), None)
+            self._lease_counts.pop(id(driver), None)
+        if profile_dir:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+    def _recycle(self, driver, delay=0.0):
+        self._destroy(driver)
+        with self._lock:
+            self._stats["recycled"] += 1
+        if not self._closed:
+            self._spawn(delay)
+
+    @staticmethod
+    def _is_alive(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @contextmanager
+    def lease(self, timeout=120):
+        """
+        Borrows a warm browser for the duration of a with-block
+
+        Args:
+            timeout (float): Seconds to wait for a free browser
+
+        Yields:
+            webdriver.Chrome: Browser at the groceries page with cookies accepted
+
+        Raises:
+            RuntimeError: If no browser became available in time
+        """
+        self.start()
+        started = time.monotonic()
+        while True:
+            try:
+                driver = self._idle.get(timeout=max(0.0, started + timeout - time.monotonic()))
+            except queue.Empty:
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                raise RuntimeError(f"No browser available in {self.name} after {timeout}s")
+            if self._is_alive(driver):
+                break
+            # An idle browser can crash while it waits; replace it instead of handing it out
+            print(f"[{self.name}] Idle browser stopped responding, replacing it")
+            threading.Thread(target=self._recycle, args=(driver,), daemon=True).start()
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._stats["leases"] += 1
+            self._stats["leased"] += 1
+            self._stats["wait_total"] += waited
+            self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+            self._lease_counts[id(driver)] = self._lease_counts.get(id(driver), 0) + 1
+            lease_count = self._lease_counts[id(driver)]
+
+        try:
+            yield driver
+        finally:
+            with self._lock:
+                self._stats["leased"] -= 1
+            if self._closed:
+                self._destroy(driver)
+            elif not self._is_alive(driver) or lease_count >= self.max_leases:
+                threading.Thread(target=self._recycle, args=(driver,), daemon=True).start()
+            else:
+                threading.Thread(target=self._prepare, args=(driver, True), daemon=True).start()
+
+    def metrics(self):
+        """
+        Returns pool size and wait-time statistics
+
+        Returns:
+            dict: Current pool counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            alive = len(self._profiles)
+            consecutive_failures = self._consecutive_failures
+        leases = stats.pop("leases")
+        wait_total = stats.pop("wait_total")
+        return {
+            "size": self.size,
+            "alive": alive,
+            "idle": self._idle.qsize(),
+            "leases": leases,
+            "wait_avg": wait_total / leases if leases else 0.0,
+            "consecutive_failures": consecutive_failures,
+            **stats,
+        }
+
+    def close(self):
+        """
+        Quits all idle browsers; leased ones are closed when they are returned
+        """
+        self._closed = True
+        self._stop.set()
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._destroy(driver)
@@ -0,0 +1,311 @@
+import os
+from urllib.parse import urlparse
+import dom_snapshot
+import tracing
+
+TROLLEY_URL = "https://www.sainsburys.co.uk/gol-ui/trolley"
+CHECKOUT_BASE_URL = "https://www.sainsburys.co.uk/gol-ui/checkout"
+STEP_TIMEOUT = int(os.getenv("CHECKOUT_STEP_TIMEOUT", "30"))
+PAYMENT_TIMEOUT = int(os.getenv("CHECKOUT_PAYMENT_TIMEOUT", "900"))
+MAX_TRANSITIONS = 15
+
+TROLLEY = "trolley"
+BOOK_SLOT = "book_slot"
+BEFORE_YOU_GO = "before_you_go"
+FORGOTTEN_FAVOURITES = "forgotten_favourites"
+SUMMARY = "summary"
+PAYMENT = "payment"
+CONFIRMATION = "confirmation"
+UNKNOWN = "unknown"
+
+STATES = [TROLLEY, BOOK_SLOT, BEFORE_YOU_GO, FORGOTTEN_FAVOURITES, SUMMARY, PAYMENT, CONFIRMATION]
+
+# Checked in order against the URL path, the first matching fragment wins, so the
+# more specific fragments come first: a slot booking confirmation is still the slot
+# step, and only the final order confirmation ends the flow
+URL_STATES = [
+    ("order-confirmation", CONFIRMATION),
+    ("payment-confirmation", CONFIRMATION),
+    ("before-you-go", BEFORE_YOU_GO),
+    ("forgotten-favourites", FORGOTTEN_FAVOURITES),
+    ("slot", BOOK_SLOT),
+    ("payment", PAYMENT),
+    ("summary", SUMMARY),
+    ("trolley", TROLLEY),
+    ("confirmation", CONFIRMATION),
+]
+
+# Where to re-enter the flow when resuming; the actual state is detected after navigation.
+# There is deliberately no entry for PAYMENT: once payment has started the job may have
+# paid, so it is never resumed automatically
+RESUME_URLS = {
+    TROLLEY: TROLLEY_URL,
+    BOOK_SLOT: TROLLEY_URL,
+    BEFORE_YOU_GO: f"{CHECKOUT_BASE_URL}/before-you-go",
+    FORGOTTEN_FAVOURITES: f"{CHECKOUT_BASE_URL}/forgotten-favourites",
+    SUMMARY: f"{CHECKOUT_BASE_URL}/summary",
+}
+
+
+class CheckoutError(RuntimeError):
+    """
+    Raised when a checkout stage does not complete in time or the flow loops
+    """
+
+    def __init__(self, message, state):
+        super().__init__(f"{message} (state: {state})")
+        self.state = state
+
+
+def detect_state(url):
+    """
+    Maps a checkout URL to a state of the checkout flow
+
+    Args:
+        url (str): Current browser URL
+
+    Returns:
+        str: One of STATES or UNKNOWN
+    """
+    path = urlparse(url.lower()).path
+    for fragment, state in URL_STATES:
+        if fragment in path:
+            return state
+    return UNKNOWN
+
+
+def wait_for_url_change(driver, old_url, timeout=STEP_TIMEOUT):
+    """
+    Waits until the browser leaves the given URL
+
+    Returns:
+        bool: True if the URL changed before the timeout
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.25).until(lambda d: d.current_url != old_url)
+        return True
+    except Exception:
+        return False
+
+
+def click_continue_button(driver, wait):
+    """
+    Finds and clicks the main 'Continue' button on a page
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+        wait (WebDriverWait): Selenium WebDriverWait object
+
+    Returns:
+        bool: True if the button was clicked
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+
+    try:
+        cta_button = wait.until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, ".ln-c-button.ln-c-button--filled.trolley__cta-button"))
+        )
+        driver.execute_script("arguments[0].scrollIntoView(true); arguments[0].click();", cta_button)
+        print("Continue button clicked successfully.")
+        return True
+    except Exception as e:
+        print(f"Error clicking continue button: {e}")
+        return False
+
+
+def select_delivery_slot(driver):
+    """
+    Searches for the first available delivery slot and confirms it
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    wait = WebDriverWait(driver, 15)
+
+    try:
+        wait.until(EC.presence_of_element_located((By.ID, "slot-table")))
+        slot = dom_snapshot.first_available_slot(dom_snapshot.snapshot_slot_grid(driver))
+
+        if slot and dom_snapshot.click_slot(driver, slot):
+            print(f"First available slot selected: {slot['day']} {slot['time']} ({slot['price']})")
+
+            try:
+                confirm_btn = wait.until(EC.element_to_be_clickable((
+                    By.CSS_SELECTOR,
+                    ".ln-c-button.ln-c-button--filled.ln-c-button--full.reserve-slot-modal__primary-button"
+                )))
+                driver.execute_script("arguments[0].scrollIntoView(true);", confirm_btn)
+                driver.execute_script("arguments[0].click();", confirm_btn)
+                wait.until(EC.invisibility_of_element_located((By.CSS_SELECTOR, ".reserve-slot-modal__primary-button")))
+                print("Slot reservation confirmed.")
+            except Exception as e:
+                print(f"Error confirming slot reservation: {e}")
+
+            try:
+                secondary_btn = wait.until(EC.element_to_be_clickable((
+                    By.CSS_SELECTOR,
+                    ".ds-c-button.ds-c-button--secondary.ds-c-button--md.booking-confirmation__button"
+                )))
+                driver.execute_script("arguments[0].scrollIntoView(true);", secondary_btn)
+                driver.execute_script("arguments[0].click();", secondary_btn)
+                print("Clicked the booking confirmation secondary button.")
+            except Exception as e:
+                print(f"Error clicking booking confirmation button: {e}")
+
+            try:
+                final_cta_btn = wait.until(EC.element_to_be_clickable((
+                    By.CSS_SELECTOR,
+                    ".ln-c-button.ln-c-button--filled.trolley__cta-button"
+                )))
+                driver.execute_script("arguments[0].scrollIntoView(true);", final_cta_btn)
+                driver.execute_script("arguments[0].click();", final_cta_btn)
+                print("Clicked the final trolley CTA button.")
+            except Exception as e:
+                print(f"Error clicking final CTA button: {e}")
+            return
+        print("No available slots found.")
+    except Exception as e:
+        current_url = driver.current_url.lower()
+        if "summary" in current_url:
+            print("Already on the summary page, no slot selection needed.")
+        else:
+            print(f"Error selecting a delivery slot: {e}")
+
+
+def choose_home_delivery(driver):
+    """
+    Clicks the home delivery option on the slot type page, if it is shown
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+
+    Returns:
+        bool: True if the option was clicked
+    """
+    from selenium.webdriver.common.by import By
+
+    buttons = driver.find_elements(
+        By.XPATH,
+        "//*[self::button or self::a][contains(translate(normalize-space(.), "
+        "'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'home delivery')]"
+    )
+    if not buttons:
+        return False
+    driver.execute_script("arguments[0].scrollIntoView(true); arguments[0].click();", buttons[0])
+    print("Proceed to selecting a delivery slot")
+    return True
+
+
+def leave_trolley(driver):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    wait = WebDriverWait(driver, STEP_TIMEOUT)
+    checkout_button = wait.until(EC.element_to_be_clickable(
+        (By.CSS_SELECTOR, '[data-testid="order-summary-book-slot-button"]')
+    ))
+    checkout_button.click()
+    print("Cart is complete")
+
+
+def book_slot(driver):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    wait = WebDriverWait(driver, STEP_TIMEOUT, poll_frequency=0.25)
+    if not driver.find_elements(By.ID, "slot-table"):
+        choose_home_delivery(driver)
+        try:
+            wait.until(lambda d: d.find_elements(By.ID, "slot-table") or detect_state(d.current_url) != BOOK_SLOT)
+        except Exception:
+            raise CheckoutError("Delivery slot grid did not appear", BOOK_SLOT)
+    if detect_state(driver.current_url) == BOOK_SLOT:
+        select_delivery_slot(driver)
+
+
+def continue_checkout(driver):
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    click_continue_button(driver, WebDriverWait(driver, STEP_TIMEOUT))
+
+
+def wait_for_payment(driver):
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    print("We are on the payment page")
+    # Card verification can pass through pages of the bank, so wait for a known page of the shop
+    try:
+        WebDriverWait(driver, PAYMENT_TIMEOUT, poll_frequency=0.5).until(
+            lambda d: detect_state(d.current_url) not in (PAYMENT, UNKNOWN)
+        )
+    except Exception:
+        raise CheckoutError(f"Payment was not completed within {PAYMENT_TIMEOUT}s", PAYMENT)
+    print(f"Payment finished. URL changed to {driver.current_url}")
+
+
+HANDLERS = {
+    TROLLEY: leave_trolley,
+    BOOK_SLOT: book_slot,
+    BEFORE_YOU_GO: continue_checkout,
+    FORGOTTEN_FAVOURITES: continue_checkout,
+    SUMMARY: continue_checkout,
+    PAYMENT: wait_for_payment,
+}
+
+
+def run_checkout(driver, progress, resume_state=None):
+    """
+    Drives the checkout as a state machine: trolley, book slot, before-you-go,
+    forgotten favourites, summary, payment and confirmation. Every transition
+    waits for the URL to change instead of sleeping, every stage is timed
+    through progress, and the flow can re-enter at a previously reached state
+
+    Args:
+        driver (webdriver.Chrome): Logged-in Selenium WebDriver instance
+        progress (JobProgress): Receives 'checkout:<state>' stages and timings
+        resume_state (str, optional): Last state reached by an interrupted run
+
+    Returns:
+        str: CONFIRMATION
+
+    Raises:
+        CheckoutError: If a stage times out, the flow keeps returning to the same state,
+        ends on a page it does not know, or is asked to resume after payment had started
+    """
+    if resume_state is not None and resume_state not in RESUME_URLS:
+        raise CheckoutError("Checkout was interrupted after payment had started, "
+                            "check the account's orders before placing it again", resume_state)
+    driver.get(RESUME_URLS.get(resume_state, TROLLEY_URL))
+    visits = {}
+
+    for _ in range(MAX_TRANSITIONS):
+        url = driver.current_url
+        state = detect_state(url)
+
+        if state == CONFIRMATION:
+            print(f"Checkout finished: {url}")
+            return state
+        if state == UNKNOWN:
+            raise CheckoutError(f"Checkout reached an unknown page: {url}", UNKNOWN)
+
+        visits[state] = visits.get(state, 0) + 1
+        if visits[state] > 2:
+            raise CheckoutError("Checkout is stuck", state)
+
+        with progress.stage(f"checkout:{state}"), \
+                tracing.span(f"checkout.{state}", driver=driver, url=url, visit=visits[state]):
+            print(f"Checkout state: {state}")
+            HANDLERS[state](driver)
+            if state != PAYMENT and not wait_for_url_change(driver, url):
+                if detect_state(driver.current_url) == state:
+                    raise CheckoutError("Page did not advance", state)
+
+    raise CheckoutError("Too many checkout transitions", detect_state(driver.current_url))
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import time
+
+MIN_INTERVAL = 6 * 60 * 60
+MAX_INTERVAL = 30 * 24 * 60 * 60
+INITIAL_INTERVAL = 24 * 60 * 60
+CHANGED_FACTOR = 0.5
+UNCHANGED_FACTOR = 1.5
+
+
+def fingerprint(items):
+    """
+    Builds a stable content fingerprint from a collection of strings
+
+    Args:
+        items (Iterable[str]): Values describing the page content (e.g. product hrefs)
+
+    Returns:
+        str: SHA-256 hex digest of the sorted, de-duplicated values
+    """
+    digest = hashlib.sha256()
+    for item in sorted(set(items)):
+        digest.update(item.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class RevisitScheduler:
+    """
+    Keeps per-key fingerprints and decides when each key should be revisited.
+    Keys that change often are checked more frequently, stable ones back off
+    towards MAX_INTERVAL. State is stored as JSON so runs can resume
+    """
+
+    def __init__(self, state_file, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 initial_interval=INITIAL_INTERVAL):
+        self.state_file = state_file
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.entries = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Could not read scheduler state '{self.state_file}', starting fresh: {e}")
+            return {}
+
+    def save(self):
+        """
+        Atomically writes the current state to disk
+        """
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file, ensure_ascii=False, indent=1)
+        os.replace(tmp_file, self.state_file)
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def is_due(self, key, now=None):
+        entry = self.entries.get(key)
+        if entry is None:
+            return True
+        now = time.time() if now is None else now
+        return now >= entry.get("next_check", 0)
+
+    def due(self, keys, now=None, limit=None):
+        """
+        Selects the keys that should be revisited now, most overdue first
+
+        Args:
+            keys (Iterable[str]): All known keys
+            now (float, optional): Reference timestamp
+            limit (int, optional): Maximum number of keys to return
+
+        Returns:
+            list[str]: Keys due for a revisit
+        """
+        now = time.time() if now is None else now
+        due_keys = [key for key in keys if self.is_due(key, now)]
+        due_keys.sort(key=lambda key: self.entries.get(key, {}).get("next_check", 0))
+        return due_keys[:limit] if limit is not None else due_keys
+
+    def validators(self, key):
+        """
+        Returns stored HTTP validators for conditional requests
+
+        Returns:
+            dict: Possibly empty dict with 'etag' and/or 'last_modified'
+        """
+        entry = self.entries.get(key) or {}
+        return {name: entry[name] for name in ("etag", "last_modified") if entry.get(name)}
+
+    def record(self, key, content_fingerprint=None, etag=None, last_modified=None, changed=None, now=None):
+        """
+        Records the result of a visit and schedules the next one
+
+        Args:
+            key (str): Visited key (e.g. page URL)
+            content_fingerprint (str, optional): New fingerprint, compared with the stored one
+            etag (str, optional): ETag response header
+            last_modified (str, optional): Last-Modified response header
+            changed (bool, optional): Explicit change flag (e.g. False after HTTP 304)
+            now (float, optional): Visit timestamp
+
+        Returns:
+            bool: True if the content changed since the previous visit
+        """
+        now = time.time() if now is None else now
+        entry = self.entries.get(key)
+        is_new = entry is None
+
+        if is_new:
+            entry = {"checks": 0, "changes": 0, "interval": self.initial_interval}
+
+        if changed is None:
+            changed = is_new or content_fingerprint != entry.get("fingerprint")
+
+        entry["checks"] += 1
+        if changed and not is_new:
+            entry["changes"] += 1
+            entry["last_changed"] = now
+
+        if not is_new:
+            factor = CHANGED_FACTOR if changed else UNCHANGED_FACTOR
+            entry["interval"] = min(self.max_interval, max(self.min_interval, entry["interval"] * factor))
+
+        if content_fingerprint is not None:
+            entry["fingerprint"] = content_fingerprint
+        if etag:
+            entry["etag"] = etag
+        if last_modified:
+            entry["last_modified"] = last_modified
+        entry["last_checked"] = now
+        entry["next_check"] = now + entry["interval"]
+
+        self.entries[key] = entry
+        return changed
@@ -0,0 +1,151 @@
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import tracing
+
+VERIFY_WORKERS = int(os.getenv("VERIFY_WORKERS", "2"))
+VERIFY_QUEUE_LIMIT = int(os.getenv("VERIFY_QUEUE_LIMIT", "50"))
+VERIFY_FAILURE_TTL = float(os.getenv("VERIFY_FAILURE_TTL", "60"))
+VERIFY_RESULT_TTL = float(os.getenv("VERIFY_RESULT_TTL", "600"))
+
+PENDING = "pending"
+VERIFIED = "verified"
+FAILED = "failed"
+
+
+class VerificationQueueFull(Exception):
+    """
+    Raised when more verifications are waiting than VERIFY_QUEUE_LIMIT allows
+    """
+
+
+class CredentialVerifier:
+    """
+    Runs slow credential checks (a browser login) on a dedicated bounded pool.
+    Identical concurrent attempts share one check, and credentials that just
+    were rejected are refused from a short-lived negative cache without a new check
+    """
+
+    def __init__(self, verify, on_verified=None, workers=VERIFY_WORKERS, queue_limit=VERIFY_QUEUE_LIMIT,
+                 failure_ttl=VERIFY_FAILURE_TTL, result_ttl=VERIFY_RESULT_TTL):
+        """
+        Args:
+            verify (Callable[[str, str], bool]): Checks a login and password
+            on_verified (Callable[[str, str], dict], optional): Runs after a successful check,
+                e.g. to create the account; its return value is merged into the status
+            workers (int): Maximum number of checks running at the same time
+            queue_limit (int): Maximum number of unfinished checks
+            failure_ttl (float): Seconds a failed login and password pair is rejected without a new check
+            result_ttl (float): Seconds a finished status stays available for polling
+        """
+        self.verify = verify
+        self.on_verified = on_verified
+        self.queue_limit = queue_limit
+        self.failure_ttl = failure_ttl
+        self.result_ttl = result_ttl
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="verify")
+        self._digest_key = secrets.token_bytes(32)
+        self._lock = threading.Lock()
+        self._statuses = {}
+        self._in_flight = {}
+        self._failures = {}
+
+    def _digest(self, login, password):
+        return hmac.new(self._digest_key, f"{login}\0{password}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def _prune(self, now):
+        for verification_id, status in list(self._statuses.items()):
+            if status["status"] != PENDING and now - status["finished_at"] > self.result_ttl:
+                del self._statuses[verification_id]
+        for digest, failed_at in list(self._failures.items()):
+            if now - failed_at > self.failure_ttl:
+                del self._failures[digest]
+
+    def submit(self, login, password):
+        """
+        Starts a check or joins an identical one that is already running
+
+        Args:
+            login (str): Account login
+            password (str): Account password
+
+        Returns:
+            dict: Current status with 'verification_id' and 'status'
+
+        Raises:
+            VerificationQueueFull: If too many checks are already waiting
+        """
+        digest = self._digest(login, password)
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            if digest in self._in_flight:
+                return dict(self._statuses[self._in_flight[digest]])
+
+            verification_id = str(uuid.uuid4())
+            status = {"verification_id": verification_id, "login": login, "status": PENDING,
+                      "created_at": now, "finished_at": None, "error": None}
+            if digest in self._failures:
+                status.update(status=FAILED, finished_at=now, error="Invalid credentials (recently rejected).")
+                self._statuses[verification_id] = status
+                return dict(status)
+
+            if len(self._in_flight) >= self.queue_limit:
+                raise VerificationQueueFull(f"{len(self._in_flight)} verifications are already waiting")
+            self._statuses[verification_id] = status
+            self._in_flight[digest] = verification_id
+
+        self.executor.submit(tracing.in_current_context(self._run), verification_id, digest, login, password)
+        return dict(status)
+
+    def _run(self, verification_id, digest, login, password):
+        update = {}
+        rejected = False
+        try:
+            with tracing.span("auth.verify", verification_id=verification_id):
+                verified = self.verify(login, password)
+            if verified and self.on_verified:
+                update = dict(self.on_verified(login, password) or {})
+            update["status"] = VERIFIED if verified else FAILED
+            if not verified:
+                rejected = True
+                update["error"] = "Invalid Sainsbury's credentials."
+        except Exception as e:
+            # Browser, database or hashing errors say nothing about the credentials, so they are not cached
+            print(f"[VERIFY {verification_id}] {e}")
+            update = {"status": FAILED, "error": str(e)}
+
+        now = time.time()
+        with self._lock:
+            self._statuses[verification_id].update(update, finished_at=now)
+            self._in_flight.pop(digest, None)
+            if rejected:
+                self._failures[digest] = now
+
+    def status(self, verification_id):
+        """
+        Returns the status of a check
+
+        Returns:
+            dict | None: Status with 'status' ('pending', 'verified' or 'failed') or None if unknown or expired
+        """
+        with self._lock:
+            status = self._statuses.get(verification_id)
+            return dict(status) if status else None
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._in_flight),
+                "queue_limit": self.queue_limit,
+                "negative_cache": len(self._failures),
+                "statuses": len(self._statuses),
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,5 +1,4 @@
 import os
-import psycopg2
 
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
@@ -9,31 +8,46 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 
 CATEGORIES_DIR = "categories"
 
-conn = psycopg2.connect(
-    host=DB_HOST,
-    port=DB_PORT,
-    dbname=DB_NAME,
-    user=DB_USER,
-    password=DB_PASSWORD
-)
-
-cur = conn.cursor()
-cur.execute("""
-CREATE TABLE IF NOT EXISTS products (
-    id SERIAL PRIMARY KEY,
-    name TEXT NOT NULL,
-    url TEXT NOT NULL,
-    category TEXT NOT NULL
-)
-""")
-conn.commit()
-
-
-def parse_and_insert_from_files():
+
+def get_db_connection():
+    """
+    Establish a connection to the PostgreSQL database and make sure the products table exists
+
+    Returns:
+        psycopg2.extensions.connection: Database connection object
+    """
+    import psycopg2
+    conn = psycopg2.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD
+    )
+
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        id SERIAL PRIMARY KEY,
+        name TEXT NOT NULL,
+        url TEXT NOT NULL,
+        category TEXT NOT NULL
+    )
+    """)
+    conn.commit()
+    cur.close()
+    return conn
+
+
+def parse_and_insert_from_files(conn):
     """
     Read each .txt file from the categories directory,
     extract product name and URL, and insert into the database
+
+    Args:
+        conn (psycopg2.extensions.connection): Database connection
     """
+    cur = conn.cursor()
     for filename in os.listdir(CATEGORIES_DIR):
         category = filename.replace(".txt", "").strip()
         filepath = os.path.join(CATEGORIES_DIR, filename)
@@ -49,9 +63,20 @@ def parse_and_insert_from_files():
                         (name, url, category)
                     )
     conn.commit()
+    cur.close()
+
+
+def main():
+    """
+    Exports all category files into the products table
+    """
+    conn = get_db_connection()
+    try:
+        parse_and_insert_from_files(conn)
+    finally:
+        conn.close()
+    print("Export successful")
 
 
-parse_and_insert_from_files()
-cur.close()
-conn.close()
-print("Export successful")
+if __name__ == "__main__":
+    main()
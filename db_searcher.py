@@ -1,10 +1,9 @@
 from fastapi import FastAPI, HTTPException, Query
 from typing import List
-import psycopg2
 import os
 from dotenv import load_dotenv
-import openai
 import logging
+import tracing
 
 load_dotenv()
 DB_HOST = os.getenv("DB_HOST")
@@ -13,7 +12,6 @@ DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 OPENAI_API_KEY = os.getenv("OPENAI_PLUS_KEY")
-openai.api_key = OPENAI_API_KEY
 
 app = FastAPI(
     title="Smart Grocery Product Search",
@@ -35,6 +33,23 @@ CATEGORIES = [
 ]
 
 
+_openai_client = None
+
+
+def get_openai_client():
+    """
+    Returns the OpenAI client, created on first use so the service starts without loading the SDK
+
+    Returns:
+        openai.OpenAI: Shared client
+    """
+    global _openai_client
+    if _openai_client is None:
+        from openai import OpenAI
+        _openai_client = OpenAI(api_key=OPENAI_API_KEY)
+    return _openai_client
+
+
 def get_db_connection():
     """
     Establish a connection to the PostgreSQL database
@@ -42,6 +57,7 @@ def get_db_connection():
     Returns:
         psycopg2.extensions.connection: Database connection object
     """
+    import psycopg2
     return psycopg2.connect(
         host=DB_HOST,
         port=DB_PORT,
@@ -51,6 +67,7 @@ def get_db_connection():
     )
 
 
+@tracing.traced("llm.category")
 def get_category_from_query(query: str) -> str:
     """
     Use GPT to classify the user's query into a known product category
@@ -67,7 +84,7 @@ def get_category_from_query(query: str) -> str:
     If the user's query is not in English, first translate it into English. Then choose the best matching category from the list above.
     ONLY return the category name from the list."""
 
-    response = openai.chat.completions.create(
+    response = get_openai_client().chat.completions.create(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": prompt},
@@ -78,6 +95,7 @@ def get_category_from_query(query: str) -> str:
     return category if category in CATEGORIES else "Uncategorized"
 
 
+@tracing.traced("llm.keywords")
 def extract_keywords(query: str) -> List[str]:
     """
     Extract 1–3 key terms from the user's query (e.g. brand, product type)
@@ -94,7 +112,7 @@ def extract_keywords(query: str) -> List[str]:
     If the user's query is not in English, first translate it into English.
     Return a comma-separated list."""
 
-    response = openai.chat.completions.create(
+    response = get_openai_client().chat.completions.create(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": prompt},
@@ -105,6 +123,7 @@ def extract_keywords(query: str) -> List[str]:
     return [k.strip() for k in keywords if k.strip()]
 
 
+@tracing.traced("llm.validate_match")
 def validate_match(product_name: str, query: str) -> bool:
     """
     Determine if a product name matches the user's intent
@@ -120,7 +139,7 @@ def validate_match(product_name: str, query: str) -> bool:
     Product name: "{product_name}"
     Does this product match the intent of the user request? Respond with 'Yes' or 'No' only."""
 
-    response = openai.chat.completions.create(
+    response = get_openai_client().chat.completions.create(
         model="gpt-4o-mini",
         messages=[{"role": "user", "content": prompt}]
     )
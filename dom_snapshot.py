@@ -0,0 +1,145 @@
+SLOT_BUTTON_SELECTOR = "#slot-table button.book-slot-grid__slot"
+ORDER_CARD_SELECTOR = ".ln-c-card.order-details__card"
+ORDER_LINK_SELECTOR = ".order__controls-button"
+
+_SLOT_GRID_SCRIPT = """
+var table = document.getElementById("slot-table");
+if (!table) { return null; }
+
+var headers = Array.from(table.querySelectorAll("thead th")).map(function (th) {
+    return th.innerText.replace(/\\s+/g, " ").trim();
+});
+var buttons = Array.from(table.querySelectorAll("button.book-slot-grid__slot"));
+var slots = [];
+
+Array.from(table.querySelectorAll("tbody tr")).forEach(function (row) {
+    var rowHeader = row.querySelector("th");
+    var time = rowHeader ? rowHeader.innerText.replace(/\\s+/g, " ").trim() : "";
+    var cells = Array.from(row.querySelectorAll("td"));
+    var offset = headers.length - cells.length;
+
+    cells.forEach(function (cell, column) {
+        var button = cell.querySelector("button.book-slot-grid__slot");
+        if (!button) { return; }
+        var text = button.innerText.replace(/\\s+/g, " ").trim();
+        var price = text.match(/£\\s*(\\d+(?:\\.\\d+)?)/);
+        var status = "available";
+        if (button.className.indexOf("book-slot-grid__slot-full") !== -1) {
+            status = "full";
+        } else if (text.indexOf("Unavailable") !== -1 || button.disabled) {
+            status = "unavailable";
+        }
+        slots.push({
+            index: buttons.indexOf(button),
+            day: headers[column + offset] || "",
+            time: time || (button.getAttribute("aria-label") || ""),
+            status: status,
+            price: price ? parseFloat(price[1]) : null,
+            text: text
+        });
+    });
+});
+return slots;
+"""
+
+_CLICK_SCRIPT = """
+var element = document.querySelectorAll(arguments[0])[arguments[1]];
+if (!element) { return false; }
+element.scrollIntoView(true);
+element.click();
+return true;
+"""
+
+_ORDER_LINKS_SCRIPT = """
+return Array.from(document.querySelectorAll(arguments[0])).map(function (control) {
+    var link = control.closest("a") || control.querySelector("a");
+    var href = control.href || (link && link.href) || control.getAttribute("data-href") || "";
+    var match = href.match(/\\/orders\\/(\\d+)/);
+    return match ? {url: href, number: match[1]} : null;
+});
+"""
+
+_ORDER_CARDS_SCRIPT = """
+return Array.from(document.querySelectorAll(arguments[0])).map(function (card) {
+    return card.innerText;
+});
+"""
+
+
+def snapshot_slot_grid(driver):
+    """
+    Serializes the delivery slot grid with a single script call
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+
+    Returns:
+        list[dict] | None: Slots with 'index', 'day', 'time', 'status', 'price' and 'text',
+        or None if the grid is not on the page
+    """
+    return driver.execute_script(_SLOT_GRID_SCRIPT)
+
+
+def first_available_slot(slots):
+    """
+    Picks the first bookable slot in grid order
+
+    Args:
+        slots (list[dict]): Output of snapshot_slot_grid
+
+    Returns:
+        dict | None: Selected slot or None if nothing is available
+    """
+    return next((slot for slot in slots or [] if slot["status"] == "available"), None)
+
+
+def click_nth(driver, selector, index):
+    """
+    Scrolls to and clicks the n-th element matching a CSS selector in one call
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+        selector (str): CSS selector
+        index (int): Position among the matching elements
+
+    Returns:
+        bool: True if the element existed and was clicked
+    """
+    return driver.execute_script(_CLICK_SCRIPT, selector, index)
+
+
+def click_slot(driver, slot):
+    """
+    Clicks the button of a slot returned by snapshot_slot_grid
+    """
+    return click_nth(driver, SLOT_BUTTON_SELECTOR, slot["index"])
+
+
+def snapshot_order_cards(driver):
+    """
+    Returns the visible text of all order detail cards with a single script call
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+
+    Returns:
+        list[str]: Text of each order card
+    """
+    return driver.execute_script(_ORDER_CARDS_SCRIPT, ORDER_CARD_SELECTOR)
+
+
+def snapshot_order_links(driver):
+    """
+    Collects the URL and number of every order on the order list page with a single script call
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+
+    Returns:
+        list[dict] | None: Orders in page order with 'url' and 'number', or None
+        if some order control does not expose its URL
+    """
+    links = driver.execute_script(_ORDER_LINKS_SCRIPT, ORDER_LINK_SELECTOR)
+    if not links or any(link is None for link in links):
+        return None
+    return links
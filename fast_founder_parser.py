@@ -1,26 +1,53 @@
 import os
+import re
 import time
+import queue
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
 from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.common.by import By
+import tracing
 
 load_dotenv()
 USERNAME = os.getenv("WP_USERNAME")
 PASSWORD = os.getenv("WP_PASSWORD")
-LOGIN_URL = "https://fastfounder.ru/wp-login.php"
-NEWS_URL = "https://fastfounder.ru/news/page/{}/"
+BASE_URL = os.getenv("WP_BASE_URL", "https://fastfounder.ru").rstrip("/")
+LOGIN_URL = f"{BASE_URL}/wp-login.php"
+NEWS_URL = BASE_URL + "/news/page/{}/"
 ARTICLES_DIR = "articles"
 TOTAL_PAGES = 234
 ARTICLES_PER_PAGE = 7
+MANIFEST_FILE = os.path.join(ARTICLES_DIR, "manifest.txt")
+URLS_FILE = os.path.join(ARTICLES_DIR, "article_urls.txt")
+COLLECTED_FILE = os.path.join(ARTICLES_DIR, "article_urls_collected.txt")
+WORKERS = int(os.getenv("WP_WORKERS", "4"))
 
-os.makedirs(ARTICLES_DIR, exist_ok=True)
-driver = webdriver.Chrome()
+driver = None
+
+
+def start_driver():
+    """
+    Starts the main browser on first use, so importing this module or
+    running the plain HTTP mode never launches Chrome
+
+    Returns:
+        webdriver.Chrome: The main browser
+    """
+    global driver
+    if driver is None:
+        from selenium import webdriver
+        driver = webdriver.Chrome()
+    return driver
 
 
 def login():
     """
     Logs into the WordPress admin panel using provided credentials
     """
+    from selenium.webdriver.common.by import By
+
+    start_driver()
     driver.get(LOGIN_URL)
     time.sleep(2)
     driver.find_element(By.ID, "user_login").send_keys(USERNAME)
@@ -36,6 +63,8 @@ def get_articles():
     Returns:
         list: A list of WebElements representing article links
     """
+    from selenium.webdriver.common.by import By
+
     time.sleep(1)
     return driver.find_elements(By.CLASS_NAME, "wp-post-image")
 
@@ -47,6 +76,8 @@ def save_article(index):
     Args:
         index (int): Global index of the article (for filename)
     """
+    from selenium.webdriver.common.by import By
+
     time.sleep(1)
     paragraphs = driver.find_elements(By.TAG_NAME, "p")
     content = "\n".join([p.text for p in paragraphs if p.text.strip()])
@@ -72,11 +103,311 @@ def go_to_next_page(page_number):
     time.sleep(1)
 
 
+def collect_article_urls(known_urls):
+    """
+    Phase one: walks the news listing pages and collects article URLs.
+    Once a full pass has finished, stops early at the first page whose articles
+    were all known when that pass finished. URLs saved by an interrupted run do
+    not count, so the next run walks on to the pages it missed
+
+    Args:
+        known_urls (set[str]): Article URLs collected on previous runs
+
+    Returns:
+        list[str]: Newly found article URLs in listing order
+    """
+    collected = read_lines(COLLECTED_FILE)
+    complete_urls = set(read_lines(URLS_FILE)[:int(collected[0])] if collected else [])
+
+    new_urls = []
+    for page in range(1, TOTAL_PAGES + 1):
+        print(f"Collecting links from page {page}/{TOTAL_PAGES}")
+        go_to_next_page(page)
+        page_urls = driver.execute_script(
+            "return Array.from(document.getElementsByClassName('wp-post-image'))"
+            "  .map(function (img) { var a = img.closest('a'); return a ? a.href : null; })"
+            "  .filter(Boolean);"
+        )
+        fresh = [url for url in dict.fromkeys(page_urls) if url not in known_urls]
+        if page_urls and complete_urls.issuperset(page_urls):
+            print("Reached already collected articles, stopping")
+            break
+
+        known_urls.update(fresh)
+        new_urls.extend(fresh)
+        with open(URLS_FILE, "a", encoding="utf-8") as f:
+            for url in fresh:
+                f.write(url + "\n")
+
+    # Everything in the URL list up to here was reached by a finished pass
+    with open(COLLECTED_FILE, "w", encoding="utf-8") as f:
+        f.write(f"{len(read_lines(URLS_FILE))}\n")
+    return new_urls
+
+
+def read_lines(path):
+    """
+    Reads non-empty lines of a text file, returning an empty list if it does not exist
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def article_filename(url):
+    """
+    Builds a stable file name for an article from its URL slug
+
+    Args:
+        url (str): Article URL
+
+    Returns:
+        str: Path of the article file inside ARTICLES_DIR
+    """
+    slug = url.rstrip("/").rsplit("/", 1)[-1]
+    slug = re.sub(r"[^\w.-]+", "_", slug)[:150] or "index"
+    return os.path.join(ARTICLES_DIR, f"article_{slug}.txt")
+
+
+def extract_paragraphs(worker_driver):
+    """
+    Collects the text of all non-empty <p> elements with a single script call
+
+    Returns:
+        str: Paragraphs joined by newlines
+    """
+    return worker_driver.execute_script(
+        "return Array.from(document.getElementsByTagName('p'))"
+        "  .map(function (p) { return p.innerText.trim(); })"
+        "  .filter(Boolean).join('\\n');"
+    )
+
+
+def share_session(target_driver):
+    """
+    Copies the WordPress session cookies of the main driver into another browser
+    """
+    target_driver.get(LOGIN_URL)
+    for cookie in driver.get_cookies():
+        cookie.pop("sameSite", None)
+        target_driver.add_cookie(cookie)
+
+
+def harvest_articles(urls, workers=WORKERS):
+    """
+    Phase two: downloads articles directly by URL using several logged-in browsers
+
+    Args:
+        urls (list[str]): Article URLs to fetch
+        workers (int): Number of browsers working in parallel
+    """
+    from selenium import webdriver
+
+    drivers = queue.Queue()
+    drivers.put(driver)
+    extra_drivers = []
+    for _ in range(max(0, min(workers, len(urls)) - 1)):
+        worker_driver = webdriver.Chrome()
+        share_session(worker_driver)
+        extra_drivers.append(worker_driver)
+        drivers.put(worker_driver)
+
+    manifest_lock = threading.Lock()
+
+    def fetch(url):
+        worker_driver = drivers.get()
+        try:
+            with tracing.span("articles.fetch", driver=worker_driver, url=url):
+                worker_driver.get(url)
+                content = extract_paragraphs(worker_driver)
+            filename = article_filename(url)
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(content)
+            with manifest_lock, open(MANIFEST_FILE, "a", encoding="utf-8") as f:
+                f.write(f"{url}\t{filename}\n")
+            print(f"Saved: {filename}")
+        except Exception as e:
+            print(f"Error on article {url}: {e}")
+        finally:
+            drivers.put(worker_driver)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(tracing.in_current_context(fetch), urls))
+    finally:
+        for worker_driver in extra_drivers:
+            worker_driver.quit()
+
+
+def main_fast(workers=WORKERS):
+    """
+    Two-phase harvesting: collects article URLs from the listing pages,
+    then fetches only the articles that are not saved yet
+    """
+    os.makedirs(ARTICLES_DIR, exist_ok=True)
+    login()
+
+    known_urls = set(read_lines(URLS_FILE))
+    collect_article_urls(known_urls)
+
+    saved_urls = {line.split("\t", 1)[0] for line in read_lines(MANIFEST_FILE)}
+    pending = [url for url in read_lines(URLS_FILE)
+               if url not in saved_urls and not os.path.exists(article_filename(url))]
+    print(f"{len(pending)} articles to download, {len(saved_urls)} already saved")
+
+    try:
+        harvest_articles(pending, workers)
+    finally:
+        driver.quit()
+    print("All articles saved.")
+
+
+def create_http_session(pool_size=WORKERS, cookies=None):
+    """
+    Creates a pooled HTTP session and logs in to WordPress with a form POST,
+    unless browser cookies are handed over
+
+    Args:
+        pool_size (int): Maximum number of pooled connections
+        cookies (list[dict], optional): Cookies of a logged-in Selenium session
+
+    Returns:
+        requests.Session: Authenticated HTTP session
+
+    Raises:
+        RuntimeError: If the WordPress login fails
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=3)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "Mozilla/5.0"
+
+    if cookies:
+        for cookie in cookies:
+            session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain") or "",
+                                path=cookie.get("path", "/"))
+        return session
+
+    session.get(LOGIN_URL, timeout=30)
+    response = session.post(LOGIN_URL, data={
+        "log": USERNAME,
+        "pwd": PASSWORD,
+        "wp-submit": "Log In",
+        "redirect_to": f"{BASE_URL}/wp-admin/",
+        "testcookie": "1",
+    }, timeout=30)
+    response.raise_for_status()
+    if not any(name.startswith("wordpress_logged_in") for name in session.cookies.keys()):
+        raise RuntimeError("WordPress login failed")
+    return session
+
+
+def parse_article_links(page_html, page_url):
+    """
+    Extracts article URLs from a news listing page
+
+    Returns:
+        list[str]: Absolute article URLs in page order
+    """
+    from lxml import html as lxml_html
+
+    tree = lxml_html.fromstring(page_html)
+    hrefs = tree.xpath("//img[contains(concat(' ', normalize-space(@class), ' '), ' wp-post-image ')]"
+                       "/ancestor::a[1]/@href")
+    return list(dict.fromkeys(urljoin(page_url, href) for href in hrefs))
+
+
+def parse_paragraphs(page_html):
+    """
+    Extracts the text of all non-empty <p> elements of an article
+
+    Returns:
+        str: Paragraphs joined by newlines
+    """
+    from lxml import html as lxml_html
+
+    tree = lxml_html.fromstring(page_html)
+    texts = (p.text_content().strip() for p in tree.iter("p"))
+    return "\n".join(text for text in texts if text)
+
+
+def main_http(workers=WORKERS, use_browser_login=False):
+    """
+    Harvests all articles over plain HTTP: logs in once, fetches listing pages
+    and articles concurrently through a pooled session and parses them with lxml
+
+    Args:
+        workers (int): Number of concurrent requests
+        use_browser_login (bool): Log in through Selenium and reuse its cookies instead of a form POST
+    """
+    os.makedirs(ARTICLES_DIR, exist_ok=True)
+    cookies = None
+    if use_browser_login:
+        login()
+        cookies = driver.get_cookies()
+        driver.quit()
+
+    session = create_http_session(workers, cookies)
+
+    def fetch_listing(page):
+        url = NEWS_URL.format(page)
+        try:
+            response = session.get(url, timeout=30)
+            response.raise_for_status()
+            return parse_article_links(response.text, url)
+        except Exception as e:
+            print(f"Error on page {page}: {e}")
+            return []
+
+    known_urls = read_lines(URLS_FILE)
+    known_set = set(known_urls)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pages = list(executor.map(fetch_listing, range(1, TOTAL_PAGES + 1)))
+
+    new_urls = [url for page_urls in pages for url in page_urls if url not in known_set]
+    new_urls = list(dict.fromkeys(new_urls))
+    with open(URLS_FILE, "a", encoding="utf-8") as f:
+        for url in new_urls:
+            f.write(url + "\n")
+    print(f"Collected {len(new_urls)} new article links")
+
+    saved_urls = {line.split("\t", 1)[0] for line in read_lines(MANIFEST_FILE)}
+    pending = [url for url in known_urls + new_urls
+               if url not in saved_urls and not os.path.exists(article_filename(url))]
+    print(f"{len(pending)} articles to download, {len(saved_urls)} already saved")
+
+    manifest_lock = threading.Lock()
+
+    def fetch_article(url):
+        try:
+            with tracing.span("articles.http_fetch", url=url):
+                response = session.get(url, timeout=30)
+            response.raise_for_status()
+            filename = article_filename(url)
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(parse_paragraphs(response.content))
+            with manifest_lock, open(MANIFEST_FILE, "a", encoding="utf-8") as f:
+                f.write(f"{url}\t{filename}\n")
+            print(f"Saved: {filename}")
+        except Exception as e:
+            print(f"Error on article {url}: {e}")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(tracing.in_current_context(fetch_article), pending))
+    print("All articles saved.")
+
+
 def main():
     """
     Main script logic: logs in, iterates over pages and articles,
     and saves article content to disk
     """
+    os.makedirs(ARTICLES_DIR, exist_ok=True)
     login()
 
     for page in range(1, TOTAL_PAGES + 1):
@@ -98,4 +429,21 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Save fastfounder.ru news articles as text files")
+    parser.add_argument("--fast", action="store_true",
+                        help="collect article URLs first and fetch them directly with several browsers")
+    parser.add_argument("--http", action="store_true",
+                        help="fetch pages over plain HTTP with a cookie-authenticated session")
+    parser.add_argument("--browser-login", action="store_true",
+                        help="with --http, log in through Selenium instead of a form POST")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="number of browsers for --fast or concurrent requests for --http")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.http:
+        main_http(args.workers, args.browser_login)
+    elif args.fast:
+        main_fast(args.workers)
+    else:
+        main()
\ No newline at end of file
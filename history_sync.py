@@ -0,0 +1,215 @@
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import Counter, deque
+from dotenv import load_dotenv
+from order_jobs import default_concurrency
+from session_store import has_session
+
+load_dotenv()
+DB_HOST = os.getenv("DB_HOST")
+DB_PORT = os.getenv("DB_PORT")
+DB_NAME = os.getenv("DB_NAME")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+SYNC_CONCURRENCY = int(os.getenv("SYNC_CONCURRENCY", "0")) or default_concurrency()
+SYNC_ACCOUNT_TIMEOUT = float(os.getenv("SYNC_ACCOUNT_TIMEOUT", "900"))
+SYNC_REPORT_DIR = os.getenv("SYNC_REPORT_DIR", "sync_reports")
+# spawn gives every account a clean interpreter; fork is only meant for tests that patch main
+SYNC_START_METHOD = os.getenv("SYNC_START_METHOD", "spawn")
+
+
+def load_credentials_file(path):
+    """
+    Reads accounts from a text file with one 'login:password' or bare 'login' per line.
+    Accounts without a password can only be synced from a stored session
+
+    Args:
+        path (str): Credentials file; blank lines and lines starting with '#' are ignored
+
+    Returns:
+        list[tuple[str, str | None]]: (login, password) pairs
+    """
+    accounts = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            login, _, password = line.partition(":")
+            accounts.append((login.strip(), password or None))
+    return accounts
+
+
+def load_credentials_from_db():
+    """
+    Reads every login from the auth_server users table. Only password hashes are stored
+    there, so these accounts are synced from their stored sessions
+
+    Returns:
+        list[tuple[str, None]]: (login, None) pairs
+    """
+    import psycopg2
+    conn = psycopg2.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD
+    )
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT login FROM users ORDER BY login")
+        logins = [row[0] for row in cur.fetchall()]
+        cur.close()
+    finally:
+        conn.close()
+    return [(login, None) for login in logins]
+
+
+def _sync_worker(connection, login, password, profile_dir, analyze):
+    # Turn SIGTERM from the timeout into SystemExit so sync_account still quits Chrome
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+    from main import sync_account
+    try:
+        connection.send(sync_account(login, password, profile_dir, analyze))
+    finally:
+        connection.close()
+
+
+def _failed(login, status, error, started):
+    return {"login": login, "uuid": None, "status": status, "new_orders": 0, "total_orders": 0,
+            "duration": round(time.time() - started, 2), "error": error}
+
+
+def run_sync(accounts, concurrency=SYNC_CONCURRENCY, timeout=SYNC_ACCOUNT_TIMEOUT, analyze=False, profiles_dir=None):
+    """
+    Syncs the order history of many accounts, each in its own process and browser profile,
+    with at most `concurrency` browsers at a time. An account that runs longer than `timeout`
+    is terminated and reported instead of holding up the rest of the batch
+
+    Args:
+        accounts (list[tuple[str, str | None]]): (login, password) pairs
+        concurrency (int): Maximum number of accounts synced at once
+        timeout (float): Seconds allowed per account
+        analyze (bool): Refresh each account's purchase plan after syncing
+        profiles_dir (str, optional): Keep a persistent profile per account in this folder,
+            temporary profiles are used if omitted
+
+    Returns:
+        list[dict]: One result per account, as returned by main.sync_account, with status
+        'ok', 'error', 'timeout', 'crashed' or 'no_session'
+    """
+    context = multiprocessing.get_context(SYNC_START_METHOD)
+    pending = deque()
+    results = []
+    for login, password in accounts:
+        if password is None and not has_session(login):
+            results.append(_failed(login, "no_session", "no password and no stored session", time.time()))
+        else:
+            pending.append((login, password))
+
+    running = {}
+    while pending or running:
+        while pending and len(running) < max(1, concurrency):
+            login, password = pending.popleft()
+            profile_dir = None
+            if profiles_dir:
+                profile_dir = os.path.join(profiles_dir, login.replace(os.sep, "_"))
+                os.makedirs(profile_dir, exist_ok=True)
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_sync_worker, args=(sender, login, password, profile_dir, analyze),
+                                      name=f"sync-{login}", daemon=True)
+            process.start()
+            sender.close()
+            running[process] = (login, receiver, time.time())
+            print(f"Started sync for {login} ({len(running)} running, {len(pending)} queued)")
+
+        time.sleep(0.5)
+        for process, (login, receiver, started) in list(running.items()):
+            if receiver.poll():
+                try:
+                    results.append(receiver.recv())
+                except EOFError:
+                    results.append(_failed(login, "crashed", f"exit code {process.exitcode}", started))
+            elif not process.is_alive():
+                results.append(_failed(login, "crashed", f"exit code {process.exitcode}", started))
+            elif time.time() - started > timeout:
+                process.terminate()
+                process.join(30)
+                if process.is_alive():
+                    process.kill()
+                results.append(_failed(login, "timeout", f"exceeded {timeout:.0f}s", started))
+            else:
+                continue
+            process.join(5)
+            receiver.close()
+            del running[process]
+            print(f"Finished sync for {login}: {results[-1]['status']}")
+    return results
+
+
+def write_report(results, started, path=None):
+    """
+    Writes an aggregated JSON report of a sync run
+
+    Args:
+        results (list[dict]): Output of run_sync
+        started (float): Start time of the run
+        path (str, optional): Report path, SYNC_REPORT_DIR/sync-<time>.json by default
+
+    Returns:
+        str: Path of the written report
+    """
+    if path is None:
+        os.makedirs(SYNC_REPORT_DIR, exist_ok=True)
+        path = os.path.join(SYNC_REPORT_DIR, time.strftime("sync-%Y%m%d-%H%M%S.json", time.localtime(started)))
+    durations = sorted(result["duration"] for result in results)
+    report = {
+        "started": started,
+        "duration": round(time.time() - started, 2),
+        "accounts": len(results),
+        "statuses": dict(Counter(result["status"] for result in results)),
+        "new_orders": sum(result["new_orders"] for result in results),
+        "slowest_account": durations[-1] if durations else 0.0,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    return path
+
+
+def print_report(results):
+    """
+    Prints one line per account, slowest first, followed by the number of accounts per status
+    """
+    print(f"{'account':<40} {'status':<10} {'new':>5} {'total':>6} {'seconds':>8}  error")
+    for result in sorted(results, key=lambda result: result["duration"], reverse=True):
+        print(f"{result['login'][:40]:<40} {result['status']:<10} {result['new_orders']:>5} "
+              f"{result['total_orders']:>6} {result['duration']:>8.1f}  {result['error'] or ''}")
+    statuses = Counter(result["status"] for result in results)
+    print(", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync order history for many accounts in parallel")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--credentials", help="file with one 'login:password' (or 'login') per line")
+    source.add_argument("--from-db", action="store_true", help="sync every account of the auth_server users table")
+    parser.add_argument("--concurrency", type=int, default=SYNC_CONCURRENCY, help="accounts synced at once")
+    parser.add_argument("--timeout", type=float, default=SYNC_ACCOUNT_TIMEOUT, help="seconds allowed per account")
+    parser.add_argument("--analyze", action="store_true", help="refresh purchase plans after syncing")
+    parser.add_argument("--profiles-dir", help="keep a persistent browser profile per account in this folder")
+    parser.add_argument("--report", help="report path, defaults to sync_reports/sync-<time>.json")
+    args = parser.parse_args()
+
+    run_started = time.time()
+    accounts = load_credentials_from_db() if args.from_db else load_credentials_file(args.credentials)
+    print(f"Syncing {len(accounts)} accounts, {args.concurrency} at a time")
+    sync_results = run_sync(accounts, args.concurrency, args.timeout, args.analyze, args.profiles_dir)
+    print_report(sync_results)
+    print(f"Report written to {write_report(sync_results, run_started, args.report)}")
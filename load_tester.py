@@ -0,0 +1,465 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from percentiles import percentile
+
+LOCAL_SERVICES = ("auth_server", "db_searcher", "order_automator")
+STUB_USERS = 100
+STUB_PASSWORD = "password"
+STUB_CATEGORY = "Milk, yogurts, kefir"
+
+
+# ----------------------------
+# Scenarios
+# ----------------------------
+def load_scenario(path):
+    """
+    Reads a JSON scenario file.
+
+    A scenario sets 'base_url', 'model' ('closed' or 'open'), 'concurrency',
+    'rate' (arrivals per second, open model only), 'duration', 'think_time',
+    'timeout' and 'variables'. It also lists 'requests' as weighted request
+    templates with 'name', 'method', 'path' and 'weight', plus optional
+    'params', 'form', 'json', 'expect' (status codes) and 'save'
+    (response JSON fields stored as variables for later requests of the same worker)
+
+    Args:
+        path (str): Scenario file
+
+    Returns:
+        dict: Scenario with defaults applied
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        scenario = json.load(file)
+    scenario.setdefault("base_url", "http://127.0.0.1:8000")
+    scenario.setdefault("model", "closed")
+    scenario.setdefault("concurrency", 10)
+    scenario.setdefault("rate", 10.0)
+    scenario.setdefault("duration", 30.0)
+    scenario.setdefault("think_time", 0.0)
+    scenario.setdefault("timeout", 30.0)
+    scenario.setdefault("variables", {})
+    if not scenario.get("requests"):
+        raise ValueError(f"Scenario {path} has no requests")
+    return scenario
+
+
+def _render(value, variables):
+    if isinstance(value, str):
+        return value.format(**variables)
+    if isinstance(value, dict):
+        return {key: _render(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_render(item, variables) for item in value]
+    return value
+
+
+# ----------------------------
+# Statistics
+# ----------------------------
+class LoadStats:
+    """
+    Thread-safe latency and error records per request name
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.statuses = {}
+
+    def record(self, name, latency, status, ok):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(latency)
+            self.statuses.setdefault(name, {})
+            self.statuses[name][status] = self.statuses[name].get(status, 0) + 1
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, elapsed):
+        """
+        Aggregates the records of a run
+
+        Args:
+            elapsed (float): Run duration in seconds
+
+        Returns:
+            dict: 'requests' per name plus a 'total' row, each with count, errors, error_rate,
+            throughput, mean, p50, p95, p99 and max latency in milliseconds, and a latency 'histogram'
+        """
+        with self._lock:
+            rows = {name: self._row(values, self.errors.get(name, 0), self.statuses[name], elapsed)
+                    for name, values in self.latencies.items()}
+            all_values = [value for values in self.latencies.values() for value in values]
+            total = self._row(all_values, sum(self.errors.values()), {}, elapsed)
+        return {"elapsed": elapsed, "requests": rows, "total": total, "histogram": histogram(all_values)}
+
+    @staticmethod
+    def _row(values, errors, statuses, elapsed):
+        values = sorted(values)
+        count = len(values)
+        return {
+            "count": count,
+            "errors": errors,
+            "error_rate": errors / count if count else 0.0,
+            "throughput": count / elapsed if elapsed else 0.0,
+            "mean_ms": 1000 * sum(values) / count if count else 0.0,
+            "p50_ms": 1000 * percentile(values, 0.50),
+            "p95_ms": 1000 * percentile(values, 0.95),
+            "p99_ms": 1000 * percentile(values, 0.99),
+            "max_ms": 1000 * values[-1] if values else 0.0,
+            "statuses": {str(status): number for status, number in statuses.items()},
+        }
+
+
+def histogram(latencies):
+    """
+    Buckets latencies by powers of two milliseconds
+
+    Returns:
+        list[tuple[str, int]]: (bucket label, count) pairs in increasing order
+    """
+    buckets = {}
+    for latency in latencies:
+        upper = 1
+        while upper < latency * 1000:
+            upper *= 2
+        buckets[upper] = buckets.get(upper, 0) + 1
+    return [(f"<={upper}ms", buckets[upper]) for upper in sorted(buckets)]
+
+
+# ----------------------------
+# Load generation
+# ----------------------------
+class LoadRunner:
+    """
+    Sends scenario requests in a closed model (a fixed number of workers, each waiting
+    for its response before the next request) or an open model (Poisson arrivals at a
+    fixed rate, whatever the response times). Open-model latencies are measured from
+    the scheduled arrival time, so queueing in the client is counted rather than hidden
+    """
+
+    def __init__(self, scenario, stats=None):
+        self.scenario = scenario
+        self.stats = stats or LoadStats()
+        self.requests = scenario["requests"]
+        self.weights = [request.get("weight", 1) for request in self.requests]
+        self._local = threading.local()
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            import requests
+            self._local.session = requests.Session()
+            self._local.variables = dict(self.scenario["variables"])
+        return self._local.session
+
+    def _next_number(self):
+        with self._counter_lock:
+            self._counter += 1
+            return self._counter
+
+    def send(self, template, scheduled=None):
+        """
+        Sends one request rendered from a template and records its latency and outcome
+        """
+        session = self._session()
+        variables = {
+            **self._local.variables,
+            "n": self._next_number(),
+            "worker": threading.current_thread().name,
+            "user_index": random.randrange(STUB_USERS),
+        }
+        started = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            response = session.request(
+                template.get("method", "GET"),
+                self.scenario["base_url"].rstrip("/") + _render(template["path"], variables),
+                params=_render(template.get("params"), variables),
+                data=_render(template.get("form"), variables),
+                json=_render(template.get("json"), variables),
+                timeout=self.scenario["timeout"],
+            )
+            status = response.status_code
+            expected = template.get("expect")
+            ok = status in expected if expected else status < 400
+            if ok and template.get("save"):
+                body = response.json()
+                for variable, field in template["save"].items():
+                    if field in body:
+                        self._local.variables[variable] = body[field]
+        except Exception as e:
+            status = type(e).__name__
+            ok = False
+        self.stats.record(template.get("name", template["path"]), time.perf_counter() - started, status, ok)
+
+    def _pick(self):
+        return random.choices(self.requests, weights=self.weights)[0]
+
+    def run_closed(self, concurrency, duration, think_time=0.0):
+        deadline = time.perf_counter() + duration
+
+        def worker():
+            while time.perf_counter() < deadline:
+                self.send(self._pick())
+                if think_time:
+                    time.sleep(random.expovariate(1 / think_time))
+
+        threads = [threading.Thread(target=worker, name=f"worker-{index}") for index in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_open(self, rate, duration, max_in_flight):
+        with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="worker") as executor:
+            started = time.perf_counter()
+            scheduled = started
+            while True:
+                scheduled += random.expovariate(rate)
+                if scheduled - started > duration:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self.send, self._pick(), scheduled)
+
+    def run(self):
+        """
+        Runs the scenario with its workload model
+
+        Returns:
+            dict: Output of LoadStats.summary
+        """
+        scenario = self.scenario
+        started = time.perf_counter()
+        if scenario["model"] == "open":
+            self.run_open(scenario["rate"], scenario["duration"], scenario["concurrency"])
+        else:
+            self.run_closed(scenario["concurrency"], scenario["duration"], scenario["think_time"])
+        return self.stats.summary(time.perf_counter() - started)
+
+
+# ----------------------------
+# Local services with stubbed dependencies
+# ----------------------------
+class _StubCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection.db.cursor()
+        self.rowcount = -1
+
+    def execute(self, sql, params=()):
+        sql = sql.replace("%s", "?").replace("ILIKE", "LIKE")
+        with self.connection.lock:
+            self._cursor.execute(sql, tuple(params or ()))
+            self._rows = self._cursor.fetchall()
+            self.rowcount = self._cursor.rowcount
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class _StubConnection:
+    def __init__(self, db, lock):
+        self.db = db
+        self.lock = lock
+
+    def cursor(self):
+        return _StubCursor(self)
+
+    def commit(self):
+        with self.lock:
+            self.db.commit()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class StubPostgres:
+    """
+    In-memory SQLite stand-in for psycopg2.connect with the users and products tables
+    the services query, seeded with STUB_USERS users whose password is STUB_PASSWORD
+    """
+
+    def __init__(self, latency=0.0):
+        import bcrypt
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(":memory:", check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE users (id INTEGER PRIMARY KEY, uuid TEXT UNIQUE, login TEXT UNIQUE, password TEXT,
+                                first_name TEXT, last_name TEXT, phone TEXT, postcode TEXT, address TEXT);
+            CREATE TABLE products (name TEXT, url TEXT, category TEXT);
+        """)
+        rounds = int(os.getenv("BCRYPT_ROUNDS", "12"))
+        password_hash = bcrypt.hashpw(STUB_PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+        self.db.executemany(
+            "INSERT INTO users (uuid, login, password) VALUES (?, ?, ?)",
+            [(f"00000000-0000-0000-0000-{index:012d}", f"user{index}@example.com", password_hash)
+             for index in range(STUB_USERS)]
+        )
+        self.db.executemany(
+            "INSERT INTO products (name, url, category) VALUES (?, ?, ?)",
+            [(f"Milk {index} 2L", f"https://example.com/gol-ui/product/milk-{index}", STUB_CATEGORY)
+             for index in range(200)]
+        )
+        self.db.commit()
+
+    def connect(self, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return _StubConnection(self.db, self.lock)
+
+
+def _stub_openai(latency):
+    def create(model=None, messages=None, **kwargs):
+        time.sleep(latency)
+        prompt = " ".join(message["content"] for message in messages or [])
+        if "classification" in prompt:
+            content = STUB_CATEGORY
+        elif "keywords" in prompt:
+            content = "milk"
+        else:
+            content = "Yes"
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    completions = types.SimpleNamespace(create=create)
+    return types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions), api_key=None)
+
+
+def start_local_app(service, port, db_latency=0.002, llm_latency=0.3, browser_latency=5.0):
+    """
+    Imports a service and serves it with uvicorn in a background thread. Postgres, OpenAI
+    and every browser flow are replaced by stubs with fixed latencies, so the run measures
+    our own request handling, pools and queues rather than the external systems
+
+    Args:
+        service (str): One of LOCAL_SERVICES
+        port (int): Local port
+        db_latency (float): Seconds added to every stubbed database connection
+        llm_latency (float): Seconds per stubbed OpenAI call
+        browser_latency (float): Seconds per stubbed browser login or order
+
+    Returns:
+        uvicorn.Server: Running server; set `should_exit` to stop it
+    """
+    import uvicorn
+
+    work_dir = tempfile.mkdtemp(prefix=f"load-{service}-")
+    os.environ.setdefault("ORDER_JOBS_DB", os.path.join(work_dir, "order_jobs.db"))
+    os.environ.setdefault("USER_REGISTRY_DB", os.path.join(work_dir, "user_registry.db"))
+    os.environ.setdefault("TRACE_DIR", os.path.join(work_dir, "traces"))
+    os.environ.pop("DB_HOST", None)
+
+    postgres = StubPostgres(db_latency)
+    try:
+        import psycopg2
+    except ImportError:
+        psycopg2 = sys.modules["psycopg2"] = types.ModuleType("psycopg2")
+    psycopg2.connect = postgres.connect
+
+    module = __import__(service)
+    if hasattr(module, "browser_pool"):
+        module.browser_pool.start = lambda: None
+        module.browser_pool.close = lambda: None
+
+    if service == "auth_server":
+        def verify(login, password):
+            time.sleep(browser_latency)
+            return password == STUB_PASSWORD
+        module.credential_verifier.verify = verify
+    elif service == "db_searcher":
+        stub_client = _stub_openai(llm_latency)
+        module.get_openai_client = lambda: stub_client
+    elif service == "order_automator":
+        def run_order(payload, progress):
+            module.order_jobs.pop_secret(progress.job_id)
+            with progress.stage("add_to_cart"):
+                time.sleep(browser_latency / 2)
+            with progress.stage("checkout"):
+                time.sleep(browser_latency / 2)
+        module.order_jobs.handler = run_order
+
+    server = uvicorn.Server(uvicorn.Config(module.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name=f"{service}-server", daemon=True).start()
+    deadline = time.time() + 30
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError(f"{service} did not start on port {port}")
+        time.sleep(0.05)
+    print(f"Started local {service} on port {port} with stubbed Postgres, OpenAI and browsers")
+    return server
+
+
+def print_summary(summary):
+    print(f"{'request':<24} {'count':>7} {'err %':>6} {'req/s':>8} {'mean ms':>9} {'p50 ms':>9} "
+          f"{'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = list(summary["requests"].items()) + [("TOTAL", summary["total"])]
+    for name, row in rows:
+        print(f"{name[:24]:<24} {row['count']:>7} {100 * row['error_rate']:>6.1f} {row['throughput']:>8.1f} "
+              f"{row['mean_ms']:>9.1f} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+              f"{row['max_ms']:>9.1f}")
+    print("\nLatency histogram")
+    peak = max((count for _, count in summary["histogram"]), default=1)
+    for label, count in summary["histogram"]:
+        print(f"{label:>10} {count:>7} {'#' * max(1, round(40 * count / peak))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the FastAPI services with a scenario file")
+    parser.add_argument("scenario", help="JSON scenario file, see load_scenarios/")
+    parser.add_argument("--base-url", help="override the scenario base URL")
+    parser.add_argument("--model", choices=["closed", "open"], help="workload model")
+    parser.add_argument("--concurrency", type=int, help="workers (closed) or maximum requests in flight (open)")
+    parser.add_argument("--rate", type=float, help="arrivals per second for the open model")
+    parser.add_argument("--duration", type=float, help="seconds to run")
+    parser.add_argument("--local", choices=LOCAL_SERVICES, help="start this service locally with stubbed dependencies")
+    parser.add_argument("--port", type=int, default=8765, help="port for --local")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per stubbed OpenAI call")
+    parser.add_argument("--browser-latency", type=float, default=5.0, help="seconds per stubbed browser flow")
+    parser.add_argument("--report", help="write the JSON summary to this file")
+    args = parser.parse_args()
+
+    load_scenario_data = load_scenario(args.scenario)
+    for option in ("base_url", "model", "concurrency", "rate", "duration"):
+        if getattr(args, option) is not None:
+            load_scenario_data[option] = getattr(args, option)
+
+    local_server = None
+    if args.local:
+        local_server = start_local_app(args.local, args.port, llm_latency=args.llm_latency,
+                                       browser_latency=args.browser_latency)
+        load_scenario_data["base_url"] = f"http://127.0.0.1:{args.port}"
+
+    print(f"Running {load_scenario_data['model']} model against {load_scenario_data['base_url']} "
+          f"for {load_scenario_data['duration']}s")
+    load_summary = LoadRunner(load_scenario_data).run()
+    print_summary(load_summary)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            json.dump({"scenario": load_scenario_data, "summary": load_summary}, report_file, indent=2)
+        print(f"Report written to {args.report}")
+    if local_server:
+        local_server.should_exit = True
@@ -1,23 +1,24 @@
-from selenium.webdriver.common.by import By
-from selenium import webdriver
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from dotenv import load_dotenv
-import openai
+from session_store import is_logged_in, restore_session, save_session
+from order_store import OrderStore
+from user_registry import get_registry
+import dom_snapshot
+import tracing
 import time
 import os
-import uuid
 import re
+import shutil
+import tempfile
 
 load_dotenv()
 username = os.getenv("SAINSBURYS_USERNAME")
 password = os.getenv("SAINSBURYS_PASSWORD")
-openai_api_key = os.getenv("OPENAI_API_KEY")
+order_tabs = int(os.getenv("ORDER_TABS", "4"))
 
 
 def get_user_uuid(username):
     """
-    Returns a unique UUID for the given username.
+    Returns a unique UUID for the given username from the shared user registry.
     If not found, generates and stores a new one
 
     Args:
@@ -26,57 +27,76 @@ def get_user_uuid(username):
     Returns:
         str: UUID associated with the user
     """
-    uuid_file = "user_uuids.txt"
+    return get_registry().get_or_create(username)
 
-    if os.path.exists(uuid_file):
-        with open(uuid_file, "r", encoding="utf-8") as file:
-            for line in file:
-                saved_email, saved_uuid = line.strip().split(":")
-                if saved_email == username:
-                    return saved_uuid
-    new_uuid = str(uuid.uuid4())
-    with open(uuid_file, "a", encoding="utf-8") as file:
-        file.write(f"{username}:{new_uuid}\n")
-    return new_uuid
 
+def get_user_folder(username):
+    """
+    Returns the data folder of a user, users/<uuid>, creating it if needed
+
+    Args:
+        username (str): User email or ID
 
-user_uuid = get_user_uuid(username)
-user_folder = os.path.join("users", user_uuid)
-os.makedirs(user_folder, exist_ok=True)
-orders_file = os.path.join(user_folder, "orders.txt")
-plan_file = os.path.join(user_folder, "purchase_plan.txt")
+    Returns:
+        str: Path of the user folder
+    """
+    user_folder = os.path.join("users", get_user_uuid(username))
+    os.makedirs(user_folder, exist_ok=True)
+    return user_folder
 
 
-def login():
+@tracing.traced("history.login")
+def login(username, password=None, profile_dir=None):
     """
-    Logs into the Sainsbury's website using provided credentials
+    Logs into the Sainsbury's website using provided credentials,
+    reusing a stored session when it is still valid
+
+    Args:
+        username (str): Sainsbury's account login
+        password (str, optional): Account password, only needed when no stored session is valid
+        profile_dir (str, optional): Chrome profile folder, Chrome's temporary default if omitted
 
     Returns:
         webdriver.Chrome: Logged-in Selenium driver instance
     """
-    driver = webdriver.Chrome()
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    options = webdriver.ChromeOptions()
+    if profile_dir:
+        options.add_argument(f"--user-data-dir={profile_dir}")
+    driver = webdriver.Chrome(options=options)
 
     try:
-        driver.get("https://www.sainsburys.co.uk/gol-ui/groceries")
-        time.sleep(3)
+        if restore_session(driver, username, password):
+            print("Login successful (stored session)")
+        elif password is None:
+            raise RuntimeError(f"no valid stored session and no password for {username}")
+        else:
+            driver.get("https://www.sainsburys.co.uk/gol-ui/groceries")
+            time.sleep(3)
 
-        wait = WebDriverWait(driver, 10)
-        cookies_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[text()='Accept all']")))
-        cookies_button.click()
-        time.sleep(1)
+            wait = WebDriverWait(driver, 10)
+            cookies_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[text()='Accept all']")))
+            cookies_button.click()
+            time.sleep(1)
 
-        driver.find_element(By.LINK_TEXT, "Log in / Register").click()
-        time.sleep(1)
+            driver.find_element(By.LINK_TEXT, "Log in / Register").click()
+            time.sleep(1)
 
-        cookies_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[text()='Accept all cookies']")))
-        cookies_button.click()
-        time.sleep(1)
+            cookies_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[text()='Accept all cookies']")))
+            cookies_button.click()
+            time.sleep(1)
 
-        driver.find_element(By.ID, "username").send_keys(username)
-        driver.find_element(By.ID, "password").send_keys(password)
-        driver.find_element(By.XPATH, "//button[@type='submit']").click()
-        time.sleep(3)
-        print("Login successful")
+            driver.find_element(By.ID, "username").send_keys(username)
+            driver.find_element(By.ID, "password").send_keys(password)
+            driver.find_element(By.XPATH, "//button[@type='submit']").click()
+            if not is_logged_in(driver, timeout=15):
+                raise RuntimeError(f"the login of {username} was not accepted")
+            save_session(driver, username, password)
+            print("Login successful")
 
         driver.find_element(By.ID, "account-link").click()
         time.sleep(2)
@@ -89,15 +109,85 @@ def login():
         raise RuntimeError(f"Error during login: {e}")
 
 
-def process_orders(driver):
+@tracing.traced("history.process_orders")
+def process_orders(driver, order_store, tabs=None):
+    """
+    Collects all order URLs from the order list in one pass, keeps the ones
+    newer than the first already saved order and opens them directly,
+    several tabs at a time. Falls back to clicking through the list when
+    the order controls do not expose their URLs
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance on the order list page
+        order_store (OrderStore): Order store of the account
+        tabs (int, optional): Number of orders loaded in parallel tabs, ORDER_TABS by default
+
+    Returns:
+        int: Number of newly saved orders
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    links = dom_snapshot.snapshot_order_links(driver)
+    if links is None:
+        print("Order links are not available, clicking through the order list")
+        return process_orders_by_click(driver, order_store)
+
+    new_links = []
+    for link in links:
+        if order_store.exists(link["number"]):
+            print(f"Order {link['number']} already exists, stopping further processing")
+            break
+        new_links.append(link)
+    print(f"{len(new_links)} new orders out of {len(links)} listed")
+
+    tabs = max(1, tabs or order_tabs)
+    saved = 0
+    list_window = driver.current_window_handle
+    for start in range(0, len(new_links), tabs):
+        batch = new_links[start:start + tabs]
+        with tracing.span("history.open_orders", driver=driver, orders=len(batch)):
+            handles = []
+            for link in batch:
+                driver.switch_to.new_window("tab")
+                driver.execute_script("window.location.href = arguments[0];", link["url"])
+                handles.append(driver.current_window_handle)
+
+        for link, handle in zip(batch, handles):
+            try:
+                driver.switch_to.window(handle)
+                WebDriverWait(driver, 20).until(EC.presence_of_element_located(
+                    (By.CSS_SELECTOR, dom_snapshot.ORDER_CARD_SELECTOR)
+                ))
+                if save_order_details(driver, order_store)[0] == "saved":
+                    saved += 1
+            except Exception as e:
+                print(f"Error processing order {link['number']}: {e}")
+            finally:
+                driver.close()
+        driver.switch_to.window(list_window)
+
+    print("All orders have been saved")
+    return saved
+
+
+def process_orders_by_click(driver, order_store):
     """
     Iterates through available orders, saves new ones,
     and skips existing ones
 
     Args:
         driver (webdriver.Chrome): Selenium WebDriver instance
+        order_store (OrderStore): Order store of the account
+
+    Returns:
+        int: Number of newly saved orders
     """
+    from selenium.webdriver.common.by import By
+
     order_index = 0
+    saved = 0
 
     while True:
         try:
@@ -107,17 +197,17 @@ def process_orders(driver):
                 break
 
             print(f"Processing order {order_index + 1}...")
-            orders[order_index].click()
-            time.sleep(2)
+            with tracing.span("history.open_order", driver=driver, index=order_index + 1):
+                orders[order_index].click()
+                time.sleep(2)
 
-            result, order_data = save_order_details(driver)
+            result, order_data = save_order_details(driver, order_store)
 
             if result == "exists":
                 print(f"Order {order_index + 1} already exists, stopping further processing")
                 break
-
             if result == "saved":
-                update_orders_file(order_data)
+                saved += 1
         except Exception as e:
             print(f"Error processing order {order_index + 1}: {e}")
             order_index += 1
@@ -125,14 +215,17 @@ def process_orders(driver):
         driver.back()
         order_index += 1
         time.sleep(3)
+    return saved
 
 
-def save_order_details(driver):
+@tracing.traced("history.save_order_details")
+def save_order_details(driver, order_store):
     """
-    Extracts and saves order information from the current page
+    Extracts order information from the current page and adds it to the order store
 
     Args:
         driver (webdriver.Chrome): Selenium WebDriver instance
+        order_store (OrderStore): Order store of the account
 
     Returns:
         tuple: ('saved' or 'exists' or 'error', order data or None)
@@ -146,17 +239,15 @@ def save_order_details(driver):
             return "error", None
 
         order_number = match.group(1)
-        file_path = os.path.join(user_folder, f"order_{order_number}.txt")
 
-        if os.path.exists(file_path):
+        if order_store.exists(order_number):
             return "exists", None
 
-        order_details = driver.find_elements(By.CLASS_NAME, "ln-c-card.order-details__card")
+        order_details = dom_snapshot.snapshot_order_cards(driver)
         order_data = f"Order {order_number}:\n"
-        order_data += "\n".join([detail.text for detail in order_details]) + "\n\n"
+        order_data += "\n".join(order_details) + "\n\n"
 
-        with open(file_path, "w", encoding="utf-8") as file:
-            file.write(order_data)
+        order_store.add(order_number, order_data)
 
         print(f"Order {order_number} saved")
         return "saved", order_data
@@ -165,76 +256,81 @@ def save_order_details(driver):
         return "error", None
 
 
-def update_orders_file(order_data):
+def analyze_purchases(user_folder, force=False):
     """
-    Prepends newly saved order data to orders.txt file
+    Analyzes user's order history and generates a 6-month shopping plan using GPT.
+    The plan is only regenerated when new orders were saved since the last one
 
     Args:
-        order_data (str): Raw order text
+        user_folder (str): Folder of the user, e.g. users/<uuid>
+        force (bool): Rebuild the plan from the full history summary
     """
-    try:
-        if os.path.exists(orders_file):
-            with open(orders_file, "r", encoding="utf-8") as file:
-                existing_data = file.read()
-        else:
-            existing_data = ""
-
-        with open(orders_file, "w", encoding="utf-8") as file:
-            file.write(order_data + existing_data)
+    from purchase_plan import generate_plan
 
-        print("Updated orders.txt successfully")
+    try:
+        status = generate_plan(user_folder, force=force)
+        messages = {
+            "empty": "No saved orders found, skipping analysis.",
+            "skipped": "No line items could be parsed from saved orders, skipping analysis.",
+            "unchanged": "No new orders since the last purchase plan, keeping it.",
+        }
+        print(messages.get(status, f"Purchase plan {status} successfully."))
     except Exception as e:
-        print(f"Error updating orders.txt: {e}")
+        print(f"Error analyzing purchases: {e}")
 
 
-def analyze_purchases():
+def sync_account(username, password=None, profile_dir=None, analyze=False):
     """
-    Analyzes user's order history and generates a 6-month shopping plan using GPT.
-    """
-    if not os.path.exists(orders_file):
-        print("No orders.txt file found, skipping analysis.")
-        return
-
-    try:
-        with open(orders_file, "r", encoding="utf-8") as file:
-            orders_data = file.read()
-
-        prompt_text = (
-            "Вот список покупок из прошлых заказов:\n\n"
-            f"{orders_data}\n\n"
-            "На основе этой информации составь план покупок на 6 месяцев, учитывая возможные тенденции и периодичность повторяющихся покупок."
-        )
-
-        client = openai.OpenAI(api_key=openai_api_key)
+    Logs into one account, saves its new orders and optionally refreshes its purchase plan.
+    Every browser gets its own profile folder, so accounts never share cookies or storage
 
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt_text}],
-            temperature=0.7
-        )
-
-        plan = response.choices[0].message.content
+    Args:
+        username (str): Sainsbury's account login
+        password (str, optional): Account password, only needed when no stored session is valid
+        profile_dir (str, optional): Chrome profile folder, a temporary one is created and removed if omitted
+        analyze (bool): Refresh the purchase plan after syncing
 
-        with open(plan_file, "w", encoding="utf-8") as file:
-            file.write(plan)
+    Returns:
+        dict: 'login', 'uuid', 'status' ('ok' or 'error'), 'new_orders', 'total_orders', 'duration' and 'error'
+    """
+    started = time.time()
+    user_folder = get_user_folder(username)
+    result = {"login": username, "uuid": os.path.basename(user_folder), "status": "ok",
+              "new_orders": 0, "total_orders": 0, "duration": 0.0, "error": None}
+    own_profile = profile_dir is None
+    profile_dir = profile_dir or tempfile.mkdtemp(prefix="history-profile-")
+    order_store = OrderStore(user_folder)
+    driver = None
 
-        print("Purchase plan saved successfully.")
+    try:
+        with tracing.span("history.sync_account", account=result["uuid"]):
+            driver = login(username, password, profile_dir)
+            result["new_orders"] = process_orders(driver, order_store)
+        if analyze:
+            analyze_purchases(user_folder)
     except Exception as e:
-        print(f"Error analyzing purchases: {e}")
+        print(f"Error syncing {username}: {e}")
+        result["status"] = "error"
+        result["error"] = str(e)
+    finally:
+        if driver is not None:
+            driver.quit()
+        result["total_orders"] = order_store.count()
+        order_store.close()
+        if own_profile:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+        result["duration"] = round(time.time() - started, 2)
+    return result
 
 
 def main():
     """
     Main function to run the login, order extraction, and optionally analysis
+    for the account configured in .env
     """
-    try:
-        driver = login()
-        process_orders(driver)
-        #analyze_purchases()
-    except Exception as e:
-        print(f"Error: {e}")
-    finally:
-        driver.quit()
+    result = sync_account(username, password)
+    if result["status"] == "ok":
+        print(f"Saved {result['new_orders']} new orders ({result['total_orders']} in total)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,6 @@
+-- Indexes for the login and uuid lookups of user_registry.PostgresUserBackend.
+-- CONCURRENTLY keeps the users table writable while the indexes are built,
+-- so run this file outside a transaction:
+--   psql "$DATABASE_URL" -f migrations/001_users_indexes.sql
+CREATE INDEX CONCURRENTLY IF NOT EXISTS users_login_idx ON users (login);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS users_uuid_idx ON users (uuid);
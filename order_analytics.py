@@ -0,0 +1,237 @@
+import argparse
+import os
+from datetime import date
+
+import numpy as np
+
+from order_store import OrderStore
+
+SUMMARY_TOP_PRODUCTS = int(os.getenv("SUMMARY_TOP_PRODUCTS", "40"))
+SUMMARY_MONTHS = int(os.getenv("SUMMARY_MONTHS", "12"))
+SUMMARY_NAME_LENGTH = 60
+
+
+def load_line_items(store, since=None):
+    """
+    Loads a user's line items into numpy columns
+
+    Args:
+        store (OrderStore): Order store of the user
+        since (float, optional): Only include orders saved after this timestamp
+
+    Returns:
+        dict[str, np.ndarray]: 'product' (display names), 'product_idx', 'order_idx',
+        'day' (datetime64[D], NaT when unknown), 'quantity' and 'price' (NaN when unknown)
+    """
+    columns = store.line_item_columns(since)
+    names = np.array(columns["product"], dtype=object)
+    keys = np.array([name.casefold() for name in names], dtype=object)
+    _, first_seen, product_idx = np.unique(keys, return_index=True, return_inverse=True)
+    _, order_idx = np.unique(np.array(columns["order_number"], dtype=object), return_inverse=True)
+    return {
+        "product": names[first_seen],
+        "product_idx": product_idx.astype(np.int64),
+        "order_idx": order_idx.astype(np.int64),
+        "day": np.array([value or "NaT" for value in columns["order_date"]], dtype="datetime64[D]"),
+        "quantity": np.array(columns["quantity"], dtype=np.float64),
+        "price": np.array([np.nan if value is None else value for value in columns["price"]], dtype=np.float64),
+    }
+
+
+def product_stats(items, today=None):
+    """
+    Computes per-product purchase frequency, quantities, spend and inter-purchase intervals
+
+    Args:
+        items (dict): Output of load_line_items
+        today (np.datetime64, optional): Reference day for 'days_since_last'
+
+    Returns:
+        dict[str, np.ndarray]: Arrays indexed by product: 'orders', 'quantity', 'spend',
+        'first_day', 'last_day', 'mean_interval', 'std_interval', 'days_since_last'
+    """
+    product_count = len(items["product"])
+    product_idx = items["product_idx"]
+    today = today if today is not None else np.datetime64(date.today(), "D")
+
+    order_count = items["order_idx"].max() + 1 if len(product_idx) else 1
+    pairs = np.unique(product_idx * order_count + items["order_idx"])
+    orders = np.bincount(pairs // order_count, minlength=product_count)
+    quantity = np.bincount(product_idx, weights=items["quantity"], minlength=product_count)
+    spend = np.bincount(product_idx, weights=np.nan_to_num(items["price"]), minlength=product_count)
+
+    dated = ~np.isnat(items["day"])
+    products = product_idx[dated]
+    days = items["day"][dated].astype(np.int64)
+    order = np.lexsort((days, products))
+    products, days = products[order], days[order]
+    distinct = np.ones(len(days), dtype=bool)
+    distinct[1:] = (products[1:] != products[:-1]) | (days[1:] != days[:-1])
+    products, days = products[distinct], days[distinct]
+
+    same_product = products[1:] == products[:-1]
+    gap_products = products[1:][same_product]
+    gaps = np.diff(days)[same_product].astype(np.float64)
+    gap_count = np.bincount(gap_products, minlength=product_count)
+    gap_sum = np.bincount(gap_products, weights=gaps, minlength=product_count)
+    gap_squares = np.bincount(gap_products, weights=gaps ** 2, minlength=product_count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_interval = np.where(gap_count > 0, gap_sum / gap_count, np.nan)
+        std_interval = np.where(gap_count > 0, np.sqrt(np.maximum(gap_squares / gap_count - mean_interval ** 2, 0)), np.nan)
+
+    first_day = np.full(product_count, np.iinfo(np.int64).min)
+    last_day = np.full(product_count, np.iinfo(np.int64).min)
+    if len(products):
+        starts = np.flatnonzero(np.r_[True, products[1:] != products[:-1]])
+        ends = np.flatnonzero(np.r_[products[1:] != products[:-1], True])
+        first_day[products[starts]] = days[starts]
+        last_day[products[ends]] = days[ends]
+    first_day = first_day.astype("datetime64[D]")
+    last_day = last_day.astype("datetime64[D]")
+
+    return {
+        "orders": orders,
+        "quantity": quantity,
+        "spend": spend,
+        "first_day": first_day,
+        "last_day": last_day,
+        "mean_interval": mean_interval,
+        "std_interval": std_interval,
+        "days_since_last": np.where(np.isnat(last_day), np.nan, (today - last_day).astype(np.float64)),
+    }
+
+
+def monthly_spend(items, months=SUMMARY_MONTHS):
+    """
+    Sums priced line items per calendar month over the most recent months of history
+
+    Args:
+        items (dict): Output of load_line_items
+        months (int): Number of months up to the latest dated order
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Month labels (datetime64[M]) and spend per month
+    """
+    dated = ~np.isnat(items["day"])
+    if not dated.any():
+        return np.array([], dtype="datetime64[M]"), np.array([])
+    month = items["day"][dated].astype("datetime64[M]")
+    start = month.max() - (months - 1)
+    offset = (month - start).astype(np.int64)
+    in_range = offset >= 0
+    totals = np.bincount(offset[in_range], weights=np.nan_to_num(items["price"][dated][in_range]), minlength=months)
+    labels = start + np.arange(months)
+    first = np.flatnonzero(totals)[0] if totals.any() else months - 1
+    return labels[first:], totals[first:]
+
+
+def spend_trend(totals):
+    """
+    Returns the least-squares slope of monthly spend in pounds per month, or 0.0 for fewer than two months
+    """
+    if len(totals) < 2:
+        return 0.0
+    return float(np.polyfit(np.arange(len(totals)), totals, 1)[0])
+
+
+def _format_days(value):
+    return "-" if np.isnan(value) else f"{value:.0f}"
+
+
+def build_purchase_summary(store, top=SUMMARY_TOP_PRODUCTS, months=SUMMARY_MONTHS, today=None):
+    """
+    Builds a compact, fixed-size text summary of a user's purchase history for the LLM:
+    overall totals, monthly spend with its trend and the most frequently bought products
+    with their typical interval and days since they were last bought
+
+    Args:
+        store (OrderStore): Order store of the user
+        top (int): Maximum number of products listed
+        months (int): Maximum number of months listed
+        today (np.datetime64, optional): Reference day
+
+    Returns:
+        str | None: Summary text or None if no line items could be parsed
+    """
+    items = load_line_items(store)
+    if not len(items["product_idx"]):
+        return None
+
+    stats = product_stats(items, today)
+    labels, totals = monthly_spend(items, months)
+    order_count = store.count()
+    dated = items["day"][~np.isnat(items["day"])]
+
+    lines = [
+        f"Orders: {order_count}; distinct products: {len(items['product'])}; "
+        f"line items: {len(items['product_idx'])}",
+    ]
+    if len(dated):
+        lines.append(f"History: {dated.min()} to {dated.max()}")
+    lines.append(f"Total spend: £{np.nansum(items['price']):.2f}; "
+                 f"average per order: £{np.nansum(items['price']) / max(order_count, 1):.2f}")
+    if len(totals):
+        lines.append(f"Monthly spend trend: {spend_trend(totals):+.2f} £/month")
+        lines.append("Monthly spend: " + ", ".join(f"{label} £{total:.2f}" for label, total in zip(labels, totals)))
+
+    ranking = np.lexsort((-stats["spend"], -stats["orders"]))[:top]
+    lines.append("")
+    lines.append("product | orders | units | spend £ | avg interval days | interval std | days since last")
+    for index in ranking:
+        name = str(items["product"][index])[:SUMMARY_NAME_LENGTH]
+        lines.append(
+            f"{name} | {stats['orders'][index]} | {stats['quantity'][index]:.0f} | {stats['spend'][index]:.2f} | "
+            f"{_format_days(stats['mean_interval'][index])} | {_format_days(stats['std_interval'][index])} | "
+            f"{_format_days(stats['days_since_last'][index])}"
+        )
+    if len(items["product"]) > top:
+        lines.append(f"... {len(items['product']) - top} less frequent products omitted")
+    return "\n".join(lines)
+
+
+def build_delta_summary(store, since, top=SUMMARY_TOP_PRODUCTS):
+    """
+    Summarizes only the orders saved after a timestamp, e.g. since the last purchase plan
+
+    Args:
+        store (OrderStore): Order store of the user
+        since (float): Save time watermark of the previous summary
+        top (int): Maximum number of products listed
+
+    Returns:
+        str | None: Summary text or None if the new orders have no parsed line items
+    """
+    items = load_line_items(store, since)
+    if not len(items["product_idx"]):
+        return None
+
+    stats = product_stats(items)
+    dated = items["day"][~np.isnat(items["day"])]
+    lines = [f"New orders: {items['order_idx'].max() + 1}; line items: {len(items['product_idx'])}; "
+             f"spend: £{np.nansum(items['price']):.2f}"]
+    if len(dated):
+        lines.append(f"Dates: {dated.min()} to {dated.max()}")
+
+    ranking = np.lexsort((-stats["spend"], -stats["quantity"]))[:top]
+    lines.append("")
+    lines.append("product | orders | units | spend £ | last bought")
+    for index in ranking:
+        name = str(items["product"][index])[:SUMMARY_NAME_LENGTH]
+        last_day = "-" if np.isnat(stats["last_day"][index]) else str(stats["last_day"][index])
+        lines.append(f"{name} | {stats['orders'][index]} | {stats['quantity'][index]:.0f} | "
+                     f"{stats['spend'][index]:.2f} | {last_day}")
+    if len(items["product"]) > top:
+        lines.append(f"... {len(items['product']) - top} more products omitted")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the purchase summary sent to the LLM for a user")
+    parser.add_argument("user_folder", help="folder of the user, e.g. users/<uuid>")
+    parser.add_argument("--top", type=int, default=SUMMARY_TOP_PRODUCTS, help="number of products to list")
+    parser.add_argument("--months", type=int, default=SUMMARY_MONTHS, help="number of months of spend to list")
+    args = parser.parse_args()
+
+    store = OrderStore(args.user_folder)
+    print(build_purchase_summary(store, args.top, args.months) or "No line items found")
+    store.close()
@@ -1,22 +1,39 @@
 from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
-from typing import List
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
+from typing import List, Optional
+from contextlib import contextmanager
 from dotenv import load_dotenv
-import undetected_chromedriver as uc
+from browser_pool import BrowserPool, GROCERIES_URL, accept_cookies
+from session_store import is_logged_in, restore_session, save_session
+from order_jobs import OrderJobRunner, NullProgress
+from password_hashing import PasswordHasher, HasherBusy
+from user_registry import get_registry
+import trolley
+import tracing
+import shutil
 import time
 import os
 
 load_dotenv()
 username = os.getenv("SAINSBURYS_USERNAME")
 password = os.getenv("SAINSBURYS_PASSWORD")
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+PROFILES_DIR = os.getenv("PROFILES_DIR", "profiles")
+# Sessions are kept encrypted by session_store, so profiles never keep them in plain text on disk
+PROFILE_SESSION_PATHS = [
+    ("Default", "Cookies"),
+    ("Default", "Cookies-journal"),
+    ("Default", "Network", "Cookies"),
+    ("Default", "Network", "Cookies-journal"),
+    ("Default", "Local Storage"),
+    ("Default", "Session Storage"),
+]
 
 class ProductList(BaseModel):
     urls: List[str]
+    account: Optional[str] = None
+    password: Optional[str] = None
+    remove_extras: bool = False
 
 app = FastAPI(
     title="Sainsburys Bot API",
@@ -43,43 +60,119 @@ async def add_custom_header(request: Request, call_next):
     return response
 
 
-def login(driver):
+def create_driver(profile_dir):
     """
-    Logs in to the Sainsbury's website using credentials from environment variables
+    Starts an undetected Chrome instance with its own profile directory
+
+    Args:
+        profile_dir (str): Path to the Chrome user data directory
+
+    Returns:
+        uc.Chrome: New browser instance
+    """
+    import undetected_chromedriver as uc
+    options = uc.ChromeOptions()
+    # options.add_argument("--headless=new")  # UI
+    return uc.Chrome(options=options, user_data_dir=profile_dir)
+
+
+browser_pool = BrowserPool(create_driver, size=BROWSER_POOL_SIZE, name="order-pool")
+
+
+@app.on_event("startup")
+def start_browser_pool():
+    browser_pool.start()
+    resumed = order_jobs.resume()
+    if resumed:
+        print(f"Resumed {resumed} unfinished order jobs")
+
+
+@app.on_event("shutdown")
+def stop_browser_pool():
+    order_jobs.shutdown()
+    password_hasher.shutdown()
+    browser_pool.close()
+
+
+@contextmanager
+def account_browser(account_uuid):
+    """
+    Starts a browser with the persistent, isolated Chrome profile of one account.
+    The profile keeps its settings between runs, but its cache, cookies and
+    storage are deleted when the browser is closed
+
+    Args:
+        account_uuid (str): User uuid
+
+    Yields:
+        uc.Chrome: Browser instance, closed when the block exits
+    """
+    profile_dir = os.path.abspath(os.path.join(PROFILES_DIR, account_uuid))
+    os.makedirs(profile_dir, exist_ok=True)
+    driver = create_driver(profile_dir)
+    try:
+        yield driver
+    finally:
+        driver.quit()
+        shutil.rmtree(os.path.join(profile_dir, "Default", "Cache"), ignore_errors=True)
+        for parts in PROFILE_SESSION_PATHS:
+            path = os.path.join(profile_dir, *parts)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+
+
+def login(driver, account_login=None, account_password=None):
+    """
+    Logs in to the Sainsbury's website, by default with credentials from environment variables.
+    A stored session is reused when it is still valid
 
     Args:
         driver (webdriver.Chrome): Selenium WebDriver instance
+        account_login (str, optional): Login of the account to use instead of SAINSBURYS_USERNAME
+        account_password (str, optional): Password of that account; only needed when no session is stored.
+            When given, a stored session is only reused if it was created with this password
 
     Raises:
         RuntimeError: If any step of the login process fails
     """
+    from selenium.webdriver.common.by import By
+
+    if account_login is None:
+        account_login, account_password = username, password
+
+    if restore_session(driver, account_login, account_password):
+        return
+    if not account_password:
+        raise RuntimeError(f"No valid session for {account_login}, the account has to log in again")
+
     try:
-        driver.get("https://www.sainsburys.co.uk/gol-ui/groceries")
-        time.sleep(3)
-        print("Page loaded")
+        if GROCERIES_URL not in driver.current_url:
+            driver.get(GROCERIES_URL)
+            time.sleep(3)
+            print("Page loaded")
 
-        wait = WebDriverWait(driver, 10)
-        cookies_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[text()='Accept all']")))
-        cookies_button.click()
-        time.sleep(1)
-        print("Cookies accepted")
+        if accept_cookies(driver, timeout=3):
+            time.sleep(1)
+            print("Cookies accepted")
 
         driver.find_element(By.LINK_TEXT, "Log in / Register").click()
         time.sleep(1)
         print("Button founded")
 
-        cookies_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[text()='Accept all cookies']")))
-        cookies_button.click()
-        time.sleep(1)
-        print("Button clicked")
+        if accept_cookies(driver, "Accept all cookies"):
+            time.sleep(1)
+            print("Button clicked")
 
-        driver.find_element(By.ID, "username").send_keys(username)
-        driver.find_element(By.ID, "password").send_keys(password)
+        driver.find_element(By.ID, "username").send_keys(account_login)
+        driver.find_element(By.ID, "password").send_keys(account_password)
         driver.find_element(By.XPATH, "//button[@type='submit']").click()
-        time.sleep(3)
+        if not is_logged_in(driver, timeout=15):
+            raise RuntimeError(f"the login of {account_login} was not accepted")
+        save_session(driver, account_login, account_password)
         print("Login successful")
     except Exception as e:
-        driver.quit()
         raise RuntimeError(f"Error during login: {e}")
 
 
@@ -90,254 +183,251 @@ def add_to_cart(driver, url):
     Args:
         driver (webdriver.Chrome): Selenium WebDriver instance
         url (str): Product page URL
-    """
-    wait = WebDriverWait(driver, 10)
-    driver.get(url)
 
-    try:
-        add_button = wait.until(EC.element_to_be_clickable(
-            (By.CSS_SELECTOR, ".ln-c-button.ln-c-button--filled.ln-c-button--full.pt__add-button--reduced-height")
-        ))
-        add_button.click()
-        print(f"Item from {url} added to cart")
-    except Exception as e:
-        print(f"Error adding item from {url}: {e}")
-
-
-def proceed_to_checkout(driver):
+    Returns:
+        bool: True if the add button was clicked
     """
-    Navigates to the cart page and proceeds to the checkout step
-    Handles selection of home delivery slot if required
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
 
-    Args:
-        driver (webdriver.Chrome): Selenium WebDriver instance
-    """
     wait = WebDriverWait(driver, 10)
-    driver.get("https://www.sainsburys.co.uk/gol-ui/trolley")
-    time.sleep(2)
+    selector = ".ln-c-button.ln-c-button--filled.ln-c-button--full.pt__add-button--reduced-height"
 
-    try:
-        checkout_button = wait.until(EC.element_to_be_clickable(
-            (By.CSS_SELECTOR, '[data-testid="order-summary-book-slot-button"]')
-        ))
-        checkout_button.click()
-        print("Cart is complete")
-    except Exception as e:
-        print(f"Error proceeding to checkout: {e}")
+    with tracing.span("order.add_to_cart_page", driver=driver, url=url, selector=selector) as span:
+        driver.get(url)
 
-    try:
-        all_buttons = wait.until(EC.presence_of_all_elements_located(
-            (By.CSS_SELECTOR, ".ln-c-button.ln-c-button--filled")
-        ))
-        time.sleep(2)
-
-        if len(all_buttons) > 1:
-            home_delivery_button = all_buttons[1]
-
-            try:
-                driver.execute_script("arguments[0].scrollIntoView(true);", home_delivery_button)
-                time.sleep(1)
-                driver.execute_script("arguments[0].click();", home_delivery_button)
-                print("Proceed to selecting a delivery slot")
-                time.sleep(5)
-                select_delivery_slot(driver)
-            except Exception:
-                print("Slot already booked")
-        else:
-            print("Slot already booked")
-    except Exception as e:
-        print(f"Error searching for home delivery button: {e}")
+        try:
+            add_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
+            add_button.click()
+            print(f"Item from {url} added to cart")
+            return True
+        except Exception as e:
+            span.set_attribute("error", str(e))
+            print(f"Error adding item from {url}: {e}")
+            return False
 
 
-def handle_redirects(driver):
+def fill_trolley(driver, product_urls, progress, remove_extras=False):
     """
-    Handles intermediate redirect pages during checkout.
-    For example: forgotten favourites, before-you-go, summary, payment
+    Brings the trolley to the requested state with API calls only: reads the
+    current trolley once, adds just the missing units in parallel batches and
+    optionally removes everything that was not requested. Items the API could
+    not handle fall back to product page adds, one page add per missing unit;
+    an item that only got some of its units is recorded as 'short'
 
     Args:
-        driver (webdriver.Chrome): Selenium WebDriver instance
+        driver (webdriver.Chrome): Logged-in Selenium WebDriver instance
+        product_urls (list[str]): Product URLs; a repeated URL adds one more unit
+        progress (JobProgress): Receives per-item results
+        remove_extras (bool): Remove trolley lines that are not part of the request
     """
-    wait = WebDriverWait(driver, 10)
-    for _ in range(5):
-        current_url = driver.current_url.lower()
+    quantities = trolley.requested_quantities(product_urls)
 
-        if "before-you-go" in current_url:
-            print("We are on the 'before you go' page")
-            click_continue_button(driver, wait)
-            time.sleep(2)
-            continue
-        elif "forgotten-favourites" in current_url:
-            print("We are on the 'forgotten favourites' page")
-            click_continue_button(driver, wait)
-            time.sleep(2)
-            continue
-        elif "summary" in current_url:
-            print("We are on the summary page")
-            click_continue_button(driver, wait)
-            time.sleep(2)
-            print("Confirmation successful")
+    try:
+        with tracing.span("trolley.resolve_products", items=len(quantities)):
+            products = trolley.resolve_products(driver, quantities)
+        with tracing.span("trolley.read_basket"):
+            current = trolley.basket_quantities(trolley.read_basket(driver))
+    except Exception as e:
+        print(f"Trolley API unavailable, falling back to product pages: {e}")
+        products, current = {}, None
+
+    wanted = {}
+    for url, quantity in quantities.items():
+        product = products.get(url, {})
+        if product.get("ok"):
+            wanted[product["product_uid"]] = wanted.get(product["product_uid"], 0) + quantity
+
+    if current is not None:
+        missing, extras = trolley.diff_trolley(current, wanted)
+        print(f"Trolley has {len(current)} lines, {len(missing)} to add, {len(extras)} extra")
+        results = {}
+        try:
+            with tracing.span("trolley.add_items", items=len(missing)):
+                results = trolley.add_items(driver, missing)
+            if remove_extras and extras:
+                with tracing.span("trolley.set_quantities", items=len(extras)):
+                    trolley.set_quantities(driver, extras)
+            with tracing.span("trolley.read_basket", verify=True):
+                current = trolley.basket_quantities(trolley.read_basket(driver))
+        except Exception as e:
+            print(f"Could not update or verify trolley: {e}")
+            for product_uid, quantity in missing.items():
+                if results.get(product_uid, {}).get("ok"):
+                    current[product_uid] = current.get(product_uid, 0) + quantity
+
+    for url, quantity in quantities.items():
+        product = products.get(url, {})
+        product_uid = product.get("product_uid")
+        if current and product_uid and current.get(product_uid, 0) >= quantity:
+            print(f"Item from {url} is in the trolley (x{quantity})")
+            progress.item(url, "added", quantity=quantity, method="api")
             continue
-        elif "payment" in current_url:
-            print("We are on the payment page")
-            while True:
-                time.sleep(2)
-                new_url = driver.current_url.lower()
-                if "payment" not in new_url:
-                    print(f"Payment finished. URL changed to {new_url}")
+
+        in_trolley = min(current.get(product_uid, 0), quantity) if current and product_uid else 0
+        missing_units = quantity - in_trolley
+        print(f"\nAdding {missing_units} unit(s) from product page: {url} "
+              f"({product.get('error', 'quantity mismatch')})")
+        added = 0
+        with tracing.span("trolley.fallback", url=url, missing=missing_units) as span:
+            for _ in range(missing_units):
+                if not add_to_cart(driver, url):
                     break
-            continue
-        else:
-            print("No more known redirects:", current_url)
-            break
+                added += 1
+            span.set_attribute("added", added)
+        status = "added" if added == missing_units else "short" if in_trolley + added else "failed"
+        progress.item(url, status, quantity=in_trolley + added, requested=quantity, method="page")
 
 
-def click_continue_button(driver, wait):
+def process_order(product_urls: list[str], progress=None, account=None, account_password=None,
+                  remove_extras=False):
     """
-    Finds and clicks the main 'Continue' button on a page
+    Executes the full flow: logs in, adds products to the cart, checks out,
+    and selects a delivery slot. A job interrupted during checkout resumes
+    at the checkout state it had reached, unless payment had already started
 
     Args:
-        driver (webdriver.Chrome): Selenium WebDriver instance
-        wait (WebDriverWait): Selenium WebDriverWait object
+        product_urls (list[str]): List of Sainsbury's product URLs to add to the cart
+        progress (JobProgress, optional): Receives the current stage, per-item results and timings
+        account (dict, optional): {'uuid', 'login'} of a registered account; the .env account is used otherwise
+        account_password (str, optional): Password for a fresh login if the account has no valid session
+        remove_extras (bool): Remove trolley lines that are not part of the order
+
+    Raises:
+        Exception: Any error that aborted the flow
     """
+    from checkout_flow import run_checkout, STATES, TROLLEY
+
+    progress = progress or NullProgress()
+    browser = account_browser(account["uuid"]) if account else browser_pool.lease()
     try:
-        cta_button = wait.until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, ".ln-c-button.ln-c-button--filled.trolley__cta-button"))
-        )
-        driver.execute_script("arguments[0].scrollIntoView(true);", cta_button)
-        time.sleep(1)
-        driver.execute_script("arguments[0].click();", cta_button)
-        print("Continue button clicked successfully.")
-        time.sleep(2)
+        with progress.stage("browser"), browser as driver:
+            print("Script started")
+            with progress.stage("login"):
+                if account:
+                    login(driver, account["login"], account_password)
+                else:
+                    login(driver)
+            resume_state = progress.resume_state()
+            if resume_state and STATES.index(resume_state) > STATES.index(TROLLEY):
+                print(f"Resuming checkout at '{resume_state}', trolley already filled")
+            else:
+                with progress.stage("add_to_cart"):
+                    fill_trolley(driver, product_urls, progress, remove_extras)
+            run_checkout(driver, progress, resume_state)
     except Exception as e:
-        print(f"Error clicking continue button: {e}")
+        print(f"Error: {e}")
+        raise
 
 
-def select_delivery_slot(driver):
+def run_order_job(payload, progress):
     """
-    Searches for the first available delivery slot and confirms it
+    Job handler that runs the order flow for a stored /order payload.
+    Passwords are only kept in memory and are never written to the job store
+    """
+    account_password = order_jobs.pop_secret(progress.job_id)
+    process_order(payload["urls"], progress, payload.get("account"), account_password,
+                  payload.get("remove_extras", False))
 
-    Args:
-        driver (webdriver.Chrome): Selenium WebDriver instance
+
+def order_job_key(payload):
+    """
+    Serializes jobs per account so one browser profile is never used twice at the same time
     """
-    wait = WebDriverWait(driver, 15)
+    account = payload.get("account")
+    return account["uuid"] if account else "__default__"
 
-    try:
-        table = wait.until(EC.presence_of_element_located((By.ID, "slot-table")))
-        rows = table.find_elements(By.CSS_SELECTOR, "tbody tr")
-
-        for row in rows:
-            tds = row.find_elements(By.TAG_NAME, "td")
-            if not tds:
-                continue
-
-            for cell in tds:
-                try:
-                    button = cell.find_element(By.CSS_SELECTOR, "button.book-slot-grid__slot")
-                except:
-                    continue
-
-                if "book-slot-grid__slot-full" in button.get_attribute("class"):
-                    continue
-
-                if "Unavailable" in button.text:
-                    continue
-
-                driver.execute_script("arguments[0].scrollIntoView(true);", button)
-                time.sleep(1)
-                driver.execute_script("arguments[0].click();", button)
-                print("First available slot selected.")
-                time.sleep(2)
-
-                try:
-                    confirm_btn = wait.until(EC.element_to_be_clickable((
-                        By.CSS_SELECTOR,
-                        ".ln-c-button.ln-c-button--filled.ln-c-button--full.reserve-slot-modal__primary-button"
-                    )))
-                    driver.execute_script("arguments[0].scrollIntoView(true);", confirm_btn)
-                    time.sleep(1)
-                    driver.execute_script("arguments[0].click();", confirm_btn)
-                    print("Slot reservation confirmed.")
-                except Exception as e:
-                    print(f"Error confirming slot reservation: {e}")
-
-                time.sleep(2)
-
-                try:
-                    secondary_btn = wait.until(EC.element_to_be_clickable((
-                        By.CSS_SELECTOR,
-                        ".ds-c-button.ds-c-button--secondary.ds-c-button--md.booking-confirmation__button"
-                    )))
-                    driver.execute_script("arguments[0].scrollIntoView(true);", secondary_btn)
-                    time.sleep(1)
-                    driver.execute_script("arguments[0].click();", secondary_btn)
-                    print("Clicked the booking confirmation secondary button.")
-                except Exception as e:
-                    print(f"Error clicking booking confirmation button: {e}")
-
-                time.sleep(2)
-
-                try:
-                    final_cta_btn = wait.until(EC.element_to_be_clickable((
-                        By.CSS_SELECTOR,
-                        ".ln-c-button.ln-c-button--filled.trolley__cta-button"
-                    )))
-                    driver.execute_script("arguments[0].scrollIntoView(true);", final_cta_btn)
-                    time.sleep(1)
-                    driver.execute_script("arguments[0].click();", final_cta_btn)
-                    print("Clicked the final trolley CTA button.")
-                except Exception as e:
-                    print(f"Error clicking final CTA button: {e}")
-                return
-        print("No available slots found.")
-    except Exception as e:
-        current_url = driver.current_url.lower()
-        if "summary" in current_url:
-            print("Already on the summary page, no slot selection needed.")
-        else:
-            print(f"Error selecting a delivery slot: {e}")
+
+order_jobs = OrderJobRunner(run_order_job, key=order_job_key)
+password_hasher = PasswordHasher()
 
 
-def process_order(product_urls: list[str]):
+def check_account_password(account_uuid, account_password):
     """
-    Executes the full flow: logs in, adds products to the cart, checks out,
-    and selects a delivery slot
+    Checks a password against the bcrypt hash auth_server keeps for the account
 
     Args:
-        product_urls (list[str]): List of Sainsbury's product URLs to add to the cart
-    """
-    options = uc.ChromeOptions()
-    # options.add_argument("--headless=new")  # UI
-    driver = uc.Chrome(options=options)
+        account_uuid (str): User uuid
+        account_password (str | None): Password sent with the order
 
+    Raises:
+        HTTPException: 401 if the password is missing or wrong, 503 if hashing is overloaded
+    """
+    if not account_password:
+        raise HTTPException(status_code=401, detail="The account password is required.")
+    stored_hash = get_registry().password_hash(account_uuid)
+    if not stored_hash:
+        raise HTTPException(status_code=401, detail="Incorrect account or password.")
     try:
-        print("Script started")
-        login(driver)
-        for url in product_urls:
-            print(f"\nAdding to cart: {url}")
-            add_to_cart(driver, url)
-            time.sleep(2)
-        proceed_to_checkout(driver)
-        handle_redirects(driver)
-    except Exception as e:
-        print(f"Error: {e}")
-    finally:
-        driver.quit()
+        matches, _ = password_hasher.verify(account_password, stored_hash)
+    except HasherBusy:
+        raise HTTPException(status_code=503, detail="Too many orders in progress, please retry shortly.",
+                            headers={"Retry-After": "2"})
+    if not matches:
+        raise HTTPException(status_code=401, detail="Incorrect account or password.")
 
 
-@app.post("/order")
+@app.post("/order", status_code=202)
 def create_order(data: ProductList):
     """
-    FastAPI endpoint to create an order based on incoming product URLs
+    FastAPI endpoint that queues an order based on incoming product URLs. Orders for a
+    registered account need its password, checked against the auth_server users table
 
     Args:
-        data (ProductList): JSON body with a list of product URLs
+        data (ProductList): JSON body with a list of product URLs and an optional account reference
 
     Returns:
-        dict: Confirmation with list of processed URLs
+        dict: Job id to poll via GET /order/{job_id}
     """
     if not data.urls:
         raise HTTPException(status_code=400, detail="No product URLs provided.")
 
-    process_order(data.urls)
-    print("Returning 200 OK (script completed successfully).")
-    return {"status": "OK", "added": data.urls}
+    payload = {"urls": data.urls, "account": None, "remove_extras": data.remove_extras}
+    if data.account:
+        account = get_registry().resolve(data.account)
+        if not account:
+            raise HTTPException(status_code=404, detail="Account not found.")
+        check_account_password(account[0], data.password)
+        payload["account"] = {"uuid": account[0], "login": account[1]}
+
+    job_id = order_jobs.submit(payload, secret=data.password)
+    print(f"Order job {job_id} queued")
+    return {"status": "queued", "job_id": job_id}
+
+
+@app.get("/order/{job_id}")
+def get_order(job_id: str):
+    """
+    Reports the state of an order job
+
+    Args:
+        job_id (str): Id returned by POST /order
+
+    Returns:
+        dict: Job status, current stage, per-item results and stage timings
+    """
+    job = order_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Order job not found.")
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "items": job["items"],
+        "timings": job["timings"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+@app.get("/pool/metrics")
+def get_pool_metrics():
+    """
+    Reports the size and wait-time statistics of the browser pool
+
+    Returns:
+        dict: Browser pool metrics
+    """
+    return browser_pool.metrics()
@@ -0,0 +1,279 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import tracing
+
+BROWSER_MEMORY_MB = int(os.getenv("BROWSER_MEMORY_MB", "700"))
+
+
+def default_concurrency():
+    """
+    Estimates how many browser-driven jobs the machine can run at once,
+    assuming roughly one core and BROWSER_MEMORY_MB of RAM per browser
+
+    Returns:
+        int: Suggested number of concurrent jobs
+    """
+    cpus = os.cpu_count() or 1
+    try:
+        memory_mb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return max(1, cpus // 2)
+    return max(1, min(cpus, memory_mb // BROWSER_MEMORY_MB))
+
+
+ORDER_JOBS_DB = os.getenv("ORDER_JOBS_DB", "order_jobs.db")
+ORDER_WORKERS = int(os.getenv("ORDER_WORKERS", "0")) or default_concurrency()
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class OrderJobStore:
+    """
+    SQLite-backed storage of order jobs, so queued and running orders survive a restart
+    """
+
+    def __init__(self, path=ORDER_JOBS_DB):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    payload TEXT NOT NULL,
+                    items TEXT NOT NULL DEFAULT '{}',
+                    timings TEXT NOT NULL DEFAULT '{}',
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+            self._conn.commit()
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        for key in ("payload", "items", "timings"):
+            job[key] = json.loads(job[key])
+        return job
+
+    def create(self, payload):
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(payload), now, now)
+            )
+            self._conn.commit()
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def update(self, job_id, **fields):
+        for key in ("payload", "items", "timings"):
+            if key in fields:
+                fields[key] = json.dumps(fields[key])
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def unfinished(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+
+class JobProgress:
+    """
+    Collects the current stage, per-item results and stage timings of a running job
+    and writes them through to the job store
+    """
+
+    def __init__(self, store, job_id):
+        self.store = store
+        self.job_id = job_id
+        job = store.get(job_id)
+        self.items = job["items"]
+        self.timings = job["timings"]
+        self.last_stage = job["stage"]
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Marks a stage as current and records its duration in seconds
+        """
+        self.store.update(self.job_id, stage=name)
+        started = time.monotonic()
+        try:
+            with tracing.span(f"order.{name}", job_id=self.job_id):
+                yield
+        finally:
+            self.timings[name] = round(self.timings.get(name, 0) + time.monotonic() - started, 3)
+            self.store.update(self.job_id, timings=self.timings)
+
+    def item(self, key, status, **details):
+        """
+        Records the result for one requested item
+        """
+        self.items[key] = {"status": status, **details}
+        self.store.update(self.job_id, items=self.items)
+
+    def resume_state(self):
+        """
+        Returns the checkout state an interrupted run of this job had reached
+
+        Returns:
+            str | None: State name from a 'checkout:<state>' stage, or None
+        """
+        if self.last_stage and self.last_stage.startswith("checkout:"):
+            return self.last_stage.split(":", 1)[1]
+        return None
+
+
+class NullProgress:
+    """
+    Progress sink used when a flow runs outside of a job
+    """
+
+    @contextmanager
+    def stage(self, name):
+        with tracing.span(f"order.{name}"):
+            yield
+
+    def item(self, key, status, **details):
+        pass
+
+    def resume_state(self):
+        return None
+
+
+class OrderJobRunner:
+    """
+    Runs order jobs on a bounded worker pool and re-queues unfinished jobs on startup.
+    Jobs that share a serialization key (e.g. the same account) run one after another,
+    while jobs with different keys run in parallel up to the worker limit
+    """
+
+    def __init__(self, handler, store=None, workers=ORDER_WORKERS, key=None):
+        """
+        Args:
+            handler (Callable[[dict, JobProgress], None]): Executes one job payload
+            store (OrderJobStore, optional): Job storage
+            workers (int): Maximum number of jobs running at the same time
+            key (Callable[[dict], str], optional): Serialization key of a job payload
+        """
+        self.handler = handler
+        self._store = store
+        self.workers = workers
+        self.key = key or (lambda payload: None)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="order-job")
+        self._lock = threading.Lock()
+        self._active_keys = set()
+        self._waiting = {}
+        self._secrets = {}
+
+    @property
+    def store(self):
+        """
+        Job storage, opened on first use so importing a service does not touch the database
+        """
+        with self._lock:
+            if self._store is None:
+                self._store = OrderJobStore()
+            return self._store
+
+    def _dispatch(self, job_id, payload):
+        key = self.key(payload)
+        if key is not None:
+            with self._lock:
+                if key in self._active_keys:
+                    self._waiting.setdefault(key, deque()).append(job_id)
+                    return
+                self._active_keys.add(key)
+        self.executor.submit(self._run_serialized, job_id, key)
+
+    def _run_serialized(self, job_id, key):
+        try:
+            self._run(job_id)
+        finally:
+            if key is not None:
+                with self._lock:
+                    waiting = self._waiting.get(key)
+                    next_job_id = waiting.popleft() if waiting else None
+                    if waiting is not None and not waiting:
+                        del self._waiting[key]
+                    if next_job_id is None:
+                        self._active_keys.discard(key)
+                if next_job_id is not None:
+                    self.executor.submit(self._run_serialized, next_job_id, key)
+
+    def submit(self, payload, secret=None):
+        """
+        Stores and queues a job
+
+        Args:
+            payload (dict): JSON-serializable job payload
+            secret (str, optional): Value kept only in memory for the handler (e.g. a password)
+
+        Returns:
+            str: Job id
+        """
+        job_id = self.store.create(payload)
+        if secret is not None:
+            self._secrets[job_id] = secret
+        self._dispatch(job_id, payload)
+        return job_id
+
+    def pop_secret(self, job_id):
+        return self._secrets.pop(job_id, None)
+
+    def resume(self):
+        """
+        Re-queues jobs that were queued or running when the service stopped
+
+        Returns:
+            int: Number of re-queued jobs
+        """
+        job_ids = self.store.unfinished()
+        for job_id in job_ids:
+            self.store.update(job_id, status=QUEUED)
+            self._dispatch(job_id, self.store.get(job_id)["payload"])
+        return len(job_ids)
+
+    def _run(self, job_id):
+        job = self.store.get(job_id)
+        self.store.update(job_id, status=RUNNING, error=None)
+        try:
+            with tracing.span("order.job", job_id=job_id):
+                self.handler(job["payload"], JobProgress(self.store, job_id))
+            self.store.update(job_id, status=DONE, stage=None)
+        except Exception as e:
+            print(f"[ORDER JOB {job_id}] {e}")
+            self.store.update(job_id, status=FAILED, error=str(e))
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,300 @@
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+ORDER_DB_NAME = "orders.db"
+LEGACY_ORDERS_FILE = "orders.txt"
+
+_DATE_PATTERNS = [
+    (re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+(January|February|March|April|May|June|July|August|"
+                r"September|October|November|December)\s+(\d{4})\b", re.IGNORECASE), "%d %B %Y"),
+    (re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+(\d{4})\b",
+                re.IGNORECASE), "%d %b %Y"),
+    (re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b"), "%d/%m/%Y"),
+]
+
+
+_SKIP_LINE = re.compile(r"^(order\b|sub\s*total|total|delivery|savings?|you saved|vouchers?|coupons?|"
+                        r"payment|paid|packaging|bag charge|substitut|items?\b|\d+ items?)", re.IGNORECASE)
+_PRICE = r"£\s*(\d+(?:\.\d{1,2})?)"
+_LINE_PATTERNS = [
+    # "2 x Sainsbury's Milk 2L £3.30"
+    re.compile(r"^(?P<quantity>\d+)\s*[x×]\s*(?P<product>.+?)\s+" + _PRICE.replace("(", "(?P<price>", 1) + r"$"),
+    # "Sainsbury's Milk 2L x2 £3.30"
+    re.compile(r"^(?P<product>.+?)\s+[x×]\s*(?P<quantity>\d+)\s+" + _PRICE.replace("(", "(?P<price>", 1) + r"$"),
+    # "Sainsbury's Milk 2L £3.30"
+    re.compile(r"^(?P<product>.*[A-Za-z].*?)\s+" + _PRICE.replace("(", "(?P<price>", 1) + r"$"),
+]
+_QUANTITY_LINE = re.compile(r"^(?:qty|quantity)\s*:?\s*(\d+)$|^[x×]\s*(\d+)$", re.IGNORECASE)
+_PRICE_LINE = re.compile(r"^" + _PRICE + r"$")
+
+
+def parse_line_items(text):
+    """
+    Turns scraped order card text into line items. Understands one-line items
+    ('2 x Name £3.30', 'Name x2 £3.30', 'Name £3.30') and items spread over
+    lines (name, then 'Qty: 2' and/or '£3.30'); totals and charges are skipped
+
+    Args:
+        text (str): Raw order text
+
+    Returns:
+        list[tuple[str, int, float | None]]: (product, quantity, line price)
+    """
+    items = []
+    pending = None
+
+    def flush():
+        nonlocal pending
+        if pending and (pending[1] is not None or pending[2] is not None):
+            items.append((pending[0], pending[1] or 1, pending[2]))
+        pending = None
+
+    for raw_line in text.splitlines():
+        line = " ".join(raw_line.split())
+        if not line or line.endswith(":") or _SKIP_LINE.match(line):
+            flush()
+            continue
+
+        quantity_match = _QUANTITY_LINE.match(line)
+        price_match = _PRICE_LINE.match(line)
+        if pending and quantity_match:
+            pending[1] = int(quantity_match.group(1) or quantity_match.group(2))
+            continue
+        if pending and price_match:
+            pending[2] = float(price_match.group(1))
+            flush()
+            continue
+        if quantity_match or price_match:
+            continue
+
+        for pattern in _LINE_PATTERNS:
+            match = pattern.match(line)
+            if match:
+                flush()
+                quantity = int(match.groupdict().get("quantity") or 1)
+                items.append((match.group("product").strip(), quantity, float(match.group("price"))))
+                break
+        else:
+            flush()
+            pending = [line, None, None]
+    flush()
+    return items
+
+
+def parse_order_date(text):
+    """
+    Finds the first date in scraped order text
+
+    Args:
+        text (str): Order card text
+
+    Returns:
+        str | None: ISO date (YYYY-MM-DD) or None if no date was found
+    """
+    for pattern, date_format in _DATE_PATTERNS:
+        match = pattern.search(text)
+        if not match:
+            continue
+        separator = "/" if "/" in date_format else " "
+        try:
+            return datetime.strptime(separator.join(match.groups()), date_format).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+class OrderStore:
+    """
+    Per-user order history in SQLite, indexed by order number and date.
+    Existence checks and inserts stay constant-time as the history grows
+    """
+
+    def __init__(self, user_folder):
+        """
+        Args:
+            user_folder (str): Folder of the user, e.g. users/<uuid>
+        """
+        self.user_folder = user_folder
+        os.makedirs(user_folder, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(user_folder, ORDER_DB_NAME))
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS orders (
+                order_number TEXT PRIMARY KEY,
+                order_date TEXT,
+                saved_at REAL NOT NULL,
+                body TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS orders_date ON orders (order_date)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS line_items (
+                order_number TEXT NOT NULL,
+                order_date TEXT,
+                product TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                price REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS line_items_order ON line_items (order_number)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS line_items_product ON line_items (product)")
+        self.conn.commit()
+        self._import_legacy_files()
+        self._backfill_line_items()
+
+    def _import_legacy_files(self):
+        if self.count():
+            return
+        paths = glob.glob(os.path.join(self.user_folder, "order_*.txt"))
+        for path in paths:
+            order_number = os.path.basename(path)[len("order_"):-len(".txt")]
+            with open(path, "r", encoding="utf-8") as file:
+                self.add(order_number, file.read(), commit=False)
+        self.conn.commit()
+        if paths:
+            print(f"Imported {len(paths)} legacy order files into {ORDER_DB_NAME}")
+
+    def _backfill_line_items(self):
+        if self.conn.execute("SELECT 1 FROM line_items LIMIT 1").fetchone() or not self.count():
+            return
+        for order_number, order_date, body in self.conn.execute(
+                "SELECT order_number, order_date, body FROM orders").fetchall():
+            self._add_line_items(order_number, order_date, body)
+        self.conn.commit()
+
+    def _add_line_items(self, order_number, order_date, body):
+        self.conn.executemany(
+            "INSERT INTO line_items (order_number, order_date, product, quantity, price) VALUES (?, ?, ?, ?, ?)",
+            [(order_number, order_date, product, quantity, price)
+             for product, quantity, price in parse_line_items(body)]
+        )
+
+    def exists(self, order_number):
+        row = self.conn.execute("SELECT 1 FROM orders WHERE order_number = ?", (str(order_number),)).fetchone()
+        return row is not None
+
+    def add(self, order_number, body, order_date=None, commit=True):
+        """
+        Stores an order unless it is already present
+
+        Args:
+            order_number (str): Sainsbury's order number
+            body (str): Raw order text in the legacy 'Order <n>:' layout
+            order_date (str, optional): ISO date, parsed from the body if omitted
+            commit (bool): Commit immediately
+
+        Returns:
+            bool: True if the order was inserted
+        """
+        order_date = order_date or parse_order_date(body)
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO orders (order_number, order_date, saved_at, body) VALUES (?, ?, ?, ?)",
+            (str(order_number), order_date, time.time(), body)
+        )
+        inserted = cursor.rowcount == 1
+        if inserted:
+            self._add_line_items(str(order_number), order_date, body)
+        if commit:
+            self.conn.commit()
+        return inserted
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    def state(self):
+        """
+        Returns a cheap fingerprint of the stored history; orders are only ever added, so it
+        changes exactly when a new order is saved
+
+        Returns:
+            tuple[int, float]: (number of orders, save time of the newest order or 0.0)
+        """
+        count, watermark = self.conn.execute("SELECT COUNT(*), MAX(saved_at) FROM orders").fetchone()
+        return count, watermark or 0.0
+
+    def line_item_columns(self, since=None):
+        """
+        Returns line items column by column
+
+        Args:
+            since (float, optional): Only include orders saved after this timestamp
+
+        Returns:
+            dict[str, list]: 'order_number', 'order_date', 'product', 'quantity' and 'price' columns
+        """
+        if since is None:
+            rows = self.conn.execute(
+                "SELECT order_number, order_date, product, quantity, price FROM line_items"
+            ).fetchall()
+        else:
+            rows = self.conn.execute(
+                "SELECT l.order_number, l.order_date, l.product, l.quantity, l.price FROM line_items l "
+                "JOIN orders o ON o.order_number = l.order_number WHERE o.saved_at > ?",
+                (since,)
+            ).fetchall()
+        names = ("order_number", "order_date", "product", "quantity", "price")
+        columns = list(zip(*rows)) if rows else [()] * len(names)
+        return {name: list(column) for name, column in zip(names, columns)}
+
+    def products_ordered_since(self, since_date):
+        """
+        Returns the products bought on or after a date
+
+        Args:
+            since_date (str): ISO date, e.g. '2025-01-31'
+
+        Returns:
+            dict[str, str]: Product name -> ISO date of its latest order
+        """
+        return dict(self.conn.execute(
+            "SELECT product, MAX(order_date) FROM line_items WHERE order_date >= ? GROUP BY product",
+            (since_date,)
+        ).fetchall())
+
+    def iter_newest_first(self):
+        """
+        Streams orders from the newest to the oldest
+
+        Yields:
+            tuple[str, str | None, str]: (order number, ISO date, raw order text)
+        """
+        yield from self.conn.execute(
+            "SELECT order_number, order_date, body FROM orders "
+            "ORDER BY order_date IS NULL, order_date DESC, CAST(order_number AS INTEGER) DESC"
+        )
+
+    def export_legacy(self, path=None):
+        """
+        Writes all orders, newest first, in the legacy orders.txt layout without loading them into memory
+
+        Args:
+            path (str, optional): Output path, users/<uuid>/orders.txt by default
+
+        Returns:
+            str: Path of the written file
+        """
+        path = path or os.path.join(self.user_folder, LEGACY_ORDERS_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            for _, _, body in self.iter_newest_first():
+                file.write(body)
+        os.replace(tmp_path, path)
+        return path
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a user's order history to the legacy orders.txt layout")
+    parser.add_argument("user_folder", help="folder of the user, e.g. users/<uuid>")
+    parser.add_argument("--output", help="output file, defaults to <user_folder>/orders.txt")
+    args = parser.parse_args()
+
+    store = OrderStore(args.user_folder)
+    print(f"Exported {store.count()} orders to {store.export_legacy(args.output)}")
+    store.close()
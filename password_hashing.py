@@ -0,0 +1,195 @@
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "0")) or max(1, (os.cpu_count() or 2) // 2)
+BCRYPT_QUEUE_LIMIT = int(os.getenv("BCRYPT_QUEUE_LIMIT", "200"))
+
+
+class HasherBusy(Exception):
+    """
+    Raised when more hashing requests are waiting than BCRYPT_QUEUE_LIMIT allows
+    """
+
+
+def hash_rounds(stored_hash):
+    """
+    Returns the work factor encoded in a bcrypt hash, e.g. 12 for '$2b$12$...'
+    """
+    try:
+        return int(stored_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, size-limited thread pool (bcrypt releases the GIL),
+    so a burst of logins uses at most `workers` cores and cannot starve the request
+    threadpool. Tracks queue depth and wait/run times for sizing the pool
+    """
+
+    def __init__(self, workers=BCRYPT_WORKERS, rounds=BCRYPT_ROUNDS, queue_limit=BCRYPT_QUEUE_LIMIT):
+        """
+        Args:
+            workers (int): Maximum number of hashes computed at the same time
+            rounds (int): bcrypt work factor for new hashes
+            queue_limit (int): Maximum number of requests waiting for a worker
+        """
+        self.workers = workers
+        self.rounds = rounds
+        self.queue_limit = queue_limit
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._rehashed = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+
+    def _submit(self, func, *args):
+        with self._lock:
+            if self._queued >= self.queue_limit:
+                self._rejected += 1
+                raise HasherBusy(f"{self._queued} password hashing requests are already waiting")
+            self._queued += 1
+        return self.executor.submit(self._timed, time.monotonic(), func, *args)
+
+    def _timed(self, submitted, func, *args):
+        started = time.monotonic()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            finished = time.monotonic()
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._wait_total += started - submitted
+                self._run_total += finished - started
+
+    def _hash(self, password):
+        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=self.rounds)).decode("utf-8")
+
+    def _verify(self, password, stored_hash):
+        if not bcrypt.checkpw(password.encode("utf-8"), stored_hash.encode("utf-8")):
+            return False, None
+        if hash_rounds(stored_hash) == self.rounds:
+            return True, None
+        # The password is only known right now, so this is the one chance to move it to the current cost
+        with self._lock:
+            self._rehashed += 1
+        return True, self._hash(password)
+
+    def hash_async(self, password):
+        """
+        Hashes a password with the configured work factor
+
+        Returns:
+            concurrent.futures.Future: Resolves to the bcrypt hash as str
+
+        Raises:
+            HasherBusy: If the queue is full
+        """
+        return self._submit(self._hash, password)
+
+    def verify_async(self, password, stored_hash):
+        """
+        Checks a password and, when it matches a hash with a different work factor,
+        computes a replacement hash in the same worker call
+
+        Returns:
+            concurrent.futures.Future: Resolves to (matches, new hash or None)
+
+        Raises:
+            HasherBusy: If the queue is full
+        """
+        return self._submit(self._verify, password, stored_hash)
+
+    def hash(self, password):
+        return self.hash_async(password).result()
+
+    def verify(self, password, stored_hash):
+        return self.verify_async(password, stored_hash).result()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "rehashed": self._rehashed,
+                "avg_wait_ms": round(1000 * self._wait_total / self._completed, 2) if self._completed else 0.0,
+                "avg_run_ms": round(1000 * self._run_total / self._completed, 2) if self._completed else 0.0,
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def benchmark(rounds, workers, seconds):
+    """
+    Measures bcrypt verify throughput for one work factor with a given number of threads
+
+    Args:
+        rounds (int): bcrypt work factor
+        workers (int): Concurrent verifying threads
+        seconds (float): Measurement time
+
+    Returns:
+        dict: 'rounds', 'workers', 'verifies', 'per_second', 'per_core' and 'latency_ms'
+    """
+    stored_hash = bcrypt.hashpw(b"benchmark-password", bcrypt.gensalt(rounds=rounds))
+    counts = [0] * workers
+    deadline = time.monotonic() + seconds
+
+    def run(index):
+        while time.monotonic() < deadline:
+            bcrypt.checkpw(b"benchmark-password", stored_hash)
+            counts[index] += 1
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    verifies = sum(counts)
+    per_second = verifies / elapsed
+    return {
+        "rounds": rounds,
+        "workers": workers,
+        "verifies": verifies,
+        "per_second": per_second,
+        "per_core": per_second / min(workers, os.cpu_count() or 1),
+        "latency_ms": 1000 * elapsed * workers / max(verifies, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure bcrypt verify throughput to size the hashing pool")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13], help="work factors to test")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, BCRYPT_WORKERS], help="thread counts to test")
+    parser.add_argument("--seconds", type=float, default=3, help="measurement time per combination")
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}, configured: BCRYPT_ROUNDS={BCRYPT_ROUNDS} BCRYPT_WORKERS={BCRYPT_WORKERS}")
+    print(f"{'rounds':>6} {'workers':>7} {'verifies/s':>11} {'per core/s':>11} {'latency ms':>11}")
+    for rounds in args.rounds:
+        for workers in sorted(set(args.workers)):
+            result = benchmark(rounds, workers, args.seconds)
+            print(f"{rounds:>6} {workers:>7} {result['per_second']:>11.1f} {result['per_core']:>11.1f} "
+                  f"{result['latency_ms']:>11.1f}")
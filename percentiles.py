@@ -0,0 +1,19 @@
+import math
+
+
+def percentile(sorted_values, fraction):
+    """
+    Returns the nearest-rank percentile of an already sorted list, or 0.0 when it is empty
+
+    Args:
+        sorted_values (list[float]): Values in ascending order
+        fraction (float): Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        float: The smallest value with at least `fraction` of the values at or below it
+    """
+    if not sorted_values:
+        return 0.0
+    # The tolerance keeps products such as 0.07 * 100 = 7.000000000000001 on their exact rank
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values) - 1e-9) - 1))
+    return sorted_values[index]
@@ -1,11 +1,10 @@
-from openai import OpenAI
 import os
 from dotenv import load_dotenv
 import time
-from tqdm import tqdm
+import tracing
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_PLUS_KEY"))
+OPENAI_API_KEY = os.getenv("OPENAI_PLUS_KEY")
 
 INPUT_FILE = "products_links.txt"
 CATEGORY_DIR = "categories"
@@ -22,7 +21,21 @@ CATEGORIES = [
     "Snacks and cookies", "Nuts and dried fruits", "Home and household", "Baby food", "Health supplements"
 ]
 
-os.makedirs(CATEGORY_DIR, exist_ok=True)
+_client = None
+
+
+def get_client():
+    """
+    Returns the OpenAI client, created on first use
+
+    Returns:
+        openai.OpenAI: Shared client
+    """
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
 
 
 def get_last_processed_line():
@@ -70,10 +83,11 @@ Do NOT return anything else.
 """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-        )
+        with tracing.span("llm.classify", model="gpt-4o-mini", url=url):
+            response = get_client().chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": prompt}],
+            )
         content = response.choices[0].message.content.strip()
         print(content)
 
@@ -90,20 +104,31 @@ Do NOT return anything else.
         return "Uncategorized", "Unknown Product"
 
 
-processed_urls = get_last_processed_line()
+def main():
+    """
+    Classifies every product URL of INPUT_FILE that is not in a category file yet
+    """
+    from tqdm import tqdm
+
+    os.makedirs(CATEGORY_DIR, exist_ok=True)
+    processed_urls = get_last_processed_line()
+
+    with open(INPUT_FILE, "r", encoding="utf-8") as file:
+        urls = [line.strip() for line in file.readlines() if line.strip()]
+
+    urls_to_process = [url for url in urls if url not in processed_urls]
+    print(f"🔄 Resuming from line {len(processed_urls)}. Remaining: {len(urls_to_process)} URLs.")
 
-with open(INPUT_FILE, "r", encoding="utf-8") as file:
-    urls = [line.strip() for line in file.readlines() if line.strip()]
+    for url in tqdm(urls_to_process, desc="Processing URLs"):
+        category, product_name = classify_product(url)
 
-urls_to_process = [url for url in urls if url not in processed_urls]
-print(f"🔄 Resuming from line {len(processed_urls)}. Remaining: {len(urls_to_process)} URLs.")
+        with open(os.path.join(CATEGORY_DIR, f"{category}.txt"), "a", encoding="utf-8") as file:
+            file.write(f"{product_name}: {url}\n")
 
-for url in tqdm(urls_to_process, desc="Processing URLs"):
-    category, product_name = classify_product(url)
+        time.sleep(1)
 
-    with open(os.path.join(CATEGORY_DIR, f"{category}.txt"), "a", encoding="utf-8") as file:
-        file.write(f"{product_name}: {url}\n")
+    print("Classification completed. All created files in the 'categories' folder.")
 
-    time.sleep(1)
 
-print("Classification completed. All created files in the 'categories' folder.")
+if __name__ == "__main__":
+    main()
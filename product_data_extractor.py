@@ -1,27 +1,54 @@
 import os
 import time
-from tqdm import tqdm
-from openai import OpenAI
 from dotenv import load_dotenv
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import tracing
 
 INPUT_FOLDER = "categories"
 OUTPUT_FOLDER = "data"
 INPUT_FILE = "Meat (beef, pork, poultry).txt"
 SEPARATOR = ";"
+NUTRITION_OK = "ok"
+NUTRITION_MISSING = "missing"
+NUTRITION_FAILED = "failed"
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_PLUS_KEY"))
+OPENAI_API_KEY = os.getenv("OPENAI_PLUS_KEY")
 
-options = uc.ChromeOptions()
-#options.add_argument("--headless=new")  # UI
-driver = uc.Chrome(options=options)
+_client = None
 
 
-def accept_cookies():
+def get_client():
+    """
+    Returns the OpenAI client, created on first use
+
+    Returns:
+        openai.OpenAI: Shared client
+    """
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
+
+
+def create_driver():
+    """
+    Starts the undetected Chrome used for scraping
+
+    Returns:
+        uc.Chrome: New browser instance
+    """
+    import undetected_chromedriver as uc
+    options = uc.ChromeOptions()
+    #options.add_argument("--headless=new")  # UI
+    return uc.Chrome(options=options)
+
+
+def accept_cookies(driver):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     try:
         driver.get("https://www.sainsburys.co.uk/gol-ui/groceries")
         time.sleep(3)
@@ -36,15 +63,28 @@ def accept_cookies():
         print("Cookies already accepted or not shown")
 
 
-def extract_nutrition():
+def read_nutrition(driver):
     """
     Extracts kcal, fat, protein, carbohydrate from nutrition table using GPT-4o-mini
+
+    Returns:
+        tuple[str, str]: (status, nutrition). Status is NUTRITION_OK, NUTRITION_MISSING when the
+        page has no nutrition table, or NUTRITION_FAILED when the extraction itself failed;
+        nutrition is 'N/A' unless the status is NUTRITION_OK
     """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     try:
         wait = WebDriverWait(driver, 10)
         table = wait.until(EC.presence_of_element_located((By.CLASS_NAME, "nutritionTable")))
         html = table.get_attribute("outerHTML")
+    except Exception:
+        print("No nutrition table found")
+        return NUTRITION_MISSING, "N/A"
 
+    try:
         prompt = f"""
         You are a nutrition label parser.
 
@@ -63,41 +103,95 @@ def extract_nutrition():
         If any value is missing or not present, return 'N/A' for that field.
         """
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.0
-        )
+        with tracing.span("llm.nutrition", model="gpt-4o-mini", prompt_chars=len(prompt)):
+            response = get_client().chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.0
+            )
 
         nutrition_result = response.choices[0].message.content.strip()
-        return nutrition_result
+        return NUTRITION_OK, nutrition_result
 
     except Exception as e:
         print(f"Nutrition extraction failed: {e}")
-        return "N/A"
+        return NUTRITION_FAILED, "N/A"
 
 
-def extract_product_data(url):
+def extract_nutrition(driver):
+    return read_nutrition(driver)[1]
+
+
+@tracing.traced("extractor.product")
+def scrape_product(driver, url, nutrition=True):
+    """
+    Reads name, price and, optionally, nutrition of a product page
+
+    Args:
+        driver (uc.Chrome): Selenium WebDriver instance
+        url (str): Product page URL
+        nutrition (bool): Also extract nutrition values; this costs one LLM call
+
+    Returns:
+        dict | None: 'name', 'price', 'nutrition' and 'nutrition_status' (both None if not requested),
+        or None if the page failed
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     try:
-        driver.get(url)
+        with tracing.span("extractor.navigate", driver=driver, url=url):
+            driver.get(url)
         wait = WebDriverWait(driver, 15)
 
         name_elem = wait.until(EC.presence_of_element_located((By.CLASS_NAME, "pd__header")))
         name = name_elem.text.strip()
         price_text = driver.find_element(By.CLASS_NAME, "pd__cost__retail-price").text.strip()
         price = price_text.replace("£", "").strip()
-        nutrition = extract_nutrition()
-        print(f"{name} ||| {price} ||| {nutrition}")
-
-        return f"{name}{SEPARATOR}{url}{SEPARATOR}{price}{SEPARATOR}{nutrition}{SEPARATOR}true"
+        nutrition_status, nutrition_result = read_nutrition(driver) if nutrition else (None, None)
+        print(f"{name} ||| {price} ||| {nutrition_result}")
+        return {"name": name, "price": price, "nutrition": nutrition_result, "nutrition_status": nutrition_status}
     except Exception as e:
         print(f"Failed: {url} -> {e}")
         return None
 
 
+def format_row(name, url, price, nutrition):
+    return f"{name}{SEPARATOR}{url}{SEPARATOR}{price}{SEPARATOR}{nutrition}{SEPARATOR}true"
+
+
+def extract_product_data(driver, url):
+    product = scrape_product(driver, url)
+    if product is None:
+        return None
+    return format_row(product["name"], url, product["price"], product["nutrition"])
+
+
+def read_category_file(path):
+    """
+    Reads a category file written by product_category_extractor
+
+    Args:
+        path (str): Path to a categories/<category>.txt file
+
+    Returns:
+        list[tuple[str, str]]: (product name, product URL) pairs in file order
+    """
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if ": http" in line:
+                name, link = line.strip().split(": http", 1)
+                items.append((name.strip(), "http" + link.strip()))
+    return items
+
+
 def main():
+    from tqdm import tqdm
+
     input_path = os.path.join(INPUT_FOLDER, INPUT_FILE)
     category_name = INPUT_FILE.replace(".txt", "").strip()
     output_path = os.path.join(OUTPUT_FOLDER, f"{category_name} data.txt")
@@ -116,26 +210,21 @@ def main():
                 if len(parts) >= 2:
                     processed_urls.add(parts[1])
 
-    with open(input_path, "r", encoding="utf-8") as f:
-        items = []
-        for line in f:
-            if ": http" in line:
-                name, link = line.strip().split(": http", 1)
-                link = "http" + link.strip()
-                if link not in processed_urls:
-                    items.append((name.strip(), link))
+    items = [(name, link) for name, link in read_category_file(input_path) if link not in processed_urls]
 
     print(f"Resuming from line {len(processed_urls)}. Remaining: {len(items)} URLs.")
 
-    accept_cookies()
-
-    with open(output_path, "a", encoding="utf-8") as f_out:
-        for original_name, url in tqdm(items, desc="Processing"):
-            data = extract_product_data(url)
-            if data:
-                f_out.write(data + "\n")
-
-    driver.quit()
+    driver = create_driver()
+    try:
+        accept_cookies(driver)
+
+        with open(output_path, "a", encoding="utf-8") as f_out:
+            for original_name, url in tqdm(items, desc="Processing"):
+                data = extract_product_data(driver, url)
+                if data:
+                    f_out.write(data + "\n")
+    finally:
+        driver.quit()
     print(f"\nDone. Output saved to: {output_path}")
 
 if __name__ == "__main__":
@@ -1,18 +1,24 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from crawl_scheduler import RevisitScheduler, fingerprint
+import tracing
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError
+import argparse
 import time
 import os
 
 input_file = "initial_urls.txt"
 output_file = "products_links.txt"
+state_file = "crawl_state.json"
 
 
 def accept_cookies(driver):
     """
     Accepts cookies on the Sainsbury's website if the consent banner is shown
     """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     wait = WebDriverWait(driver, 10)
 
     try:
@@ -35,17 +41,92 @@ def get_links_from_page(driver, url):
     Returns:
         list[str]: Unique list of product URLs found on the page
     """
-    driver.get(url)
-    time.sleep(2)
+    from selenium.webdriver.common.by import By
+
+    with tracing.span("crawler.page", driver=driver, url=url, selector="a.pt__link") as span:
+        driver.get(url)
+        time.sleep(2)
+
+        try:
+            links = driver.find_elements(By.CSS_SELECTOR, "a.pt__link")
+            hrefs = [link.get_attribute("href") for link in links if link.get_attribute("href")]
+            hrefs = list(set(hrefs))
+            span.set_attribute("links", len(hrefs))
+            return hrefs
+        except Exception as e:
+            span.set_attribute("error", str(e))
+            print(f"Error extracting links from page {url}: {e}")
+            return []
+
+
+def probe_page(url, validators):
+    """
+    Sends a conditional HTTP request for the page using stored validators. The
+    category pages are a client-rendered shell, so the answer only describes the
+    shell, not the product list Selenium renders; it is a hint, never a reason to skip
+
+    Args:
+        url (str): Category page URL
+        validators (dict): Stored 'etag' and/or 'last_modified' values
+
+    Returns:
+        tuple: (status code or None on failure, dict with new validators)
+    """
+    headers = {"User-Agent": "Mozilla/5.0"}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
 
     try:
-        links = driver.find_elements(By.CSS_SELECTOR, "a.pt__link")
-        hrefs = [link.get_attribute("href") for link in links if link.get_attribute("href")]
-        hrefs = list(set(hrefs))
-        return hrefs
-    except Exception as e:
-        print(f"Error extracting links from page {url}: {e}")
-        return []
+        with urlopen(Request(url, headers=headers, method="HEAD"), timeout=10) as response:
+            return response.status, {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+    except HTTPError as e:
+        if e.code == 304:
+            return 304, {}
+        return e.code, {}
+    except Exception:
+        return None, {}
+
+
+def crawl_incremental(driver, urls, scheduler):
+    """
+    Revisits only the pages that are due according to the scheduler and saves
+    the links of pages whose rendered product set changed
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+        urls (list[str]): All category URLs
+        scheduler (RevisitScheduler): Per-page fingerprint and schedule state
+    """
+    due_urls = scheduler.due(urls)
+    print(f"{len(due_urls)} of {len(urls)} pages are due for a revisit")
+
+    changed_pages = 0
+    for url in due_urls:
+        print(f"\nChecking page: {url}")
+        status, validators = probe_page(url, scheduler.validators(url))
+        if status == 304:
+            print("Page shell not modified (HTTP 304), checking the rendered products anyway")
+
+        hrefs = get_links_from_page(driver, url)
+        if not hrefs:
+            print("No links found, page will be retried on the next run")
+            continue
+
+        changed = scheduler.record(url, fingerprint(hrefs), **validators)
+        scheduler.save()
+
+        if changed:
+            changed_pages += 1
+            save_links(hrefs)
+        else:
+            print("Product set unchanged")
+
+    print(f"\n{changed_pages} of {len(due_urls)} revisited pages changed")
 
 
 def save_links(hrefs):
@@ -85,10 +166,15 @@ def save_links(hrefs):
             print(f" - {dup}")
 
 
-def main():
+def main(incremental=False):
     """
     Main entry point, loads category URLs and processes each to collect product links
+
+    Args:
+        incremental (bool): Revisit only the pages due according to their change history
     """
+    from selenium import webdriver
+
     if not os.path.exists(input_file):
         print(f"Input file '{input_file}' not found")
         return
@@ -106,9 +192,18 @@ def main():
         driver.get(urls[0])
         accept_cookies(driver)
 
+        scheduler = RevisitScheduler(state_file)
+        if incremental:
+            crawl_incremental(driver, urls, scheduler)
+            return
+
         for url in urls:
             print(f"\nProcessing page: {url}")
             hrefs = get_links_from_page(driver, url)
+            if hrefs:
+                # Full crawls also feed the schedule, so a later incremental run starts from fresh fingerprints
+                scheduler.record(url, fingerprint(hrefs))
+                scheduler.save()
             save_links(hrefs)
     except Exception as e:
         print(f"Error during processing: {e}")
@@ -117,4 +212,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Collect product links from Sainsbury's category pages")
+    parser.add_argument("--incremental", action="store_true",
+                        help="revisit only pages that are due according to their change history")
+    args = parser.parse_args()
+    main(incremental=args.incremental)
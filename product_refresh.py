@@ -0,0 +1,426 @@
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import time
+from datetime import date, timedelta
+from dotenv import load_dotenv
+from crawl_scheduler import RevisitScheduler, fingerprint
+from order_store import ORDER_DB_NAME, OrderStore
+from product_data_extractor import (INPUT_FOLDER, NUTRITION_FAILED, NUTRITION_MISSING, OUTPUT_FOLDER, SEPARATOR,
+                                    accept_cookies, create_driver, format_row, read_category_file, scrape_product)
+import tracing
+
+load_dotenv()
+PRODUCT_HISTORY_DB = os.getenv("PRODUCT_HISTORY_DB", "product_history.db")
+REFRESH_STATE_FILE = os.getenv("REFRESH_STATE_FILE", "product_refresh_state.json")
+PAGES_PER_HOUR = int(os.getenv("REFRESH_PAGES_PER_HOUR", "120"))
+NUTRITION_MAX_AGE = float(os.getenv("NUTRITION_MAX_AGE_DAYS", "90")) * 24 * 60 * 60
+ORDERED_WINDOW_DAYS = int(os.getenv("ORDERED_WINDOW_DAYS", "60"))
+ORDERED_WEIGHT = 3.0
+NEW_PRODUCT_STALENESS = 2.0
+USERS_DIR = "users"
+
+
+def normalize_name(name):
+    return re.sub(r"\s+", " ", name or "").strip().lower()
+
+
+class ProductHistory:
+    """
+    SQLite-backed price and nutrition history. Every product keeps numbered versions:
+    a scrape that finds the same values adds nothing, a changed price or nutrition adds
+    the next version, so the full change history stays queryable
+    """
+
+    def __init__(self, path=PRODUCT_HISTORY_DB):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS product_versions (
+                url TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                category TEXT NOT NULL,
+                name TEXT,
+                price TEXT,
+                nutrition TEXT,
+                nutrition_at REAL,
+                scraped_at REAL NOT NULL,
+                PRIMARY KEY (url, version)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS product_versions_category ON product_versions (category)")
+        self.conn.commit()
+
+    def latest(self):
+        """
+        Returns the newest version of every product
+
+        Returns:
+            dict[str, dict]: URL -> 'version', 'category', 'name', 'price', 'nutrition', 'nutrition_at' and 'scraped_at'
+        """
+        rows = self.conn.execute("""
+            SELECT v.url, v.version, v.category, v.name, v.price, v.nutrition, v.nutrition_at, v.scraped_at
+            FROM product_versions v
+            JOIN (SELECT url, MAX(version) AS version FROM product_versions GROUP BY url) m
+              ON m.url = v.url AND m.version = v.version
+        """).fetchall()
+        names = ("version", "category", "name", "price", "nutrition", "nutrition_at", "scraped_at")
+        return {row[0]: dict(zip(names, row[1:])) for row in rows}
+
+    def versions(self, url):
+        """
+        Returns all versions of a product, oldest first
+
+        Returns:
+            list[tuple]: (version, name, price, nutrition, scraped_at) rows
+        """
+        return self.conn.execute(
+            "SELECT version, name, price, nutrition, scraped_at FROM product_versions WHERE url = ? ORDER BY version",
+            (url,)
+        ).fetchall()
+
+    def record(self, url, category, name, price, nutrition, nutrition_at, previous=None, now=None):
+        """
+        Stores a scrape result as a new version if anything differs from the previous version
+
+        Args:
+            url (str): Product page URL
+            category (str): Category name
+            name (str): Product name
+            price (str): Price without the currency sign
+            nutrition (str): Nutrition summary
+            nutrition_at (float): When the nutrition values were extracted
+            previous (dict, optional): Current latest version from latest()
+            now (float, optional): Scrape timestamp
+
+        Returns:
+            bool: True if a new version was written
+        """
+        now = time.time() if now is None else now
+        if previous and (previous["name"], previous["price"], previous["nutrition"]) == (name, price, nutrition):
+            if nutrition_at != previous["nutrition_at"]:
+                # Re-extracted and unchanged: remember the check so it is not repeated next run
+                self.conn.execute("UPDATE product_versions SET nutrition_at = ? WHERE url = ? AND version = ?",
+                                  (nutrition_at, url, previous["version"]))
+                self.conn.commit()
+            return False
+        version = previous["version"] + 1 if previous else 1
+        self.conn.execute(
+            "INSERT INTO product_versions (url, version, category, name, price, nutrition, nutrition_at, scraped_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, version, category, name, price, nutrition, nutrition_at, now)
+        )
+        self.conn.commit()
+        return True
+
+    def import_data_file(self, path, category):
+        """
+        Imports a data/<category> data.txt file written by product_data_extractor as version 1
+        of every product that has no history yet, dated by the file modification time. 'N/A'
+        nutrition gets no nutrition_at, since the file cannot tell a failed extraction from a
+        product without a table, so it is extracted once more on the next visit
+
+        Returns:
+            int: Number of imported products
+        """
+        known = {row[0] for row in self.conn.execute("SELECT DISTINCT url FROM product_versions")}
+        scraped_at = os.path.getmtime(path)
+        rows = {}
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                parts = line.rstrip("\n").split(SEPARATOR)
+                if len(parts) >= 4 and parts[1] not in known:
+                    nutrition_at = None if parts[3] == "N/A" else scraped_at
+                    rows[parts[1]] = (parts[1], 1, category, parts[0], parts[2], parts[3], nutrition_at, scraped_at)
+        self.conn.executemany(
+            "INSERT INTO product_versions (url, version, category, name, price, nutrition, nutrition_at, scraped_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows.values()
+        )
+        self.conn.commit()
+        return len(rows)
+
+    def export(self, urls, path):
+        """
+        Writes the newest version of the given products in the product_data_extractor layout,
+        one line per product
+
+        Args:
+            urls (Iterable[str]): Products of one category
+            path (str): Data file to replace
+        """
+        latest = self.latest()
+        rows = sorted((latest[url]["name"], url) for url in set(urls) if url in latest)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            for name, url in rows:
+                file.write(format_row(name, url, latest[url]["price"], latest[url]["nutrition"]) + "\n")
+        os.replace(tmp_path, path)
+
+    def close(self):
+        self.conn.close()
+
+
+def data_file_path(category, output_folder=OUTPUT_FOLDER):
+    return os.path.join(output_folder, f"{category} data.txt")
+
+
+def load_catalog(categories_dir=INPUT_FOLDER):
+    """
+    Reads every category file
+
+    Returns:
+        dict[str, tuple[list[str], str]]: Product URL -> (categories listing it, listed name)
+    """
+    catalog = {}
+    for path in sorted(glob.glob(os.path.join(categories_dir, "*.txt"))):
+        category = os.path.basename(path)[:-len(".txt")].strip()
+        for name, url in read_category_file(path):
+            catalog.setdefault(url, ([], name))[0].append(category)
+    return catalog
+
+
+def recently_ordered(users_dir=USERS_DIR, days=ORDERED_WINDOW_DAYS, today=None):
+    """
+    Collects the products any user ordered in the last `days` days
+
+    Returns:
+        set[str]: Normalized product names
+    """
+    today = today or date.today()
+    since = (today - timedelta(days=days)).isoformat()
+    names = set()
+    for path in glob.glob(os.path.join(users_dir, "*", ORDER_DB_NAME)):
+        store = OrderStore(os.path.dirname(path))
+        try:
+            names.update(normalize_name(product) for product in store.products_ordered_since(since))
+        finally:
+            store.close()
+    return names
+
+
+def plan_refresh(catalog, latest, scheduler, ordered, limit, now=None):
+    """
+    Picks the products to scrape in this run. A product is a candidate when the scheduler
+    says it is due, when it was never scraped, or when it was recently ordered and has not
+    been checked for at least the scheduler's minimum interval. Candidates are ranked by
+    staleness (time since the last check relative to the product's revisit interval),
+    weighted up by how often the price changed and by ORDERED_WEIGHT for ordered products
+
+    Args:
+        catalog (dict): Output of load_catalog
+        latest (dict): Output of ProductHistory.latest
+        scheduler (RevisitScheduler): Per-product revisit state
+        ordered (set[str]): Normalized names of recently ordered products
+        limit (int): Maximum number of products
+        now (float, optional): Reference timestamp
+
+    Returns:
+        list[tuple[float, str, str]]: (score, URL, reason), highest score first
+    """
+    now = time.time() if now is None else now
+    candidates = []
+    for url, (_, listed_name) in catalog.items():
+        entry = scheduler.get(url)
+        previous = latest.get(url)
+        is_ordered = normalize_name(listed_name) in ordered or bool(
+            previous and normalize_name(previous["name"]) in ordered
+        )
+
+        if entry:
+            elapsed = now - entry["last_checked"]
+            staleness = elapsed / entry["interval"]
+            volatility = entry["changes"] / entry["checks"]
+        elif previous:
+            elapsed = now - previous["scraped_at"]
+            staleness = elapsed / scheduler.initial_interval
+            volatility = 0.0
+        else:
+            elapsed = None
+            staleness = NEW_PRODUCT_STALENESS
+            volatility = 0.0
+
+        if elapsed is None:
+            reason = "new"
+        elif staleness >= 1:
+            reason = "stale"
+        elif is_ordered and elapsed >= scheduler.min_interval:
+            reason = "ordered"
+        else:
+            continue
+
+        score = staleness * (1 + volatility) * (ORDERED_WEIGHT if is_ordered else 1)
+        candidates.append((score, url, reason))
+
+    candidates.sort(reverse=True)
+    return candidates[:limit]
+
+
+def refresh_products(driver, plan, catalog, latest, history, scheduler, pages_per_hour=PAGES_PER_HOUR,
+                     nutrition_max_age=NUTRITION_MAX_AGE):
+    """
+    Scrapes the planned products at no more than `pages_per_hour` page loads per hour.
+    Nutrition is only re-extracted for new products, after a failed extraction or when it is older
+    than `nutrition_max_age`, otherwise the previous values are carried over and the page costs no
+    LLM call. A failed re-extraction never replaces earlier values
+
+    Args:
+        driver (uc.Chrome): Browser with cookies accepted
+        plan (list): Output of plan_refresh
+        catalog (dict): Output of load_catalog
+        latest (dict): Output of ProductHistory.latest
+        history (ProductHistory): Version store
+        scheduler (RevisitScheduler): Per-product revisit state, saved after every page
+        pages_per_hour (int): Page load budget
+        nutrition_max_age (float): Seconds after which nutrition is extracted again
+
+    Returns:
+        dict: 'scraped', 'failed', 'new', 'changed', 'nutrition_calls' and the touched 'categories'
+    """
+    spacing = 3600 / pages_per_hour
+    stats = {"scraped": 0, "failed": 0, "new": 0, "changed": 0, "nutrition_calls": 0, "categories": set()}
+    next_start = time.monotonic()
+    for _, url, reason in plan:
+        delay = next_start - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        next_start = time.monotonic() + spacing
+
+        categories = catalog[url][0]
+        previous = latest.get(url)
+        now = time.time()
+        need_nutrition = (
+            previous is None
+            or previous["nutrition_at"] is None
+            or now - previous["nutrition_at"] > nutrition_max_age
+        )
+
+        with tracing.span("refresh.product", url=url, reason=reason, nutrition=need_nutrition):
+            product = scrape_product(driver, url, nutrition=need_nutrition)
+        if product is None:
+            stats["failed"] += 1
+            # Back off like an unchanged page, so a dead link does not take the budget of every run
+            scheduler.record(url, changed=False, now=now)
+            scheduler.save()
+            continue
+
+        stats["scraped"] += 1
+        if need_nutrition and product["nutrition_status"] == NUTRITION_FAILED:
+            # A failed LLM call says nothing about the product: keep what we had and retry on the next visit
+            stats["nutrition_calls"] += 1
+            if previous:
+                nutrition, nutrition_at = previous["nutrition"], previous["nutrition_at"]
+            else:
+                nutrition, nutrition_at = product["nutrition"], None
+        elif need_nutrition:
+            # A page without a nutrition table is stored as 'N/A' and, like real values, rechecked after nutrition_max_age
+            if product["nutrition_status"] != NUTRITION_MISSING:
+                stats["nutrition_calls"] += 1
+            nutrition, nutrition_at = product["nutrition"], now
+        else:
+            nutrition, nutrition_at = previous["nutrition"], previous["nutrition_at"]
+
+        # The schedule follows the price; nutrition refreshes on its own clock and would skew the intervals
+        scheduler.record(url, fingerprint([product["name"], product["price"]]), now=now)
+        scheduler.save()
+        if history.record(url, categories[0], product["name"], product["price"], nutrition, nutrition_at, previous, now):
+            stats["new" if previous is None else "changed"] += 1
+            stats["categories"].update(categories)
+            if previous and previous["price"] != product["price"]:
+                print(f"Price change: {product['name']} {previous['price']} -> {product['price']}")
+    return stats
+
+
+def run_refresh(pages_per_hour=PAGES_PER_HOUR, hours=1.0, categories_dir=INPUT_FOLDER, output_folder=OUTPUT_FOLDER,
+                users_dir=USERS_DIR, dry_run=False):
+    """
+    One refresh run over all categories: imports existing data files, plans the most
+    valuable pages within the budget, scrapes them and rewrites the data files of
+    categories that changed
+
+    Args:
+        pages_per_hour (int): Page load budget
+        hours (float): Length of this run; the run scrapes at most pages_per_hour * hours pages
+        categories_dir (str): Folder of the category files
+        output_folder (str): Folder of the data files
+        users_dir (str): Folder containing users/<uuid> folders with order stores
+        dry_run (bool): Only print the plan
+    """
+    catalog = load_catalog(categories_dir)
+    if not catalog:
+        print(f"No products found in '{categories_dir}'")
+        return
+
+    history = ProductHistory()
+    try:
+        imported = 0
+        members = {}
+        for url, (categories, _) in catalog.items():
+            for category in categories:
+                members.setdefault(category, []).append(url)
+        for category in sorted(members):
+            path = data_file_path(category, output_folder)
+            if os.path.exists(path):
+                imported += history.import_data_file(path, category)
+        if imported:
+            print(f"Imported {imported} previously scraped products into {PRODUCT_HISTORY_DB}")
+
+        latest = history.latest()
+        scheduler = RevisitScheduler(REFRESH_STATE_FILE)
+        ordered = recently_ordered(users_dir)
+        plan = plan_refresh(catalog, latest, scheduler, ordered, int(pages_per_hour * hours))
+
+        reasons = {}
+        for _, _, reason in plan:
+            reasons[reason] = reasons.get(reason, 0) + 1
+        summary = ", ".join(f"{reason}: {count}" for reason, count in sorted(reasons.items())) or "nothing due"
+        print(f"Refreshing {len(plan)} of {len(catalog)} products "
+              f"({100 * len(plan) / len(catalog):.1f}% of a full scrape; {summary})")
+        if dry_run:
+            for score, url, reason in plan:
+                print(f"{score:>8.2f} {reason:<8} {catalog[url][1]}  {url}")
+            return
+        if not plan:
+            return
+
+        driver = create_driver()
+        try:
+            accept_cookies(driver)
+            stats = refresh_products(driver, plan, catalog, latest, history, scheduler, pages_per_hour)
+        finally:
+            driver.quit()
+
+        os.makedirs(output_folder, exist_ok=True)
+        for category in sorted(stats["categories"]):
+            history.export(members[category], data_file_path(category, output_folder))
+        print(f"Scraped {stats['scraped']} pages ({stats['failed']} failed): {stats['new']} new products, "
+              f"{stats['changed']} changed, {stats['nutrition_calls']} nutrition extractions")
+    finally:
+        history.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh prices and nutrition of the most stale products")
+    parser.add_argument("--pages-per-hour", type=int, default=PAGES_PER_HOUR, help="page load budget")
+    parser.add_argument("--hours", type=float, default=1.0, help="length of one run")
+    parser.add_argument("--users-dir", default=USERS_DIR, help="folder containing users/<uuid> folders")
+    parser.add_argument("--dry-run", action="store_true", help="print the planned pages without scraping")
+    parser.add_argument("--loop", action="store_true", help="keep running, one run after another")
+    parser.add_argument("--history", metavar="URL", help="print the stored versions of a product and exit")
+    args = parser.parse_args()
+
+    if args.history:
+        product_history = ProductHistory()
+        for version, name, price, nutrition, scraped_at in product_history.versions(args.history):
+            print(f"v{version} {time.strftime('%Y-%m-%d %H:%M', time.localtime(scraped_at))} {price} {name} | {nutrition}")
+        product_history.close()
+    else:
+        while True:
+            started = time.time()
+            with tracing.span("refresh.run", pages_per_hour=args.pages_per_hour, hours=args.hours):
+                run_refresh(args.pages_per_hour, args.hours, users_dir=args.users_dir, dry_run=args.dry_run)
+            if not args.loop or args.dry_run:
+                break
+            # A run that finished early waits for the rest of its time slot, keeping the hourly budget
+            time.sleep(max(0.0, args.hours * 3600 - (time.time() - started)))
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "300"))
+
+
+def profile_etag(profile):
+    """
+    Returns a strong ETag for a profile, derived from its content
+
+    Args:
+        profile (dict): Profile fields
+
+    Returns:
+        str: Quoted ETag value
+    """
+    body = json.dumps(profile, sort_keys=True, ensure_ascii=False, default=str)
+    return '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Checks an If-None-Match header value against an ETag
+    """
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class ProfileCache:
+    """
+    Bounded LRU cache of user profiles with their ETags. Writes go through it, so
+    this process always serves its own updates; the TTL bounds how long an update
+    made by another process can stay invisible
+    """
+
+    def __init__(self, max_entries=PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_uuid):
+        """
+        Returns a cached profile
+
+        Returns:
+            tuple[dict, str] | None: (profile, ETag) or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(user_uuid)
+            if entry is None or time.monotonic() - entry[2] > self.ttl:
+                self._entries.pop(user_uuid, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_uuid)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, user_uuid, profile):
+        """
+        Stores a profile, evicting the least recently used one when full
+
+        Returns:
+            str: ETag of the stored profile
+        """
+        etag = profile_etag(profile)
+        with self._lock:
+            self._entries[user_uuid] = (dict(profile), etag, time.monotonic())
+            self._entries.move_to_end(user_uuid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, user_uuid):
+        with self._lock:
+            self._entries.pop(user_uuid, None)
+
+    def metrics(self):
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries,
+                    "hits": self.hits, "misses": self.misses}
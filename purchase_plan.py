@@ -0,0 +1,182 @@
+import argparse
+import glob
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from order_store import ORDER_DB_NAME, OrderStore
+import tracing
+
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+PLAN_MODEL = os.getenv("PLAN_MODEL", "gpt-4")
+PLAN_WORKERS = int(os.getenv("PLAN_WORKERS", "4"))
+PLAN_FILE_NAME = "purchase_plan.txt"
+PLAN_META_FILE_NAME = "purchase_plan.json"
+USERS_DIR = "users"
+
+_FULL_PROMPT = (
+    "Вот сводка по покупкам из прошлых заказов (частота, интервалы между покупками и траты):\n\n"
+    "{summary}\n\n"
+    "На основе этой информации составь план покупок на 6 месяцев, учитывая возможные тенденции и периодичность повторяющихся покупок."
+)
+_UPDATE_PROMPT = (
+    "Вот текущий план покупок на 6 месяцев:\n\n"
+    "{plan}\n\n"
+    "С момента его составления появились новые заказы:\n\n"
+    "{delta}\n\n"
+    "Обнови план с учётом новых заказов: скорректируй количества и периодичность, добавь новые регулярные покупки. "
+    "Верни план целиком."
+)
+
+
+def _read_meta(user_folder):
+    path = os.path.join(user_folder, PLAN_META_FILE_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+
+def _complete(client, prompt_text, model):
+    with tracing.span("llm.purchase_plan", model=model, prompt_chars=len(prompt_text)):
+        response = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt_text}],
+            temperature=0.7
+        )
+    return response.choices[0].message.content
+
+
+def generate_plan(user_folder, client=None, force=False, model=PLAN_MODEL):
+    """
+    Creates or updates the 6-month purchase plan of a user. The order history fingerprint used
+    for the plan is stored next to it: when it has not changed nothing is sent to the LLM, and
+    when new orders arrived only their summary is sent together with the previous plan
+
+    Args:
+        user_folder (str): Folder of the user, e.g. users/<uuid>
+        client (openai.OpenAI, optional): Shared client, created on demand
+        force (bool): Rebuild the plan from the full history summary
+        model (str): Chat model name
+
+    Returns:
+        str: 'created', 'updated', 'unchanged', 'empty' (no orders) or 'skipped' (no parsable line items)
+    """
+    store = OrderStore(user_folder)
+    try:
+        count, watermark = store.state()
+        if not count:
+            return "empty"
+
+        fingerprint = f"{count}:{watermark:.6f}"
+        plan_path = os.path.join(user_folder, PLAN_FILE_NAME)
+        meta = _read_meta(user_folder) if os.path.exists(plan_path) else None
+        if meta and meta.get("fingerprint") == fingerprint and not force:
+            return "unchanged"
+
+        from order_analytics import build_delta_summary, build_purchase_summary
+
+        previous_plan = None
+        if meta and not force:
+            with open(plan_path, "r", encoding="utf-8") as file:
+                previous_plan = file.read()
+
+        if previous_plan:
+            delta = build_delta_summary(store, meta["watermark"])
+            if delta is None:
+                status = "unchanged"
+                plan = None
+            else:
+                status = "updated"
+                prompt_text = _UPDATE_PROMPT.format(plan=previous_plan, delta=delta)
+        else:
+            summary = build_purchase_summary(store)
+            if summary is None:
+                return "skipped"
+            status = "created"
+            prompt_text = _FULL_PROMPT.format(summary=summary)
+
+        if status != "unchanged":
+            if client is None:
+                import openai
+                client = openai.OpenAI(api_key=OPENAI_API_KEY)
+            plan = _complete(client, prompt_text, model)
+            _write_atomic(plan_path, plan)
+
+        _write_atomic(os.path.join(user_folder, PLAN_META_FILE_NAME), json.dumps({
+            "fingerprint": fingerprint,
+            "watermark": watermark,
+            "orders": count,
+            "model": model,
+            "generated_at": meta["generated_at"] if plan is None else time.time(),
+        }))
+        return status
+    finally:
+        store.close()
+
+
+def refresh_all(users_dir=USERS_DIR, workers=PLAN_WORKERS, force=False, model=PLAN_MODEL):
+    """
+    Refreshes the purchase plans of every user folder that has an order store, in parallel.
+    Users whose history did not change since their last plan cost one SQLite query
+
+    Args:
+        users_dir (str): Folder containing the users/<uuid> folders
+        workers (int): Concurrent LLM requests
+        force (bool): Rebuild every plan from the full history summary
+        model (str): Chat model name
+
+    Returns:
+        Counter: Number of users per status, with failures counted as 'error'
+    """
+    folders = sorted(os.path.dirname(path) for path in glob.glob(os.path.join(users_dir, "*", ORDER_DB_NAME)))
+    statuses = Counter()
+    if not folders:
+        return statuses
+
+    import openai
+    client = openai.OpenAI(api_key=OPENAI_API_KEY)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        generate = tracing.in_current_context(generate_plan)
+        futures = {executor.submit(generate, folder, client, force, model): folder for folder in folders}
+        for future in as_completed(futures):
+            try:
+                status = future.result()
+            except Exception as e:
+                print(f"Error refreshing plan for {futures[future]}: {e}")
+                status = "error"
+            statuses[status] += 1
+    return statuses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh purchase plans for every user with changed order history")
+    parser.add_argument("--users-dir", default=USERS_DIR, help="folder containing users/<uuid> folders")
+    parser.add_argument("--workers", type=int, default=PLAN_WORKERS, help="concurrent LLM requests")
+    parser.add_argument("--force", action="store_true", help="rebuild every plan from the full history")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="keep running and refresh every N hours instead of once")
+    args = parser.parse_args()
+
+    while True:
+        started = time.time()
+        with tracing.span("plan.refresh_all", users_dir=args.users_dir):
+            statuses = refresh_all(args.users_dir, args.workers, args.force)
+        summary = ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())) or "no users"
+        print(f"Plan refresh finished in {time.time() - started:.1f}s ({summary})")
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval * 3600)
@@ -1,18 +1,51 @@
+import argparse
+import functools
+import json
+import statistics
+import threading
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from concurrent.futures import ThreadPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from percentiles import percentile
 
+METRICS = ("wall_s", "ttfb_ms", "dom_content_loaded_ms", "load_ms", "resources", "resource_bytes", "transfer_bytes")
 
-def measure_page_load_time(url: str) -> float:
-    """
-    Measures how long it takes to fully load the specified URL using a headless Chrome browser
+_NAVIGATION_SCRIPT = """
+var nav = performance.getEntriesByType("navigation")[0];
+var t = performance.timing;
+var resources = performance.getEntriesByType("resource");
+var resourceBytes = resources.reduce(function (total, entry) { return total + (entry.transferSize || 0); }, 0);
+if (nav) {
+    return {
+        ttfb_ms: nav.responseStart - nav.requestStart,
+        dom_content_loaded_ms: nav.domContentLoadedEventEnd - nav.startTime,
+        load_ms: nav.loadEventEnd > 0 ? nav.loadEventEnd - nav.startTime : null,
+        resources: resources.length,
+        resource_bytes: resourceBytes,
+        transfer_bytes: (nav.transferSize || 0) + resourceBytes
+    };
+}
+return {
+    ttfb_ms: t.responseStart - t.requestStart,
+    dom_content_loaded_ms: t.domContentLoadedEventEnd - t.navigationStart,
+    load_ms: t.loadEventEnd > 0 ? t.loadEventEnd - t.navigationStart : null,
+    resources: resources.length,
+    resource_bytes: resourceBytes,
+    transfer_bytes: resourceBytes
+};
+"""
 
-    Args:
-        url (str): The web page URL to load
+
+def create_driver():
+    """
+    Starts the headless Chrome used for measurements
 
     Returns:
-        float: Total load time in seconds
+        webdriver.Chrome: Browser with the desktop user agent override applied
     """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
     options = Options()
     options.add_argument("--log-level=3")
     options.add_argument("--headless=new")
@@ -29,17 +62,245 @@ def measure_page_load_time(url: str) -> float:
             "Chrome/114.0.5735.199 Safari/537.36"
         )
     })
+    return driver
+
+
+def measure_navigation(driver, url: str) -> dict:
+    """
+    Loads a URL and reads its Navigation Timing and Resource Timing entries
+
+    Args:
+        driver (webdriver.Chrome): Browser to navigate
+        url (str): The web page URL to load
+
+    Returns:
+        dict: 'wall_s' (time spent in driver.get), 'ttfb_ms', 'dom_content_loaded_ms', 'load_ms',
+        'resources', 'resource_bytes' and 'transfer_bytes'
+    """
+    start = time.perf_counter()
+    driver.get(url)
+    wall = time.perf_counter() - start
+    return {"wall_s": wall, **driver.execute_script(_NAVIGATION_SCRIPT)}
+
 
+def measure_page_load_time(url: str) -> float:
+    """
+    Measures how long it takes to fully load the specified URL using a headless Chrome browser.
+    Browser startup is not included
+
+    Args:
+        url (str): The web page URL to load
+
+    Returns:
+        float: Total load time in seconds
+    """
+    driver = create_driver()
     try:
-        start = time.time()
-        driver.get(url)
-        end = time.time()
-        return end - start
+        return measure_navigation(driver, url)["wall_s"]
     finally:
         driver.quit()
 
 
+def profile_browser(url: str, cold_runs: int, warm_runs: int, browser: int = 0) -> list[dict]:
+    """
+    Measures cold loads (a fresh browser with an empty cache each time) and warm loads
+    (repeated loads in one browser after a priming load) of a URL
+
+    Args:
+        url (str): The web page URL to load
+        cold_runs (int): Number of fresh-browser loads
+        warm_runs (int): Number of loads in an already warmed browser
+        browser (int): Index of the browser, recorded with every run
+
+    Returns:
+        list[dict]: One record per run with 'mode', 'browser', 'startup_s' (cold only) and the navigation metrics
+    """
+    runs = []
+    for _ in range(cold_runs):
+        started = time.perf_counter()
+        try:
+            driver = create_driver()
+        except Exception as e:
+            runs.append({"mode": "cold", "browser": browser, "error": f"browser did not start: {e}"})
+            continue
+        startup = time.perf_counter() - started
+        try:
+            runs.append({"mode": "cold", "browser": browser, "startup_s": startup, **measure_navigation(driver, url)})
+        except Exception as e:
+            runs.append({"mode": "cold", "browser": browser, "error": str(e)})
+        finally:
+            driver.quit()
+
+    if warm_runs:
+        try:
+            driver = create_driver()
+        except Exception as e:
+            runs.extend({"mode": "warm", "browser": browser, "error": f"browser did not start: {e}"}
+                        for _ in range(warm_runs))
+            return runs
+        try:
+            measure_navigation(driver, url)
+            for _ in range(warm_runs):
+                try:
+                    runs.append({"mode": "warm", "browser": browser, **measure_navigation(driver, url)})
+                except Exception as e:
+                    runs.append({"mode": "warm", "browser": browser, "error": str(e)})
+        except Exception as e:
+            runs.extend({"mode": "warm", "browser": browser, "error": f"priming load failed: {e}"}
+                        for _ in range(warm_runs))
+        finally:
+            driver.quit()
+    return runs
+
+
+def describe(values: list[float]) -> dict:
+    """
+    Summarizes a list of measurements
+
+    Returns:
+        dict: 'n', 'mean', 'median', 'stdev', 'min', 'p90', 'p95' and 'max'
+    """
+    values = sorted(value for value in values if value is not None)
+    if not values:
+        return {"n": 0}
+
+    return {
+        "n": len(values),
+        "mean": statistics.fmean(values),
+        "median": statistics.median(values),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "min": values[0],
+        "p90": percentile(values, 0.90),
+        "p95": percentile(values, 0.95),
+        "max": values[-1],
+    }
+
+
+def profile_page(url: str, cold_runs: int = 5, warm_runs: int = 10, browsers: int = 1) -> dict:
+    """
+    Profiles a page across several concurrent browsers and aggregates the runs per mode
+
+    Args:
+        url (str): The web page URL to load
+        cold_runs (int): Fresh-browser loads per browser
+        warm_runs (int): Warm loads per browser
+        browsers (int): Number of browsers measuring at the same time
+
+    Returns:
+        dict: Report with the parameters, raw 'runs' and 'stats' per mode and metric
+    """
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=browsers) as executor:
+        futures = [executor.submit(profile_browser, url, cold_runs, warm_runs, index) for index in range(browsers)]
+        runs = [run for future in futures for run in future.result()]
+
+    stats = {}
+    for mode in ("cold", "warm"):
+        mode_runs = [run for run in runs if run["mode"] == mode and "error" not in run]
+        metrics = METRICS + ("startup_s",) if mode == "cold" else METRICS
+        stats[mode] = {metric: describe([run.get(metric) for run in mode_runs]) for metric in metrics}
+        stats[mode]["errors"] = sum(1 for run in runs if run["mode"] == mode and "error" in run)
+    return {
+        "url": url,
+        "started": started,
+        "cold_runs": cold_runs,
+        "warm_runs": warm_runs,
+        "browsers": browsers,
+        "stats": stats,
+        "runs": runs,
+    }
+
+
+def compare_reports(baseline: dict, current: dict) -> list[dict]:
+    """
+    Compares the median of every metric between two reports
+
+    Returns:
+        list[dict]: 'mode', 'metric', 'baseline', 'current' and 'change' (relative, None if the baseline is 0)
+    """
+    rows = []
+    for mode, metrics in current["stats"].items():
+        for metric, summary in metrics.items():
+            if not isinstance(summary, dict) or "median" not in summary:
+                continue
+            base = baseline["stats"].get(mode, {}).get(metric, {}).get("median")
+            if base is None:
+                continue
+            change = (summary["median"] - base) / base if base else None
+            rows.append({"mode": mode, "metric": metric, "baseline": base, "current": summary["median"],
+                         "change": change})
+    return rows
+
+
+def serve_directory(directory: str, port: int = 0) -> ThreadingHTTPServer:
+    """
+    Serves a folder of static pages on localhost in a background thread
+
+    Args:
+        directory (str): Folder to serve
+        port (int): Port, 0 picks a free one
+
+    Returns:
+        ThreadingHTTPServer: Running server; its port is `server.server_address[1]`
+    """
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, name="page-server", daemon=True).start()
+    return server
+
+
+def print_report(report: dict):
+    """
+    Prints the statistics of a report, one line per mode and metric
+    """
+    print(f"{report['url']}: {report['browsers']} browser(s), {report['cold_runs']} cold and "
+          f"{report['warm_runs']} warm runs each")
+    print(f"{'mode':<5} {'metric':<22} {'n':>4} {'mean':>10} {'median':>10} {'p90':>10} {'p95':>10} "
+          f"{'max':>10} {'stdev':>10}")
+    for mode, metrics in report["stats"].items():
+        for metric, summary in metrics.items():
+            if not isinstance(summary, dict) or not summary.get("n"):
+                continue
+            print(f"{mode:<5} {metric:<22} {summary['n']:>4} {summary['mean']:>10.2f} {summary['median']:>10.2f} "
+                  f"{summary['p90']:>10.2f} {summary['p95']:>10.2f} {summary['max']:>10.2f} {summary['stdev']:>10.2f}")
+        print(f"{mode:<5} {'errors':<22} {metrics['errors']:>4}")
+
+
 if __name__ == "__main__":
-    target_url = "https://www.sainsburys.co.uk/gol-ui/groceries"
-    load_time = measure_page_load_time(target_url)
-    print(f"Page load time: {load_time:.2f} seconds")
+    parser = argparse.ArgumentParser(description="Profile page load performance with headless Chrome")
+    parser.add_argument("url", nargs="?", default="https://www.sainsburys.co.uk/gol-ui/groceries",
+                        help="page URL, or a path relative to --serve")
+    parser.add_argument("--cold", type=int, default=5, help="fresh-browser loads per browser")
+    parser.add_argument("--warm", type=int, default=10, help="warm loads per browser")
+    parser.add_argument("--browsers", type=int, default=1, help="concurrent browsers")
+    parser.add_argument("--serve", help="serve this folder locally and load the URL from it")
+    parser.add_argument("--report", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="compare medians with an earlier JSON report")
+    args = parser.parse_args()
+
+    target_url = args.url
+    page_server = None
+    if args.serve:
+        if args.url.startswith("http"):
+            parser.error("with --serve, the URL must be a path inside the served folder")
+        page_server = serve_directory(args.serve)
+        target_url = f"http://127.0.0.1:{page_server.server_address[1]}/{args.url.lstrip('/')}"
+
+    page_report = profile_page(target_url, args.cold, args.warm, args.browsers)
+    print_report(page_report)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            json.dump(page_report, report_file, indent=2)
+        print(f"Report written to {args.report}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as baseline_file:
+            baseline_report = json.load(baseline_file)
+        print(f"\nMedian change against {args.compare}")
+        for row in compare_reports(baseline_report, page_report):
+            change = "n/a" if row["change"] is None else f"{100 * row['change']:+.1f}%"
+            print(f"{row['mode']:<5} {row['metric']:<22} {row['baseline']:>10.2f} -> {row['current']:>10.2f}  {change}")
+
+    if page_server:
+        page_server.shutdown()
@@ -0,0 +1,228 @@
+import hashlib
+import hmac
+import json
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+SESSION_STORE_KEY = os.getenv("SESSION_STORE_KEY")
+SESSIONS_DIR = os.getenv("SESSIONS_DIR", "sessions")
+SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", str(14 * 24 * 60 * 60)))
+SESSION_ORIGIN = "https://www.sainsburys.co.uk"
+SESSION_CHECK_URL = "https://www.sainsburys.co.uk/gol-ui/groceries"
+
+_fernet = None
+
+
+def _get_fernet():
+    """
+    Returns the Fernet cipher for SESSION_STORE_KEY, created on first use
+
+    Returns:
+        Fernet | None: None if no key is configured
+    """
+    global _fernet
+    if _fernet is None and SESSION_STORE_KEY:
+        from cryptography.fernet import Fernet
+        _fernet = Fernet(SESSION_STORE_KEY.encode("utf-8"))
+    return _fernet
+
+
+def _session_path(login):
+    name = hashlib.sha256(login.strip().lower().encode("utf-8")).hexdigest()
+    return os.path.join(SESSIONS_DIR, f"{name}.session")
+
+
+def _password_digest(password):
+    return hmac.new(SESSION_STORE_KEY.encode("utf-8"), password.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _load(login):
+    from cryptography.fernet import InvalidToken
+
+    path = _session_path(login)
+    if not SESSION_STORE_KEY or not os.path.exists(path):
+        return None
+    try:
+        fernet = _get_fernet()
+    except ValueError as e:
+        # A malformed key cannot read any session, but the files stay for when it is fixed
+        print(f"SESSION_STORE_KEY is invalid, stored session for {login} is unreadable: {e}")
+        return None
+    try:
+        with open(path, "rb") as file:
+            return json.loads(fernet.decrypt(file.read(), ttl=SESSION_MAX_AGE))
+    except (OSError, ValueError, InvalidToken) as e:
+        print(f"Stored session for {login} is unreadable or expired: {e}")
+        discard_session(login)
+        return None
+
+
+def discard_session(login):
+    """
+    Deletes the stored session of an account
+
+    Args:
+        login (str): Sainsbury's account login
+    """
+    try:
+        os.remove(_session_path(login))
+    except FileNotFoundError:
+        pass
+
+
+def has_session(login):
+    """
+    Checks whether an account has a stored, decryptable session
+
+    Args:
+        login (str): Sainsbury's account login
+
+    Returns:
+        bool: True if a session is available
+    """
+    return _load(login) is not None
+
+
+def save_session(driver, login, password=None):
+    """
+    Saves cookies and local storage of an authenticated browser, encrypted with SESSION_STORE_KEY
+
+    Args:
+        driver (webdriver.Chrome): Logged-in Selenium WebDriver instance
+        login (str): Sainsbury's account login
+        password (str, optional): Password used for the login; only an HMAC of it is stored
+    """
+    try:
+        fernet = _get_fernet()
+    except ValueError as e:
+        print(f"SESSION_STORE_KEY is invalid, authenticated sessions will not be persisted: {e}")
+        return
+    if fernet is None:
+        print("SESSION_STORE_KEY is not set, authenticated sessions will not be persisted")
+        return
+
+    try:
+        try:
+            cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+        except Exception:
+            cookies = driver.get_cookies()
+
+        local_storage = {}
+        if driver.current_url.startswith(SESSION_ORIGIN):
+            local_storage = driver.execute_script(
+                "var items = {};"
+                "for (var i = 0; i < localStorage.length; i++) {"
+                "  var key = localStorage.key(i); items[key] = localStorage.getItem(key);"
+                "}"
+                "return items;"
+            )
+
+        state = {
+            "login": login,
+            "password_digest": _password_digest(password) if password else None,
+            "cookies": cookies,
+            "local_storage": local_storage,
+            "saved_at": time.time(),
+        }
+
+        os.makedirs(SESSIONS_DIR, exist_ok=True)
+        path = _session_path(login)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(fernet.encrypt(json.dumps(state).encode("utf-8")))
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+        print(f"Session for {login} saved")
+    except Exception as e:
+        print(f"Error saving session for {login}: {e}")
+
+
+def _inject_cookies(driver, cookies):
+    cdp_cookies = []
+    for cookie in cookies:
+        cdp_cookie = {key: cookie[key] for key in ("name", "value", "domain", "path", "secure", "httpOnly")
+                      if key in cookie}
+        if cookie.get("sameSite"):
+            cdp_cookie["sameSite"] = cookie["sameSite"]
+        expires = cookie.get("expires", cookie.get("expiry"))
+        if expires and expires > 0:
+            cdp_cookie["expires"] = expires
+        cdp_cookies.append(cdp_cookie)
+    driver.execute_cdp_cmd("Network.setCookies", {"cookies": cdp_cookies})
+
+
+def _seed_local_storage(driver, items):
+    if not items:
+        return None
+    script = (
+        f"if (location.origin === {json.dumps(SESSION_ORIGIN)}) {{"
+        f"  var items = {json.dumps(items)};"
+        "  for (var key in items) { if (localStorage.getItem(key) === null) localStorage.setItem(key, items[key]); }"
+        "}"
+    )
+    return driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": script})["identifier"]
+
+
+def is_logged_in(driver, timeout=5):
+    """
+    Checks whether the current page shows the signed-in account link
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+        timeout (int): Seconds to wait for the account link
+
+    Returns:
+        bool: True if the browser is signed in
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    try:
+        WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.ID, "account-link")))
+        return True
+    except Exception:
+        return False
+
+
+def restore_session(driver, login, password=None):
+    """
+    Injects a stored session into the browser and verifies it with a single page load.
+    Expired sessions are discarded so the caller falls back to a full login
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+        login (str): Sainsbury's account login
+        password (str, optional): If given, the session is only reused when it was created with this password
+
+    Returns:
+        bool: True if the browser is now signed in
+    """
+    state = _load(login)
+    if state is None:
+        return False
+
+    if password is not None and not hmac.compare_digest(state.get("password_digest") or "",
+                                                         _password_digest(password)):
+        print(f"Stored session for {login} was created with different credentials")
+        return False
+
+    try:
+        _inject_cookies(driver, state["cookies"])
+        script_id = _seed_local_storage(driver, state.get("local_storage"))
+        driver.get(SESSION_CHECK_URL)
+        if script_id:
+            driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": script_id})
+    except Exception as e:
+        print(f"Error restoring session for {login}: {e}")
+        return False
+
+    if is_logged_in(driver):
+        print(f"Session for {login} restored")
+        return True
+
+    print(f"Stored session for {login} has expired")
+    discard_session(login)
+    return False
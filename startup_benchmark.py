@@ -0,0 +1,154 @@
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+SERVICES = ["auth_server", "db_searcher", "order_automator"]
+MODULES = SERVICES + ["main", "history_sync", "purchase_plan", "order_analytics", "product_data_extractor",
+                      "product_category_extractor", "fast_founder_parser", "db_exporter", "product_links_crawler",
+                      "crawl_scheduler", "product_refresh", "checkout_flow", "load_tester", "selenium_load_tester",
+                      "percentiles"]
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\| (\s*)(\S+)")
+
+
+def measure_import(module, top=8):
+    """
+    Imports a module in a fresh interpreter with `-X importtime`, from an empty working
+    directory, and reports its cost and whether the import left files behind
+
+    Args:
+        module (str): Module name
+        top (int): Number of most expensive imports to report
+
+    Returns:
+        dict: 'module', 'ok', 'total_ms', 'heaviest' [(name, cumulative ms)], 'created' (paths
+        written by the import) and 'error'
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.getenv("PYTHONPATH")])))
+    with tempfile.TemporaryDirectory(prefix="import-check-") as work_dir:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=work_dir, env=env, capture_output=True, text=True, timeout=120,
+        )
+        created = []
+        for root, dirs, files in os.walk(work_dir):
+            dirs[:] = [name for name in dirs if name != "__pycache__"]
+            created.extend(os.path.relpath(os.path.join(root, name), work_dir) for name in dirs + files)
+
+    timings = []
+    error_lines = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            timings.append((match.group(4), int(match.group(2)) / 1000, len(match.group(3))))
+        elif line.strip():
+            error_lines.append(line)
+
+    # importtime lists children before their parent, so the module's own imports are the
+    # indented block right above its top-level line; interpreter startup comes before that
+    total_ms = None
+    subtree = []
+    for name, cumulative, depth in timings:
+        if depth == 0:
+            if name == module:
+                total_ms = cumulative
+                break
+            subtree = []
+        else:
+            subtree.append((name, cumulative))
+    heaviest = sorted(subtree, key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "ok": result.returncode == 0,
+        "total_ms": total_ms,
+        "heaviest": heaviest,
+        "created": sorted(created),
+        "error": error_lines[-1] if result.returncode != 0 and error_lines else None,
+    }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_request(service, timeout=60):
+    """
+    Starts a service with uvicorn and measures how long it takes to answer its first request
+
+    Args:
+        service (str): Module with a FastAPI `app`
+        timeout (float): Seconds to wait for the first response
+
+    Returns:
+        float | None: Seconds from process start to the first successful response, None on timeout
+    """
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{service}:app", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                return None
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/openapi.json", timeout=1):
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.05)
+        return None
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure import cost, import side effects and service startup time")
+    parser.add_argument("modules", nargs="*", default=MODULES, help="modules to import")
+    parser.add_argument("--top", type=int, default=5, help="heaviest imports to list per module")
+    parser.add_argument("--max-import-ms", type=float, help="fail if any module takes longer to import")
+    parser.add_argument("--serve", action="store_true",
+                        help="also measure time to first request of the listed services")
+    args = parser.parse_args()
+
+    failures = []
+    for name in args.modules:
+        report = measure_import(name, args.top)
+        if not report["ok"]:
+            print(f"{name:<28} import failed: {report['error']}")
+            failures.append(name)
+            continue
+        print(f"{name:<28} {report['total_ms']:>9.1f} ms")
+        for dependency, cumulative in report["heaviest"]:
+            print(f"    {dependency:<40} {cumulative:>9.1f} ms")
+        if report["created"]:
+            print(f"    import side effects, created: {', '.join(report['created'])}")
+            failures.append(name)
+        if args.max_import_ms and report["total_ms"] > args.max_import_ms:
+            print(f"    over the budget of {args.max_import_ms:.0f} ms")
+            failures.append(name)
+
+    if args.serve:
+        print()
+        for service in [name for name in args.modules if name in SERVICES]:
+            elapsed = time_to_first_request(service)
+            print(f"{service:<28} first request " + ("failed" if elapsed is None else f"after {elapsed:.2f} s"))
+            if elapsed is None:
+                failures.append(service)
+
+    if failures:
+        print(f"\nFailed: {', '.join(sorted(set(failures)))}")
+        sys.exit(1)
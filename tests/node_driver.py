@@ -0,0 +1,42 @@
+import json
+import shutil
+import subprocess
+
+_RUNNER = """
+const input = JSON.parse(require("fs").readFileSync(0, "utf8"));
+globalThis.document = {cookie: input.cookie};
+new Function(input.script).apply(null, input.args.concat([function (result) {
+    process.stdout.write(JSON.stringify(result === undefined ? null : result));
+}]));
+"""
+
+
+def node_available():
+    return shutil.which("node") is not None
+
+
+class NodeScriptDriver:
+    """
+    Stands in for a Selenium driver where only execute_async_script is needed: runs the
+    script in Node.js (global fetch) with a `document.cookie` of a signed-in page, so the
+    trolley page scripts are exercised for real without a browser
+    """
+
+    def __init__(self, cookie=""):
+        self.cookie = cookie
+        self.timeout = 30
+        self.scripts = 0
+
+    def set_script_timeout(self, seconds):
+        self.timeout = seconds
+
+    def execute_async_script(self, script, *args):
+        self.scripts += 1
+        process = subprocess.run(
+            ["node", "-e", _RUNNER],
+            input=json.dumps({"script": script, "args": list(args), "cookie": self.cookie}),
+            capture_output=True, text=True, timeout=self.timeout,
+        )
+        if process.returncode != 0:
+            raise RuntimeError(f"script failed: {process.stderr.strip()}")
+        return json.loads(process.stdout)
@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("multipart")
+pytest.importorskip("requests")
+pytest.importorskip("bcrypt")
+
+import auth_server
+import load_tester
+from fastapi import HTTPException, Response
+
+UUID = "00000000-0000-0000-0000-000000000001"
+
+
+@pytest.fixture
+def database(monkeypatch):
+    monkeypatch.setenv("BCRYPT_ROUNDS", "4")
+    stub = load_tester.StubPostgres()
+    monkeypatch.setattr(auth_server, "get_db", stub.connect)
+    monkeypatch.setattr(auth_server, "profile_cache", auth_server.ProfileCache())
+    return stub
+
+
+def profile(**fields):
+    return auth_server.UserProfile(login="user1@example.com", password="password", **fields)
+
+
+def test_update_profile_reports_unchanged_only_when_the_row_matches(database):
+    assert auth_server.update_profile(UUID, profile(first_name="Ann"), Response())["status"] == "updated"
+    assert auth_server.update_profile(UUID, profile(first_name="Ann"), Response())["status"] == "unchanged"
+
+
+def test_update_profile_is_not_lost_behind_a_stale_cache(database):
+    auth_server.update_profile(UUID, profile(first_name="Ann"), Response())
+    assert auth_server.load_profile(UUID)[0]["first_name"] == "Ann"
+
+    # Another worker changes the row; this process still caches the old profile
+    database.db.execute("UPDATE users SET first_name = 'Bea' WHERE uuid = ?", (UUID,))
+    database.db.commit()
+
+    assert auth_server.update_profile(UUID, profile(first_name="Ann"), Response())["status"] == "updated"
+    assert database.db.execute("SELECT first_name FROM users WHERE uuid = ?", (UUID,)).fetchone() == ("Ann",)
+
+
+def test_update_profile_of_unknown_user(database):
+    with pytest.raises(HTTPException) as error:
+        auth_server.update_profile("missing", profile(first_name="Ann"), Response())
+
+    assert error.value.status_code == 404
@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+import browser_pool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise RuntimeError("chrome not reachable")
+        return "about:blank"
+
+    def quit(self):
+        self.quit_called = True
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(browser_pool, "RESPAWN_DELAY", 0.05)
+    monkeypatch.setattr(browser_pool, "RESPAWN_MAX_DELAY", 0.2)
+
+
+def test_warm_up_failures_back_off(fast_backoff):
+    warm_ups = []
+
+    def warm(driver):
+        warm_ups.append(time.monotonic())
+        raise RuntimeError("site is down")
+
+    pool = browser_pool.BrowserPool(lambda profile_dir: FakeDriver(), size=1, warm=warm)
+    pool.start()
+    try:
+        assert wait_for(lambda: len(warm_ups) >= 4)
+        gaps = [later - earlier for earlier, later in zip(warm_ups, warm_ups[1:])]
+        assert gaps[0] >= 0.05
+        assert gaps[2] >= 0.2
+        assert pool.metrics()["consecutive_failures"] >= 3
+    finally:
+        pool.close()
+
+
+def test_successful_warm_up_resets_the_backoff(fast_backoff):
+    attempts = []
+
+    def warm(driver):
+        attempts.append(driver)
+        if len(attempts) < 3:
+            raise RuntimeError("site is down")
+
+    pool = browser_pool.BrowserPool(lambda profile_dir: FakeDriver(), size=1, warm=warm)
+    try:
+        with pool.lease(timeout=5) as driver:
+            assert driver is attempts[-1]
+            assert pool.metrics()["consecutive_failures"] == 0
+            assert pool.metrics()["failures"] == 2
+    finally:
+        pool.close()
+
+
+def test_lease_skips_dead_idle_browsers():
+    drivers = []
+
+    def factory(profile_dir):
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    pool = browser_pool.BrowserPool(factory, size=1, warm=lambda driver: None)
+    pool.start()
+    try:
+        assert wait_for(lambda: pool.metrics()["idle"] == 1)
+        drivers[0].alive = False
+
+        with pool.lease(timeout=5) as driver:
+            assert driver is drivers[1]
+            assert drivers[0].quit_called
+            assert pool.metrics()["recycled"] == 1
+    finally:
+        pool.close()
@@ -0,0 +1,97 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+import checkout_flow
+from checkout_flow import BOOK_SLOT, CONFIRMATION, PAYMENT, SUMMARY, UNKNOWN, CheckoutError
+
+BASE = "https://www.sainsburys.co.uk/gol-ui/checkout"
+
+
+@pytest.mark.parametrize("url, state", [
+    (f"{BASE}/book-slot/slot-booking-confirmation", BOOK_SLOT),
+    (f"{BASE}/order-confirmation/123", CONFIRMATION),
+    (f"{BASE}/payment", PAYMENT),
+    (f"{BASE}/summary?from=confirmation", SUMMARY),
+    ("https://bank.example/3ds", UNKNOWN),
+])
+def test_detect_state(url, state):
+    assert checkout_flow.detect_state(url) == state
+
+
+class FakeDriver:
+    def __init__(self, url):
+        self.current_url = url
+        self.visited = []
+
+    def get(self, url):
+        self.visited.append(url)
+
+
+def test_unknown_final_page_is_an_error():
+    with pytest.raises(CheckoutError) as error:
+        checkout_flow.run_checkout(FakeDriver("https://example.com/oops"), progress=None)
+    assert error.value.state == UNKNOWN
+
+
+def test_checkout_is_not_resumed_after_payment_started():
+    driver = FakeDriver(f"{BASE}/summary")
+
+    with pytest.raises(CheckoutError):
+        checkout_flow.run_checkout(driver, progress=None, resume_state=PAYMENT)
+    assert driver.visited == []
+
+
+class FakeElement:
+    def __init__(self, page, name):
+        self.page = page
+        self.name = name
+
+    def is_displayed(self):
+        return self.name in self.page.visible
+
+    def is_enabled(self):
+        return True
+
+
+class SlotPage:
+    """Slot page whose buttons appear in turn as the previous one is clicked"""
+
+    SELECTORS = {
+        "slot-table": "table",
+        ".reserve-slot-modal__primary-button": "confirm",
+        ".booking-confirmation__button": "secondary",
+        ".trolley__cta-button": "cta",
+    }
+
+    def __init__(self):
+        self.current_url = f"{BASE}/book-slot"
+        self.visible = {"table", "confirm"}
+        self.clicked = []
+
+    def find_element(self, by, value):
+        from selenium.common.exceptions import NoSuchElementException
+
+        for fragment, name in self.SELECTORS.items():
+            if value.endswith(fragment) and name in self.visible:
+                return FakeElement(self, name)
+        raise NoSuchElementException(value)
+
+    def execute_script(self, script, element=None):
+        if "click" in script:
+            self.clicked.append(element.name)
+            self.visible.discard(element.name)
+            self.visible.add({"confirm": "secondary", "secondary": "cta"}.get(element.name, "done"))
+
+
+def test_slot_confirmation_waits_for_each_step_without_sleeping(monkeypatch):
+    monkeypatch.setattr(checkout_flow.dom_snapshot, "snapshot_slot_grid", lambda driver: [])
+    monkeypatch.setattr(checkout_flow.dom_snapshot, "first_available_slot",
+                        lambda grid: {"day": "Mon", "time": "10:00", "price": "£1"})
+    monkeypatch.setattr(checkout_flow.dom_snapshot, "click_slot", lambda driver, slot: True)
+    monkeypatch.setattr("time.sleep", lambda seconds: pytest.fail("select_delivery_slot slept"))
+    driver = SlotPage()
+
+    checkout_flow.select_delivery_slot(driver)
+
+    assert driver.clicked == ["confirm", "secondary", "cta"]
@@ -0,0 +1,82 @@
+import pytest
+
+import crawl_scheduler
+from crawl_scheduler import RevisitScheduler, fingerprint
+
+HOUR = 60 * 60
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    return RevisitScheduler(str(tmp_path / "state.json"), min_interval=HOUR, max_interval=100 * HOUR,
+                            initial_interval=10 * HOUR)
+
+
+def test_fingerprint_ignores_order_and_duplicates():
+    assert fingerprint(["b", "a", "a"]) == fingerprint(["a", "b"])
+    assert fingerprint(["a"]) != fingerprint(["a", "b"])
+
+
+def test_new_keys_are_due_and_get_the_initial_interval(scheduler):
+    assert scheduler.is_due("page")
+    assert scheduler.record("page", "one", now=0) is True
+
+    entry = scheduler.get("page")
+    assert entry["interval"] == 10 * HOUR
+    assert entry["next_check"] == 10 * HOUR
+    assert entry["changes"] == 0
+    assert not scheduler.is_due("page", now=10 * HOUR - 1)
+    assert scheduler.is_due("page", now=10 * HOUR)
+
+
+def test_unchanged_content_grows_the_interval(scheduler):
+    scheduler.record("page", "one", now=0)
+
+    assert scheduler.record("page", "one", now=10 * HOUR) is False
+    assert scheduler.get("page")["interval"] == 10 * HOUR * crawl_scheduler.UNCHANGED_FACTOR
+
+
+def test_changed_content_shrinks_the_interval(scheduler):
+    scheduler.record("page", "one", now=0)
+
+    assert scheduler.record("page", "two", now=10 * HOUR) is True
+    entry = scheduler.get("page")
+    assert entry["interval"] == 10 * HOUR * crawl_scheduler.CHANGED_FACTOR
+    assert entry["changes"] == 1
+    assert entry["last_changed"] == 10 * HOUR
+
+
+def test_interval_is_clamped(scheduler):
+    scheduler.record("stable", "same", now=0)
+    scheduler.record("busy", "0", now=0)
+    for index in range(1, 20):
+        scheduler.record("stable", "same", now=index)
+        scheduler.record("busy", str(index), now=index)
+
+    assert scheduler.get("stable")["interval"] == 100 * HOUR
+    assert scheduler.get("busy")["interval"] == HOUR
+
+
+def test_due_returns_the_most_overdue_first(scheduler):
+    scheduler.record("late", "x", now=0)
+    scheduler.record("later", "x", now=-5 * HOUR)
+    scheduler.record("fresh", "x", now=20 * HOUR)
+
+    assert scheduler.due(["late", "later", "fresh", "new"], now=11 * HOUR) == ["new", "later", "late"]
+    assert scheduler.due(["late", "later", "new"], now=11 * HOUR, limit=1) == ["new"]
+
+
+def test_validators_and_state_survive_a_restart(scheduler):
+    scheduler.record("page", "one", etag='"abc"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT", now=0)
+    scheduler.save()
+
+    restored = RevisitScheduler(scheduler.state_file)
+    assert restored.validators("page") == {"etag": '"abc"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    assert restored.get("page") == scheduler.get("page")
+
+
+def test_unreadable_state_starts_fresh(tmp_path):
+    state_file = tmp_path / "state.json"
+    state_file.write_text("{not json", encoding="utf-8")
+
+    assert RevisitScheduler(str(state_file)).entries == {}
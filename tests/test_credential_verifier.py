@@ -0,0 +1,68 @@
+import time
+
+from credential_verifier import FAILED, PENDING, VERIFIED, CredentialVerifier
+
+
+def wait_for_result(verifier, status, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        current = verifier.status(status["verification_id"])
+        if current["status"] != PENDING:
+            return current
+        time.sleep(0.01)
+    raise AssertionError("verification did not finish")
+
+
+def test_rejected_credentials_are_cached():
+    calls = []
+
+    def verify(login, password):
+        calls.append(login)
+        return False
+
+    verifier = CredentialVerifier(verify)
+    try:
+        assert wait_for_result(verifier, verifier.submit("user", "wrong"))["status"] == FAILED
+        assert verifier.submit("user", "wrong")["status"] == FAILED
+        assert calls == ["user"]
+    finally:
+        verifier.shutdown()
+
+
+def test_errors_after_a_successful_check_are_not_cached():
+    calls = []
+
+    def verify(login, password):
+        calls.append(login)
+        return True
+
+    def on_verified(login, password):
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        return {"user_uuid": "42"}
+
+    verifier = CredentialVerifier(verify, on_verified=on_verified)
+    try:
+        first = wait_for_result(verifier, verifier.submit("user", "secret"))
+        assert first["status"] == FAILED
+        assert "database is locked" in first["error"]
+        assert verifier.metrics()["negative_cache"] == 0
+
+        second = wait_for_result(verifier, verifier.submit("user", "secret"))
+        assert second["status"] == VERIFIED
+        assert second["user_uuid"] == "42"
+        assert calls == ["user", "user"]
+    finally:
+        verifier.shutdown()
+
+
+def test_verify_errors_are_not_cached():
+    def verify(login, password):
+        raise RuntimeError("browser did not start")
+
+    verifier = CredentialVerifier(verify)
+    try:
+        assert wait_for_result(verifier, verifier.submit("user", "secret"))["status"] == FAILED
+        assert verifier.metrics()["negative_cache"] == 0
+    finally:
+        verifier.shutdown()
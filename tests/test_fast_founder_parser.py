@@ -0,0 +1,132 @@
+import os
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("lxml")
+
+import fast_founder_parser as parser
+from wordpress_stub import STUB_PASSWORD, STUB_USERNAME, WordPressStub
+
+
+@pytest.fixture
+def wordpress(monkeypatch, tmp_path):
+    stub = WordPressStub(pages=3, articles_per_page=3).start()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(parser, "BASE_URL", stub.base_url)
+    monkeypatch.setattr(parser, "LOGIN_URL", f"{stub.base_url}/wp-login.php")
+    monkeypatch.setattr(parser, "NEWS_URL", stub.base_url + "/news/page/{}/")
+    monkeypatch.setattr(parser, "TOTAL_PAGES", 4)
+    monkeypatch.setattr(parser, "USERNAME", STUB_USERNAME)
+    monkeypatch.setattr(parser, "PASSWORD", STUB_PASSWORD)
+    yield stub
+    stub.stop()
+
+
+def test_create_http_session_logs_in(wordpress):
+    session = parser.create_http_session(pool_size=2)
+
+    assert any(name.startswith("wordpress_logged_in") for name in session.cookies.keys())
+    assert wordpress.count("POST /wp-login.php") == 1
+    assert "first paragraph" in session.get(f"{wordpress.base_url}/news/article-1-1/").text
+
+
+def test_create_http_session_rejects_wrong_password(wordpress, monkeypatch):
+    monkeypatch.setattr(parser, "PASSWORD", "wrong")
+
+    with pytest.raises(RuntimeError):
+        parser.create_http_session()
+
+
+def test_create_http_session_reuses_browser_cookies(wordpress):
+    cookies = [{"name": "wordpress_logged_in_stub", "value": "from-browser", "path": "/"}]
+
+    session = parser.create_http_session(cookies=cookies)
+
+    assert wordpress.count("POST /wp-login.php") == 0
+    assert "first paragraph" in session.get(f"{wordpress.base_url}/news/article-2-1/").text
+
+
+def test_parse_article_links_resolves_and_deduplicates():
+    html = (
+        "<a href='/about/'>About</a>"
+        "<a href='/news/one/'><img class='wp-post-image'></a>"
+        "<a href='/news/one/'><img class='attachment wp-post-image'></a>"
+        "<a href='https://other.example/news/two/'><span><img class='size-full wp-post-image'></span></a>"
+        "<a href='/news/three/'><img class='wp-post-image-large'></a>"
+    )
+
+    links = parser.parse_article_links(html, "https://fastfounder.ru/news/page/2/")
+
+    assert links == ["https://fastfounder.ru/news/one/", "https://other.example/news/two/"]
+
+
+def test_parse_paragraphs_skips_empty_ones():
+    html = "<html><body><h1>Title</h1><p> First </p><p></p><p>\n</p><div><p>Second <b>bold</b></p></div></body></html>"
+
+    assert parser.parse_paragraphs(html) == "First\nSecond bold"
+
+
+def test_main_http_saves_every_article_once(wordpress):
+    parser.main_http(workers=3)
+
+    slugs = [slug for page in range(1, 4) for slug in wordpress.slugs(page)]
+    for slug in slugs:
+        with open(os.path.join("articles", f"article_{slug}.txt"), encoding="utf-8") as f:
+            assert f.read() == f"{slug} first paragraph\n{slug} second paragraph"
+    assert len(parser.read_lines(parser.URLS_FILE)) == len(slugs)
+    assert len(parser.read_lines(parser.MANIFEST_FILE)) == len(slugs)
+    assert wordpress.count("GET /news/article-") == len(slugs)
+
+    parser.main_http(workers=3)
+
+    assert wordpress.count("GET /news/article-") == len(slugs)
+    assert len(parser.read_lines(parser.URLS_FILE)) == len(slugs)
+
+
+class ListingDriver:
+    def __init__(self, pages, fail_on_page=None):
+        self.pages = pages
+        self.fail_on_page = fail_on_page
+        self.visited = []
+
+    def get(self, url):
+        page = int(url.rstrip("/").rsplit("/", 1)[-1])
+        if page == self.fail_on_page:
+            raise RuntimeError("connection lost")
+        self.visited.append(page)
+
+    def execute_script(self, script):
+        return self.pages.get(self.visited[-1], [])
+
+
+@pytest.fixture
+def listing(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(parser.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(parser, "TOTAL_PAGES", 4)
+    os.makedirs(parser.ARTICLES_DIR)
+    return {page: [f"https://fastfounder.ru/news/{page}-{i}/" for i in range(3)] for page in range(1, 5)}
+
+
+def test_collect_article_urls_resumes_after_an_interrupted_pass(listing, monkeypatch):
+    monkeypatch.setattr(parser, "driver", ListingDriver(listing, fail_on_page=3))
+    with pytest.raises(RuntimeError):
+        parser.collect_article_urls(set())
+
+    monkeypatch.setattr(parser, "driver", ListingDriver(listing))
+    new_urls = parser.collect_article_urls(set(parser.read_lines(parser.URLS_FILE)))
+
+    assert new_urls == listing[3] + listing[4]
+    assert parser.driver.visited == [1, 2, 3, 4]
+
+
+def test_collect_article_urls_stops_early_after_a_full_pass(listing, monkeypatch):
+    monkeypatch.setattr(parser, "driver", ListingDriver(listing))
+    parser.collect_article_urls(set())
+
+    listing[1], listing[2] = ["https://fastfounder.ru/news/new/"] + listing[1][:2], listing[1][2:] + listing[2][:2]
+    monkeypatch.setattr(parser, "driver", ListingDriver(listing))
+    new_urls = parser.collect_article_urls(set(parser.read_lines(parser.URLS_FILE)))
+
+    assert new_urls == ["https://fastfounder.ru/news/new/"]
+    assert parser.driver.visited == [1, 2]
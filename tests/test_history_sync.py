@@ -0,0 +1,42 @@
+import pytest
+
+import history_sync
+import main
+
+
+def fake_sync_account(login, password=None, profile_dir=None, analyze=False):
+    if login == "broken@example.com":
+        raise RuntimeError("chrome crashed")
+    if login == "locked@example.com":
+        return {"login": login, "uuid": None, "status": "error", "new_orders": 0, "total_orders": 0,
+                "duration": 0.0, "error": "the login was not accepted"}
+    return {"login": login, "uuid": "uuid-" + login, "status": "ok", "new_orders": 2, "total_orders": 5,
+            "duration": 0.0, "error": None}
+
+
+@pytest.fixture
+def patched_sync(monkeypatch):
+    # Forked workers inherit the patched main module, spawned ones would re-import it
+    monkeypatch.setattr(history_sync, "SYNC_START_METHOD", "fork")
+    monkeypatch.setattr(main, "sync_account", fake_sync_account)
+
+
+def test_failing_accounts_do_not_abort_the_others(patched_sync):
+    accounts = [("first@example.com", "pw"), ("broken@example.com", "pw"),
+                ("locked@example.com", "pw"), ("last@example.com", "pw")]
+
+    results = history_sync.run_sync(accounts, concurrency=2, timeout=30)
+
+    statuses = {result["login"]: result["status"] for result in results}
+    assert statuses == {"first@example.com": "ok", "broken@example.com": "crashed",
+                        "locked@example.com": "error", "last@example.com": "ok"}
+    assert sum(result["new_orders"] for result in results) == 4
+
+
+def test_account_without_password_or_session_is_not_started(patched_sync, monkeypatch):
+    monkeypatch.setattr(history_sync, "has_session", lambda login: False)
+
+    results = history_sync.run_sync([("nosession@example.com", None), ("first@example.com", "pw")], concurrency=1)
+
+    assert [(result["login"], result["status"]) for result in results] == [
+        ("nosession@example.com", "no_session"), ("first@example.com", "ok")]
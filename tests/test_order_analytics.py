@@ -0,0 +1,70 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import order_analytics
+from order_store import OrderStore
+
+TODAY = np.datetime64("2025-03-01")
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OrderStore(str(tmp_path / "user"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def known_store(store):
+    store.add("1", "Order 1:\n2 x Milk 2L £3.30\n1 x Bread £1.10\n", order_date="2025-01-01")
+    store.add("2", "Order 2:\n1 x milk 2L £1.65\n", order_date="2025-01-11")
+    store.add("3", "Order 3:\n1 x Milk 2L £1.65\n1 x Eggs £2.00\n", order_date="2025-02-10")
+    return store
+
+
+def test_empty_store(store):
+    items = order_analytics.load_line_items(store)
+    labels, totals = order_analytics.monthly_spend(items)
+
+    assert len(items["product"]) == 0
+    assert len(labels) == 0 and len(totals) == 0
+    assert order_analytics.spend_trend(totals) == 0.0
+    assert order_analytics.build_purchase_summary(store) is None
+    assert order_analytics.build_delta_summary(store, since=0) is None
+
+
+def test_product_stats_on_a_known_store(known_store):
+    items = order_analytics.load_line_items(known_store)
+    stats = order_analytics.product_stats(items, TODAY)
+    index = {str(name).casefold(): position for position, name in enumerate(items["product"])}
+
+    milk = index["milk 2l"]
+    assert len(items["product"]) == 3
+    assert stats["orders"][milk] == 3
+    assert stats["quantity"][milk] == 4
+    assert stats["spend"][milk] == pytest.approx(6.60)
+    assert stats["mean_interval"][milk] == pytest.approx(20.0)
+    assert stats["std_interval"][milk] == pytest.approx(10.0)
+    assert stats["days_since_last"][milk] == 19
+    assert stats["first_day"][milk] == np.datetime64("2025-01-01")
+    assert math.isnan(stats["mean_interval"][index["bread"]])
+
+
+def test_monthly_spend_and_trend(known_store):
+    labels, totals = order_analytics.monthly_spend(order_analytics.load_line_items(known_store), months=3)
+
+    assert [str(label) for label in labels] == ["2025-01", "2025-02"]
+    assert totals.tolist() == pytest.approx([6.05, 3.65])
+    assert order_analytics.spend_trend(totals) == pytest.approx(-2.40)
+
+
+def test_purchase_summary_lists_the_most_bought_product_first(known_store):
+    summary = order_analytics.build_purchase_summary(known_store, today=TODAY)
+
+    assert summary.startswith("Orders: 3; distinct products: 3; line items: 5")
+    assert "History: 2025-01-01 to 2025-02-10" in summary
+    rows = summary.split("days since last\n", 1)[1].splitlines()
+    assert rows[0] == "Milk 2L | 3 | 4 | 6.60 | 20 | 10 | 19"
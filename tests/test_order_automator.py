@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("fastapi")
+bcrypt = pytest.importorskip("bcrypt")
+
+import order_automator
+import user_registry
+from fastapi import HTTPException
+
+STORED_HASH = bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds=4)).decode("utf-8")
+
+
+class UsersTable:
+    writable = False
+
+    def find(self, reference):
+        return ("uuid-1", "alice@example.com") if reference in ("uuid-1", "alice@example.com") else None
+
+    def password_hash(self, user_uuid):
+        return STORED_HASH if user_uuid == "uuid-1" else None
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    jobs = []
+    monkeypatch.setattr(order_automator, "get_registry", lambda: user_registry.UserRegistry([UsersTable()]))
+    monkeypatch.setattr(order_automator.order_jobs, "submit",
+                        lambda payload, secret=None: jobs.append((payload, secret)) or "job-1")
+    return jobs
+
+
+def order(account, password):
+    return order_automator.ProductList(urls=["https://www.sainsburys.co.uk/gol-ui/product/milk"],
+                                       account=account, password=password)
+
+
+@pytest.mark.parametrize("password", [None, "", "wrong"])
+def test_order_for_an_account_is_rejected_without_its_password(queued, password):
+    with pytest.raises(HTTPException) as error:
+        order_automator.create_order(order("alice@example.com", password))
+
+    assert error.value.status_code == 401
+    assert queued == []
+
+
+def test_order_for_an_account_is_queued_with_its_password(queued):
+    assert order_automator.create_order(order("alice@example.com", "secret"))["job_id"] == "job-1"
+    assert queued[0][0]["account"] == {"uuid": "uuid-1", "login": "alice@example.com"}
+    assert queued[0][1] == "secret"
+
+
+def test_unknown_account_is_not_found(queued):
+    with pytest.raises(HTTPException) as error:
+        order_automator.create_order(order("bob@example.com", "secret"))
+
+    assert error.value.status_code == 404
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from order_jobs import DONE, FAILED, RUNNING, OrderJobRunner, OrderJobStore
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_jobs_with_the_same_key_never_overlap(tmp_path):
+    lock = threading.Lock()
+    active = {}
+    overlaps = []
+    finished = []
+
+    def handler(payload, progress):
+        account = payload["account"]
+        with lock:
+            active[account] = active.get(account, 0) + 1
+            if active[account] > 1:
+                overlaps.append(account)
+        time.sleep(0.05)
+        with lock:
+            active[account] -= 1
+            finished.append(payload["n"])
+
+    runner = OrderJobRunner(handler, OrderJobStore(str(tmp_path / "jobs.db")), workers=4,
+                            key=lambda payload: payload["account"])
+    try:
+        job_ids = [runner.submit({"account": account, "n": n})
+                   for n, account in enumerate(["a", "a", "b", "a", "b"])]
+        assert wait_for(lambda: all(runner.get(job_id)["status"] == DONE for job_id in job_ids))
+    finally:
+        runner.shutdown()
+
+    assert overlaps == []
+    assert [n for n in finished if n in (0, 1, 3)] == [0, 1, 3]
+
+
+def test_running_job_is_resumed_by_a_new_runner(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = OrderJobStore(path)
+    job_id = store.create({"account": "a"})
+    store.update(job_id, status=RUNNING, stage="checkout:summary")
+    resumed = []
+
+    runner = OrderJobRunner(lambda payload, progress: resumed.append((payload, progress.resume_state())),
+                            OrderJobStore(path), workers=1)
+    try:
+        assert runner.resume() == 1
+        assert wait_for(lambda: runner.get(job_id)["status"] == DONE)
+    finally:
+        runner.shutdown()
+
+    assert resumed == [({"account": "a"}, "summary")]
+    assert OrderJobStore(path).unfinished() == []
+
+
+def test_failed_job_is_not_resumed(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    def handler(payload, progress):
+        raise RuntimeError("checkout failed")
+
+    runner = OrderJobRunner(handler, OrderJobStore(path), workers=1)
+    try:
+        job_id = runner.submit({"account": "a"})
+        assert wait_for(lambda: runner.get(job_id)["status"] == FAILED)
+    finally:
+        runner.shutdown()
+
+    assert runner.get(job_id)["error"] == "checkout failed"
+    restarted = OrderJobRunner(handler, OrderJobStore(path), workers=1)
+    try:
+        assert restarted.resume() == 0
+    finally:
+        restarted.shutdown()
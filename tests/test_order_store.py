@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+import order_store
+from order_store import OrderStore
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as file:
+        return file.read()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OrderStore(str(tmp_path / "user"))
+    yield store
+    store.close()
+
+
+def test_parse_line_items_of_a_saved_order():
+    items = order_store.parse_line_items(read_fixture("order_1001.txt"))
+
+    assert items == [
+        ("Sainsbury's Semi Skimmed Milk 2L", 2, 3.30),
+        ("Sainsbury's White Bread 800g", 1, 1.10),
+        ("Bananas Loose", 1, 0.95),
+        ("Sainsbury's Free Range Eggs x6", 2, 4.00),
+        ("Greek Style Yoghurt", 3, None),
+    ]
+
+
+def test_parse_line_items_skips_malformed_lines_and_totals():
+    items = order_store.parse_line_items("Lemons\nQty: two\n£\nSubtotal £9.35\nDelivery £4.50\n£ 2.00\nx 4\n")
+
+    assert items == []
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Delivered Saturday 4th January 2025", "2025-01-04"),
+    ("Delivered 21 Feb 2025", "2025-02-21"),
+    ("Ordered on 03/11/2024", "2024-11-03"),
+    ("Delivered 31st February 2025", None),
+    ("No date here", None),
+])
+def test_parse_order_date(text, expected):
+    assert order_store.parse_order_date(text) == expected
+
+
+def test_add_stores_orders_once_with_their_line_items(store):
+    assert store.add("1001", read_fixture("order_1001.txt")) is True
+    assert store.add("1001", read_fixture("order_1001.txt")) is False
+
+    assert store.exists("1001")
+    assert store.count() == 1
+    columns = store.line_item_columns()
+    assert columns["product"][0] == "Sainsbury's Semi Skimmed Milk 2L"
+    assert set(columns["order_date"]) == {"2025-01-04"}
+    assert len(columns["quantity"]) == 5
+
+
+def test_products_ordered_since(store):
+    store.add("1", "Order 1:\n1 x Milk 2L £1.65\n1 x Bread £1.10\n", order_date="2025-01-04")
+    store.add("2", "Order 2:\n2 x Milk 2L £3.30\n", order_date="2025-02-01")
+    store.add("3", "Order 3:\n1 x Eggs £2.00\n", order_date="2024-12-20")
+
+    assert store.products_ordered_since("2025-01-01") == {"Milk 2L": "2025-02-01", "Bread": "2025-01-04"}
+    assert store.products_ordered_since("2025-03-01") == {}
+
+
+def test_legacy_order_files_are_imported(tmp_path):
+    folder = tmp_path / "user"
+    folder.mkdir()
+    (folder / "order_1001.txt").write_text(read_fixture("order_1001.txt"), encoding="utf-8")
+
+    store = OrderStore(str(folder))
+    try:
+        assert store.exists("1001")
+        assert [number for number, _, _ in store.iter_newest_first()] == ["1001"]
+    finally:
+        store.close()
@@ -0,0 +1,20 @@
+import pytest
+
+from percentiles import percentile
+
+
+@pytest.mark.parametrize("fraction, expected", [(0.5, 5), (0.9, 9), (0.95, 10), (0.99, 10), (0.07, 1), (1.0, 10)])
+def test_percentile_uses_the_nearest_rank(fraction, expected):
+    assert percentile(list(range(1, 11)), fraction) == expected
+
+
+def test_percentile_of_exact_ranks():
+    values = list(range(1, 101))
+
+    assert percentile(values, 0.07) == 7
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+
+
+def test_percentile_of_empty_list():
+    assert percentile([], 0.95) == 0.0
@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+import product_links_crawler as crawler
+from crawl_scheduler import RevisitScheduler
+
+PAGE = "https://www.sainsburys.co.uk/gol-ui/groceries/dairy-eggs-and-chilled/milk/c:1019874"
+
+
+@pytest.fixture
+def crawl(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    rendered = {PAGE: ["https://example.com/product/milk"]}
+    monkeypatch.setattr(crawler, "get_links_from_page", lambda driver, url: list(rendered[url]))
+    monkeypatch.setattr(crawler, "probe_page", lambda url, validators: (304, {}))
+    return rendered
+
+
+def test_not_modified_shell_still_checks_the_rendered_products(crawl):
+    scheduler = RevisitScheduler("state.json")
+    crawler.crawl_incremental(None, [PAGE], scheduler)
+
+    crawl[PAGE].append("https://example.com/product/oat-milk")
+    scheduler.entries[PAGE]["next_check"] = 0
+    crawler.crawl_incremental(None, [PAGE], scheduler)
+
+    assert scheduler.get(PAGE)["changes"] == 1
+    with open(crawler.output_file, encoding="utf-8") as file:
+        assert file.read().splitlines() == crawl[PAGE]
+
+
+class FakeChrome:
+    def get(self, url):
+        pass
+
+    def quit(self):
+        pass
+
+
+def test_full_crawl_feeds_the_scheduler(crawl, monkeypatch):
+    monkeypatch.setattr("selenium.webdriver.Chrome", FakeChrome)
+    monkeypatch.setattr(crawler, "accept_cookies", lambda driver: None)
+    with open(crawler.input_file, "w", encoding="utf-8") as file:
+        file.write(PAGE + "\n")
+
+    crawler.main()
+
+    assert RevisitScheduler(crawler.state_file).get(PAGE)["checks"] == 1
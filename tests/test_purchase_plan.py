@@ -0,0 +1,93 @@
+import json
+import os
+import types
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import purchase_plan
+from order_store import OrderStore
+
+
+class StubClient:
+    def __init__(self):
+        self.prompts = []
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    def create(self, model=None, messages=None, **kwargs):
+        self.prompts.append(messages[0]["content"])
+        message = types.SimpleNamespace(content=f"plan {len(self.prompts)}")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def user(tmp_path):
+    folder = str(tmp_path / "user")
+    add_order(folder, "1", "2 x Milk 2L £3.30\n1 x Bread £1.10", "2025-01-01")
+    return folder
+
+
+def add_order(folder, number, lines, order_date):
+    store = OrderStore(folder)
+    store.add(number, f"Order {number}:\n{lines}\n", order_date=order_date)
+    store.close()
+
+
+def read_plan(folder):
+    with open(os.path.join(folder, purchase_plan.PLAN_FILE_NAME), encoding="utf-8") as file:
+        return file.read()
+
+
+def test_first_plan_is_built_from_the_full_summary(user):
+    client = StubClient()
+
+    assert purchase_plan.generate_plan(user, client) == "created"
+
+    assert len(client.prompts) == 1
+    assert "Milk 2L" in client.prompts[0] and "Orders: 1" in client.prompts[0]
+    assert read_plan(user) == "plan 1"
+    with open(os.path.join(user, purchase_plan.PLAN_META_FILE_NAME), encoding="utf-8") as file:
+        assert json.load(file)["orders"] == 1
+
+
+def test_plan_is_unchanged_without_new_orders(user):
+    client = StubClient()
+    purchase_plan.generate_plan(user, client)
+
+    assert purchase_plan.generate_plan(user, client) == "unchanged"
+    assert len(client.prompts) == 1
+
+
+def test_new_order_sends_only_a_delta_with_the_previous_plan(user):
+    client = StubClient()
+    purchase_plan.generate_plan(user, client)
+    add_order(user, "2", "3 x Eggs £6.00", "2025-01-08")
+
+    assert purchase_plan.generate_plan(user, client) == "updated"
+
+    delta_prompt = client.prompts[1]
+    assert "plan 1" in delta_prompt
+    assert "New orders: 1" in delta_prompt
+    assert "Eggs" in delta_prompt and "Bread" not in delta_prompt
+    assert read_plan(user) == "plan 2"
+    assert purchase_plan.generate_plan(user, client) == "unchanged"
+
+
+def test_force_rebuilds_from_the_full_summary(user):
+    client = StubClient()
+    purchase_plan.generate_plan(user, client)
+    add_order(user, "2", "3 x Eggs £6.00", "2025-01-08")
+
+    assert purchase_plan.generate_plan(user, client, force=True) == "created"
+
+    full_prompt = client.prompts[1]
+    assert "plan 1" not in full_prompt
+    assert "Orders: 2" in full_prompt and "Bread" in full_prompt and "Eggs" in full_prompt
+
+
+def test_user_without_orders_is_empty(tmp_path):
+    client = StubClient()
+
+    assert purchase_plan.generate_plan(str(tmp_path / "nobody"), client) == "empty"
+    assert client.prompts == []
@@ -0,0 +1,64 @@
+import urllib.request
+
+import selenium_load_tester as tester
+
+
+class PageDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_describe_uses_nearest_rank_percentiles():
+    stats = tester.describe([float(value) for value in range(10, 0, -1)] + [None])
+
+    assert stats["n"] == 10
+    assert stats["p90"] == 9.0
+    assert stats["p95"] == 10.0
+
+
+def test_profile_browser_records_browsers_that_do_not_start(monkeypatch):
+    def create_driver():
+        raise RuntimeError("chrome crashed")
+
+    monkeypatch.setattr(tester, "create_driver", create_driver)
+
+    runs = tester.profile_browser("http://127.0.0.1/", cold_runs=2, warm_runs=3)
+
+    assert [run["mode"] for run in runs] == ["cold"] * 2 + ["warm"] * 3
+    assert all("chrome crashed" in run["error"] for run in runs)
+
+
+def test_profile_browser_records_a_failed_priming_load(monkeypatch):
+    drivers = []
+
+    def create_driver():
+        drivers.append(PageDriver())
+        return drivers[-1]
+
+    def measure_navigation(driver, url):
+        raise RuntimeError("page did not load")
+
+    monkeypatch.setattr(tester, "create_driver", create_driver)
+    monkeypatch.setattr(tester, "measure_navigation", measure_navigation)
+
+    runs = tester.profile_browser("http://127.0.0.1/", cold_runs=1, warm_runs=2)
+
+    assert len(runs) == 3
+    assert all("error" in run for run in runs)
+    assert all(driver.quit_called for driver in drivers)
+
+
+def test_serve_directory_serves_files_from_the_folder(tmp_path):
+    (tmp_path / "page.html").write_text("<h1>Offline page</h1>", encoding="utf-8")
+
+    server = tester.serve_directory(str(tmp_path))
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/page.html"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.read().decode("utf-8") == "<h1>Offline page</h1>"
+    finally:
+        server.shutdown()
+        server.server_close()
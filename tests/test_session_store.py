@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from cryptography.fernet import Fernet
+
+import session_store
+
+
+class FakeDriver:
+    current_url = "about:blank"
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Network.getAllCookies":
+            return {"cookies": [{"name": "session", "value": "abc", "domain": ".sainsburys.co.uk"}]}
+        raise AssertionError(f"unexpected CDP command {command}")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_store, "SESSIONS_DIR", str(tmp_path))
+    monkeypatch.setattr(session_store, "_fernet", None)
+
+    def use_key(key):
+        monkeypatch.setattr(session_store, "SESSION_STORE_KEY", key)
+        monkeypatch.setattr(session_store, "_fernet", None)
+
+    use_key(Fernet.generate_key().decode("utf-8"))
+    return use_key
+
+
+def test_saved_session_is_loaded(store):
+    session_store.save_session(FakeDriver(), "user@example.com", "secret")
+
+    assert session_store.has_session("user@example.com")
+    assert session_store._load("user@example.com")["cookies"][0]["value"] == "abc"
+
+
+def test_malformed_key_is_treated_as_an_unreadable_session(store):
+    session_store.save_session(FakeDriver(), "user@example.com", "secret")
+    store("not-a-fernet-key")
+
+    assert not session_store.has_session("user@example.com")
+    assert session_store.restore_session(FakeDriver(), "user@example.com", "secret") is False
+    assert os.path.exists(session_store._session_path("user@example.com"))
+
+
+def test_malformed_key_does_not_break_saving(store, tmp_path):
+    store("not-a-fernet-key")
+
+    session_store.save_session(FakeDriver(), "user@example.com", "secret")
+
+    assert os.listdir(tmp_path) == []
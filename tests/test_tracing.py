@@ -0,0 +1,65 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture
+def enabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "TRACE_ENABLED", True)
+    monkeypatch.setattr(tracing, "TRACE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_spans_are_written_after_flush(enabled):
+    with tracing.span("outer", url="https://example.com"):
+        with tracing.span("inner"):
+            pass
+    tracing.flush()
+
+    spans = tracing.load_spans([os.path.join(str(enabled), "spans-*.jsonl")])
+    by_name = {record["name"]: record for record in spans}
+    assert by_name["inner"]["parent_id"] == by_name["outer"]["span_id"]
+    assert by_name["outer"]["attributes"] == {"url": "https://example.com"}
+    with open(next(enabled.glob("otlp-*.jsonl")), encoding="utf-8") as file:
+        assert len([json.loads(line) for line in file]) == 2
+
+
+def test_executor_spans_keep_their_parent(enabled):
+    def work(index):
+        with tracing.span("worker", index=index):
+            pass
+
+    with tracing.span("batch") as batch:
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(tracing.in_current_context(work), range(6)))
+    tracing.flush()
+
+    workers = [record for record in tracing.load_spans([os.path.join(str(enabled), "spans-*.jsonl")])
+               if record["name"] == "worker"]
+    assert len(workers) == 6
+    assert {record["parent_id"] for record in workers} == {batch.span_id}
+    assert {record["trace_id"] for record in workers} == {batch.trace_id}
+
+
+def test_nothing_is_written_when_disabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "TRACE_ENABLED", False)
+    monkeypatch.setattr(tracing, "TRACE_DIR", str(tmp_path / "traces"))
+
+    with tracing.span("ignored"):
+        pass
+    tracing.flush()
+
+    assert not os.path.exists(tmp_path / "traces")
+
+
+def test_summarize_uses_the_nearest_rank_p95():
+    spans = [{"name": "step", "duration": float(index), "status": "ok"} for index in range(1, 21)]
+
+    row = tracing.summarize(spans)[0]
+
+    assert row["p95"] == 19.0
+    assert row["max"] == 20.0
@@ -0,0 +1,170 @@
+import pytest
+
+import trolley
+from node_driver import NodeScriptDriver, node_available
+from trolley_stub import AUTH_COOKIE, PRODUCT_URL, TrolleyStub
+
+pytestmark = pytest.mark.skipif(not node_available(), reason="the page scripts run in Node.js")
+
+MILK = PRODUCT_URL.format("sainsburys-semi-skimmed-milk-2l")
+BREAD = PRODUCT_URL.format("sainsburys-white-bread-800g")
+BANANAS = PRODUCT_URL.format("sainsburys-bananas-x5")
+UNKNOWN = PRODUCT_URL.format("discontinued-product")
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = TrolleyStub().start()
+    monkeypatch.setattr(trolley, "TROLLEY_API_BASE", server.base_url)
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def driver():
+    return NodeScriptDriver(AUTH_COOKIE)
+
+
+def test_resolve_products(stub, driver):
+    results = trolley.resolve_products(driver, [MILK, UNKNOWN])
+
+    assert results[MILK] == {"key": MILK, "ok": True, "product_uid": "7834561"}
+    assert results[UNKNOWN]["ok"] is False
+    assert "not found" in results[UNKNOWN]["error"]
+
+
+def test_add_items_batches_in_one_script_call(stub, driver):
+    results = trolley.add_items(driver, {"7834561": 2, "1187234": 1, "6671001": 3}, batch_size=2)
+
+    assert all(result["ok"] for result in results.values())
+    assert set(results) == {"7834561", "1187234", "6671001"}
+    assert stub.basket == {"7834561": 2, "1187234": 1, "6671001": 3}
+    assert driver.scripts == 1
+    assert stub.count("POST /basket/v2/basket/item") == 3
+
+
+def test_add_items_reports_failed_items(stub, driver):
+    stub.failing_uids.add("1187234")
+
+    results = trolley.add_items(driver, {"7834561": 1, "1187234": 1})
+
+    assert results["7834561"]["ok"] is True
+    assert results["1187234"]["ok"] is False
+    assert "HTTP 500" in results["1187234"]["error"]
+    assert stub.basket == {"7834561": 1}
+
+
+def test_add_items_without_items_runs_no_script(stub, driver):
+    assert trolley.add_items(driver, {}) == {}
+    assert driver.scripts == 0
+
+
+def test_read_basket(stub, driver):
+    stub.basket.update({"7834561": 2, "6671001": 1})
+
+    lines = trolley.read_basket(driver)
+
+    assert {line["url"]: line["quantity"] for line in lines} == {MILK: 2, BANANAS: 1}
+    assert trolley.basket_quantities(lines) == {"7834561": 2, "6671001": 1}
+
+
+def test_read_basket_raises_when_signed_out(stub):
+    with pytest.raises(RuntimeError, match="HTTP 401"):
+        trolley.read_basket(NodeScriptDriver(cookie=""))
+
+
+def test_set_quantities_removes_extra_lines(stub, driver):
+    stub.basket.update({"7834561": 3, "6671001": 1})
+    missing, extras = trolley.diff_trolley(trolley.basket_quantities(trolley.read_basket(driver)), {"7834561": 1})
+
+    trolley.set_quantities(driver, extras)
+
+    assert missing == {}
+    assert stub.basket == {"7834561": 1}
+
+
+class RecordingProgress:
+    def __init__(self):
+        self.items = {}
+
+    def item(self, url, status, **details):
+        self.items[url] = {"status": status, **details}
+
+
+@pytest.fixture
+def order_automator(monkeypatch, stub):
+    pytest.importorskip("fastapi")
+    import order_automator as module
+
+    page_adds = []
+    page_limit = {}
+
+    def add_to_cart(driver, url):
+        # The product page button adds one unit, like the real page
+        page_adds.append(url)
+        slug = trolley.product_slug(url)
+        if slug == "discontinued-product" or page_adds.count(url) > page_limit.get(url, 99):
+            return False
+        uid = {"sainsburys-semi-skimmed-milk-2l": "7834561", "sainsburys-white-bread-800g": "1187234",
+               "sainsburys-bananas-x5": "6671001"}[slug]
+        stub.basket[uid] = stub.basket.get(uid, 0) + 1
+        return True
+
+    monkeypatch.setattr(module, "add_to_cart", add_to_cart)
+    monkeypatch.setattr(module, "page_adds", page_adds, raising=False)
+    monkeypatch.setattr(module, "page_limit", page_limit, raising=False)
+    return module
+
+
+def test_fill_trolley_uses_the_api(order_automator, stub, driver):
+    progress = RecordingProgress()
+
+    order_automator.fill_trolley(driver, [MILK, MILK, BREAD], progress)
+
+    assert stub.basket == {"7834561": 2, "1187234": 1}
+    assert order_automator.page_adds == []
+    assert progress.items[MILK] == {"status": "added", "quantity": 2, "method": "api"}
+
+
+def test_fill_trolley_falls_back_to_product_pages(order_automator, stub, driver):
+    stub.down = True
+    progress = RecordingProgress()
+
+    order_automator.fill_trolley(driver, [MILK, BREAD], progress)
+
+    assert order_automator.page_adds == [MILK, BREAD]
+    assert progress.items[BREAD]["method"] == "page"
+    assert progress.items[BREAD]["status"] == "added"
+
+
+def test_fill_trolley_falls_back_only_for_unresolved_items(order_automator, stub, driver):
+    progress = RecordingProgress()
+
+    order_automator.fill_trolley(driver, [MILK, UNKNOWN], progress)
+
+    assert order_automator.page_adds == [UNKNOWN]
+    assert progress.items[MILK]["method"] == "api"
+    assert progress.items[UNKNOWN] == {"status": "failed", "quantity": 0, "requested": 1, "method": "page"}
+
+
+def test_fill_trolley_page_fallback_adds_every_missing_unit(order_automator, stub, driver):
+    stub.down = True
+    progress = RecordingProgress()
+
+    order_automator.fill_trolley(driver, [MILK, MILK, MILK], progress)
+
+    assert order_automator.page_adds == [MILK] * 3
+    assert stub.basket == {"7834561": 3}
+    assert progress.items[MILK] == {"status": "added", "quantity": 3, "requested": 3, "method": "page"}
+
+
+def test_fill_trolley_page_fallback_tops_up_and_reports_short(order_automator, stub, driver):
+    stub.basket["7834561"] = 1
+    stub.failing_uids.add("7834561")
+    order_automator.page_limit[MILK] = 1
+    progress = RecordingProgress()
+
+    order_automator.fill_trolley(driver, [MILK] * 4, progress)
+
+    assert order_automator.page_adds == [MILK] * 2
+    assert progress.items[MILK] == {"status": "short", "quantity": 2, "requested": 4, "method": "page"}
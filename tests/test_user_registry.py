@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+import user_registry
+
+
+class ReadOnlyBackend:
+    writable = False
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def find(self, reference):
+        for user_uuid, login in self.rows:
+            if reference in (user_uuid, login):
+                return user_uuid, login
+        return None
+
+
+@pytest.fixture
+def local(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    with open(user_registry.LEGACY_UUID_FILE, "w", encoding="utf-8") as file:
+        file.write("alice@example.com:local-uuid\n")
+    os.makedirs(os.path.join(user_registry.USERS_DIR, "local-uuid"))
+    return user_registry.SQLiteUserBackend(path=str(tmp_path / "registry.db"))
+
+
+def test_resolve_moves_local_folder_to_the_shared_uuid(local):
+    registry = user_registry.UserRegistry([ReadOnlyBackend([("shared-uuid", "alice@example.com")]), local])
+
+    assert registry.resolve("alice@example.com") == ("shared-uuid", "alice@example.com")
+    assert os.path.isdir(os.path.join("users", "shared-uuid"))
+    assert not os.path.exists(os.path.join("users", "local-uuid"))
+    assert local.find("alice@example.com") == ("shared-uuid", "alice@example.com")
+
+
+def test_resolve_by_old_uuid_returns_the_shared_uuid(local):
+    registry = user_registry.UserRegistry([ReadOnlyBackend([("shared-uuid", "alice@example.com")]), local])
+
+    assert registry.resolve("local-uuid") == ("shared-uuid", "alice@example.com")
+
+
+def test_register_adopts_the_new_uuid(local):
+    registry = user_registry.UserRegistry([local])
+
+    registry.register("alice@example.com", "shared-uuid")
+
+    assert registry.get_uuid("alice@example.com") == "shared-uuid"
+    assert local.find("alice@example.com") == ("shared-uuid", "alice@example.com")
+    assert os.path.isdir(os.path.join("users", "shared-uuid"))
+
+
+def test_both_folders_are_kept_when_they_exist(local):
+    os.makedirs(os.path.join("users", "shared-uuid"))
+    registry = user_registry.UserRegistry([ReadOnlyBackend([("shared-uuid", "alice@example.com")]), local])
+
+    assert registry.resolve("alice@example.com") == ("shared-uuid", "alice@example.com")
+    assert os.path.isdir(os.path.join("users", "local-uuid"))
+    assert local.find("alice@example.com") == ("local-uuid", "alice@example.com")
@@ -0,0 +1,133 @@
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+STUB_TOKEN = "stub-token"
+AUTH_COOKIE = f"WC_AUTHENTICATION_1234={STUB_TOKEN}"
+STUB_CATALOG = {
+    "sainsburys-semi-skimmed-milk-2l": ("7834561", "Sainsbury's Semi Skimmed Milk 2L"),
+    "sainsburys-white-bread-800g": ("1187234", "Sainsbury's White Bread 800g"),
+    "sainsburys-bananas-x5": ("6671001", "Sainsbury's Bananas x5"),
+}
+PRODUCT_URL = "https://www.sainsburys.co.uk/gol-ui/product/{}"
+
+
+class TrolleyStub:
+    """
+    Local stand-in for the trolley endpoints trolley.py calls: product lookup by SEO URL,
+    basket item POST, basket GET and basket PUT. Requests need the wcauthtoken header the
+    page scripts derive from the WC_AUTHENTICATION_ cookie. `down` makes every call fail
+    with HTTP 503, `failing_uids` makes adding those products fail
+    """
+
+    def __init__(self):
+        self.basket = {}
+        self.down = False
+        self.failing_uids = set()
+        self.requests = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def count(self, prefix):
+        with self._lock:
+            return sum(1 for request in self.requests if request.startswith(prefix))
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="trolley-stub", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _basket_json(self):
+        items = []
+        for slug, (uid, name) in STUB_CATALOG.items():
+            if self.basket.get(uid):
+                product = {"product_uid": uid, "name": name, "full_url": PRODUCT_URL.format(slug)}
+                items.append({"product": product, "quantity": self.basket[uid]})
+        return {"items": items}
+
+    def _handler(self):
+        stub = self
+        uids = {uid for uid, _ in STUB_CATALOG.values()}
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, data=None):
+                body = json.dumps(data).encode("utf-8") if data is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"null")
+
+            def _route(self, method):
+                with stub._lock:
+                    stub.requests.append(f"{method} {self.path}")
+                if stub.down:
+                    self._send(503, {"error": "service unavailable"})
+                    return
+                if self.headers.get("wcauthtoken") != STUB_TOKEN:
+                    self._send(401, {"error": "not signed in"})
+                    return
+
+                url = urlparse(self.path)
+                if method == "GET" and url.path == "/product/v1/product":
+                    seo_url = unquote(parse_qs(url.query).get("filter[product_seo_url]", [""])[0])
+                    slug = seo_url.rsplit("/", 1)[-1]
+                    if slug in STUB_CATALOG:
+                        uid, name = STUB_CATALOG[slug]
+                        self._send(200, {"products": [{"product_uid": uid, "name": name}]})
+                    else:
+                        self._send(200, {"products": []})
+                elif method == "POST" and url.path == "/basket/v2/basket/item":
+                    item = self._body() or {}
+                    uid = item.get("product_uid")
+                    if uid not in uids or uid in stub.failing_uids:
+                        self._send(400 if uid not in uids else 500, {"error": f"cannot add {uid}"})
+                        return
+                    with stub._lock:
+                        stub.basket[uid] = stub.basket.get(uid, 0) + int(item.get("quantity") or 0)
+                    self._send(200, stub._basket_json())
+                elif method == "GET" and url.path == "/basket/v2/basket":
+                    with stub._lock:
+                        self._send(200, stub._basket_json())
+                elif method == "PUT" and url.path == "/basket/v2/basket":
+                    with stub._lock:
+                        for item in (self._body() or {}).get("items", []):
+                            if item.get("quantity"):
+                                stub.basket[item["product_uid"]] = int(item["quantity"])
+                            else:
+                                stub.basket.pop(item["product_uid"], None)
+                        self._send(200, stub._basket_json())
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_GET(self):
+                self._route("GET")
+
+            def do_POST(self):
+                self._route("POST")
+
+            def do_PUT(self):
+                self._route("PUT")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a stub trolley API; point TROLLEY_API_BASE at it")
+    parser.parse_args()
+    trolley_stub = TrolleyStub()
+    print(f"Serving on {trolley_stub.base_url} (cookie {AUTH_COOKIE})")
+    trolley_stub.server.serve_forever()
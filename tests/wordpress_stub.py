@@ -0,0 +1,115 @@
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+STUB_USERNAME = "reader"
+STUB_PASSWORD = "secret"
+LOGIN_COOKIE = "wordpress_logged_in_stub"
+
+
+class WordPressStub:
+    """
+    Minimal stand-in for the fastfounder.ru WordPress site: wp-login.php with a form login,
+    news/page/N/ listing pages and article pages whose full text needs the login cookie
+    """
+
+    def __init__(self, pages=3, articles_per_page=3):
+        self.pages = pages
+        self.articles_per_page = articles_per_page
+        self.requests = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def slugs(self, page):
+        return [f"article-{page}-{index}" for index in range(1, self.articles_per_page + 1)]
+
+    def count(self, prefix):
+        with self._lock:
+            return sum(1 for path in self.requests if path.startswith(prefix))
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="wordpress-stub", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body="", headers=None):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _logged_in(self):
+                return f"{LOGIN_COOKIE}=" in (self.headers.get("Cookie") or "")
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests.append(f"GET {self.path}")
+                parts = [part for part in self.path.split("?")[0].split("/") if part]
+
+                if parts == ["wp-login.php"]:
+                    self._send(200, "<form method='post'><input name='log'><input name='pwd'></form>",
+                               {"Set-Cookie": "wordpress_test_cookie=WP+Cookie+check; Path=/"})
+                elif parts == ["wp-admin"]:
+                    self._send(200 if self._logged_in() else 403, "<h1>Dashboard</h1>")
+                elif len(parts) == 3 and parts[:2] == ["news", "page"] and parts[2].isdigit():
+                    page = int(parts[2])
+                    if not 1 <= page <= stub.pages:
+                        self._send(404, "<p>Not found</p>")
+                        return
+                    links = "".join(
+                        f"<article><a href='/news/{slug}/'><img class='attachment-post wp-post-image' src='/x.jpg'></a>"
+                        f"<a href='/news/{slug}/'>{slug}</a></article>"
+                        for slug in stub.slugs(page)
+                    )
+                    self._send(200, f"<html><body><a href='/about/'>About</a>{links}</body></html>")
+                elif len(parts) == 2 and parts[0] == "news":
+                    slug = parts[1]
+                    if self._logged_in():
+                        body = f"<p>{slug} first paragraph</p><p> </p><p>{slug} second paragraph</p>"
+                    else:
+                        body = "<p>Subscribe to read the full article</p>"
+                    self._send(200, f"<html><body><h1>{slug}</h1>{body}</body></html>")
+                else:
+                    self._send(404, "<p>Not found</p>")
+
+            def do_POST(self):
+                with stub._lock:
+                    stub.requests.append(f"POST {self.path}")
+                length = int(self.headers.get("Content-Length") or 0)
+                form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+                if self.path.startswith("/wp-login.php") and form.get("log") == STUB_USERNAME \
+                        and form.get("pwd") == STUB_PASSWORD:
+                    self.send_response(302)
+                    self.send_header("Location", form.get("redirect_to") or "/wp-admin/")
+                    self.send_header("Set-Cookie", f"{LOGIN_COOKIE}=session-token; Path=/; HttpOnly")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                else:
+                    self._send(200, "<div id='login_error'>Incorrect username or password</div>")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a stub WordPress site for fast_founder_parser")
+    parser.add_argument("--pages", type=int, default=3, help="number of news listing pages")
+    args = parser.parse_args()
+    wordpress = WordPressStub(args.pages)
+    print(f"Serving on {wordpress.base_url} (login {STUB_USERNAME} / {STUB_PASSWORD})")
+    wordpress.server.serve_forever()
@@ -0,0 +1,347 @@
+import argparse
+import atexit
+import contextvars
+import functools
+import glob
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from percentiles import percentile
+
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "0") == "1"
+TRACE_DIR = os.getenv("TRACE_DIR", "traces")
+TRACE_SERVICE = os.getenv("TRACE_SERVICE", "autologin")
+SLOW_SPAN_SECONDS = float(os.getenv("TRACE_SLOW_SPAN_SECONDS", "10"))
+TRACE_SCREENSHOTS = os.getenv("TRACE_SCREENSHOTS", "0") == "1"
+TRACE_BATCH_SIZE = 500
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_export_queue = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+
+_PAGE_TIMING_SCRIPT = """
+var t = performance.timing;
+var resources = performance.getEntriesByType("resource");
+return {
+    ttfb_ms: t.responseStart - t.requestStart,
+    dom_content_loaded_ms: t.domContentLoadedEventEnd - t.navigationStart,
+    load_ms: t.loadEventEnd > 0 ? t.loadEventEnd - t.navigationStart : null,
+    resources: resources.length
+};
+"""
+
+
+class Span:
+    """
+    A timed unit of work with attributes, linked to its parent span
+    """
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.events = []
+        self.status = "ok"
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    @property
+    def duration(self):
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def add_event(self, name, **attributes):
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "duration": round(self.duration, 6),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def to_otlp(span):
+    """
+    Converts a span into an OTLP/JSON ExportTraceServiceRequest, as written by the OpenTelemetry file exporter
+
+    Returns:
+        dict: OTLP JSON document with a single span
+    """
+    otlp_span = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": _otlp_attributes(span.attributes),
+        "events": [{
+            "timeUnixNano": str(event["time_ns"]),
+            "name": event["name"],
+            "attributes": _otlp_attributes(event["attributes"]),
+        } for event in span.events],
+        "status": {"code": 2, "message": span.error} if span.status == "error" else {"code": 1},
+    }
+    if span.parent_id:
+        otlp_span["parentSpanId"] = span.parent_id
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otlp_attributes({"service.name": TRACE_SERVICE, "process.pid": os.getpid()})},
+        "scopeSpans": [{"scope": {"name": "tracing"}, "spans": [otlp_span]}],
+    }]}
+
+
+def _write_spans(spans):
+    by_day = {}
+    for finished in spans:
+        by_day.setdefault(time.strftime("%Y-%m-%d", time.localtime(finished.start_ns / 1e9)), []).append(finished)
+    try:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        for day, day_spans in by_day.items():
+            with open(os.path.join(TRACE_DIR, f"spans-{day}.jsonl"), "a", encoding="utf-8") as file:
+                file.writelines(json.dumps(finished.to_dict(), ensure_ascii=False, default=str) + "\n"
+                                for finished in day_spans)
+            with open(os.path.join(TRACE_DIR, f"otlp-{day}.jsonl"), "a", encoding="utf-8") as file:
+                file.writelines(json.dumps(to_otlp(finished), ensure_ascii=False, default=str) + "\n"
+                                for finished in day_spans)
+    except Exception as e:
+        print(f"Error exporting {len(spans)} spans: {e}")
+
+
+def _write_loop():
+    while True:
+        spans = [_export_queue.get()]
+        while len(spans) < TRACE_BATCH_SIZE:
+            try:
+                spans.append(_export_queue.get_nowait())
+            except queue.Empty:
+                break
+        _write_spans(spans)
+        for _ in spans:
+            _export_queue.task_done()
+
+
+def _export(span):
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_write_loop, name="trace-writer", daemon=True)
+                _writer.start()
+    _export_queue.put(span)
+
+
+@atexit.register
+def flush():
+    """
+    Waits until every finished span is written; runs automatically at interpreter exit
+    """
+    if _writer is not None:
+        _export_queue.join()
+
+
+def _capture_slow_span(span, driver):
+    try:
+        span.set_attribute("page.url", driver.current_url)
+        for key, value in driver.execute_script(_PAGE_TIMING_SCRIPT).items():
+            span.set_attribute(f"page.{key}", value)
+        if TRACE_SCREENSHOTS:
+            os.makedirs(os.path.join(TRACE_DIR, "screenshots"), exist_ok=True)
+            path = os.path.join(TRACE_DIR, "screenshots", f"{span.span_id}.png")
+            driver.save_screenshot(path)
+            span.set_attribute("screenshot", path)
+    except Exception as e:
+        span.add_event("capture_failed", error=str(e))
+
+
+@contextmanager
+def span(name, driver=None, **attributes):
+    """
+    Records a nested span around a block of work, e.g. a navigation, wait, click or LLM call.
+    Spans are only recorded with TRACE_ENABLED=1 and are written to TRACE_DIR in batches
+    by a background thread. When the span is slower than TRACE_SLOW_SPAN_SECONDS and a driver is given,
+    page timing (and optionally a screenshot) is attached
+
+    Args:
+        name (str): Span name, e.g. 'order.login' or 'llm.classify'
+        driver (webdriver.Chrome, optional): Browser used inside the span
+        **attributes: Span attributes such as url, selector or retry
+
+    Yields:
+        Span: The active span, to add attributes while it runs
+    """
+    if not TRACE_ENABLED:
+        yield Span(name, attributes=attributes)
+        return
+
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_ns = time.time_ns()
+        if driver is not None and current.duration >= SLOW_SPAN_SECONDS:
+            _capture_slow_span(current, driver)
+        _export(current)
+
+
+def traced(name=None):
+    """
+    Decorator that wraps every call of a function in a span
+
+    Args:
+        name (str, optional): Span name, defaults to module.function
+    """
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    """
+    Returns the active span or None outside of a traced block
+    """
+    return _current_span.get()
+
+
+def in_current_context(func):
+    """
+    Wraps a function for an executor, so spans it opens in worker threads become
+    children of the span that is active here. Every call runs in its own copy of
+    this context, as one context cannot be entered by two threads at a time
+
+    Args:
+        func (Callable): Function to run in worker threads
+
+    Returns:
+        Callable: Wrapped function
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+
+def load_spans(paths):
+    """
+    Reads spans from JSON lines files written by this module
+
+    Args:
+        paths (list[str]): File paths or glob patterns
+
+    Returns:
+        list[dict]: Span records
+    """
+    spans = []
+    for pattern in paths:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        spans.append(json.loads(line))
+    return spans
+
+
+def summarize(spans, top=20):
+    """
+    Aggregates span durations by name, hottest steps first
+
+    Args:
+        spans (list[dict]): Span records
+        top (int): Number of span names to return
+
+    Returns:
+        list[dict]: Per-name count, total, mean, p95, max and error count
+    """
+    by_name = {}
+    for record in spans:
+        by_name.setdefault(record["name"], []).append(record)
+
+    rows = []
+    for name, records in by_name.items():
+        durations = sorted(record["duration"] for record in records)
+        total = sum(durations)
+        rows.append({
+            "name": name,
+            "count": len(durations),
+            "total": total,
+            "mean": total / len(durations),
+            "p95": percentile(durations, 0.95),
+            "max": durations[-1],
+            "errors": sum(1 for record in records if record["status"] == "error"),
+        })
+    rows.sort(key=lambda row: row["total"], reverse=True)
+    return rows[:top]
+
+
+def main():
+    """
+    Command line entry point: prints the hottest steps across recorded runs
+    """
+    parser = argparse.ArgumentParser(description="Summarize recorded automation spans")
+    parser.add_argument("files", nargs="*", default=[os.path.join(TRACE_DIR, "spans-*.jsonl")],
+                        help="span JSON lines files or glob patterns")
+    parser.add_argument("--top", type=int, default=20, help="number of span names to show")
+    parser.add_argument("--name", help="only include spans whose name starts with this prefix")
+    args = parser.parse_args()
+
+    spans = load_spans(args.files)
+    if args.name:
+        spans = [record for record in spans if record["name"].startswith(args.name)]
+    if not spans:
+        print("No spans found")
+        return
+
+    print(f"{'span':<40} {'count':>7} {'total s':>10} {'mean s':>9} {'p95 s':>9} {'max s':>9} {'errors':>7}")
+    for row in summarize(spans, args.top):
+        print(f"{row['name'][:40]:<40} {row['count']:>7} {row['total']:>10.2f} {row['mean']:>9.2f} "
+              f"{row['p95']:>9.2f} {row['max']:>9.2f} {row['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
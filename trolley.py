@@ -0,0 +1,250 @@
+import os
+from collections import Counter
+from urllib.parse import urlparse
+
+TROLLEY_API_BASE = os.getenv("TROLLEY_API_BASE", "https://www.sainsburys.co.uk/groceries-api/gol-services")
+TROLLEY_BATCH_SIZE = int(os.getenv("TROLLEY_BATCH_SIZE", "6"))
+TROLLEY_SCRIPT_TIMEOUT = 120
+
+_API_SCRIPT = """
+var base = arguments[0];
+var done = arguments[arguments.length - 1];
+
+function authHeaders() {
+    var headers = {"Accept": "application/json", "Content-Type": "application/json"};
+    document.cookie.split("; ").forEach(function (cookie) {
+        var parts = cookie.split("=");
+        if (parts[0].indexOf("WC_AUTHENTICATION_") === 0) {
+            headers["wcauthtoken"] = decodeURIComponent(parts.slice(1).join("="));
+        }
+    });
+    return headers;
+}
+
+function api(method, path, body) {
+    return fetch(base + path, {
+        method: method,
+        credentials: "include",
+        headers: authHeaders(),
+        body: body === undefined ? undefined : JSON.stringify(body)
+    }).then(function (response) {
+        return response.text().then(function (text) {
+            var data = null;
+            try { data = text ? JSON.parse(text) : null; } catch (e) {}
+            if (!response.ok) { throw new Error(method + " " + path + " -> HTTP " + response.status); }
+            return data;
+        });
+    });
+}
+"""
+
+_BATCH_SCRIPT = """
+function runBatches(items, batchSize, work, finish) {
+    var results = [];
+    function next(start) {
+        if (start >= items.length) { finish(results); return; }
+        Promise.all(items.slice(start, start + batchSize).map(function (item) {
+            return work(item).then(function (result) {
+                results.push(result);
+            }).catch(function (error) {
+                results.push({key: item.key, ok: false, error: String(error && error.message || error)});
+            });
+        })).then(function () { next(start + batchSize); });
+    }
+    next(0);
+}
+"""
+
+_RESOLVE_PRODUCTS_SCRIPT = _API_SCRIPT + _BATCH_SCRIPT + """
+runBatches(arguments[1], arguments[2], function (item) {
+    var lookup = "/product/v1/product?filter[product_seo_url]=gb%2Fgroceries%2F" + encodeURIComponent(item.slug);
+    return api("GET", lookup).then(function (data) {
+        var product = data && data.products && data.products[0];
+        if (!product) { throw new Error("product not found"); }
+        return {key: item.key, ok: true, product_uid: product.product_uid};
+    });
+}, done);
+"""
+
+_ADD_ITEMS_SCRIPT = _API_SCRIPT + _BATCH_SCRIPT + """
+runBatches(arguments[1], arguments[2], function (item) {
+    return api("POST", "/basket/v2/basket/item", {
+        product_uid: item.key,
+        quantity: item.quantity,
+        uom: "ea",
+        selected_catchweight: ""
+    }).then(function () {
+        return {key: item.key, ok: true};
+    });
+}, done);
+"""
+
+_SET_QUANTITIES_SCRIPT = _API_SCRIPT + """
+api("PUT", "/basket/v2/basket", {items: arguments[1].map(function (item) {
+    return {product_uid: item.key, quantity: item.quantity, uom: "ea", selected_catchweight: ""};
+})}).then(function () {
+    done({ok: true});
+}).catch(function (error) {
+    done({ok: false, error: String(error && error.message || error)});
+});
+"""
+
+_READ_BASKET_SCRIPT = _API_SCRIPT + """
+api("GET", "/basket/v2/basket").then(function (basket) {
+    done({ok: true, items: ((basket && basket.items) || []).map(function (entry) {
+        var product = entry.product || {};
+        return {
+            product_uid: product.product_uid || product.sku || null,
+            url: product.full_url || product.url || null,
+            name: product.name || null,
+            quantity: entry.quantity
+        };
+    })});
+}).catch(function (error) {
+    done({ok: false, error: String(error && error.message || error)});
+});
+"""
+
+
+def product_slug(url):
+    """
+    Extracts the product slug from a /gol-ui/product/<slug> URL
+
+    Args:
+        url (str): Sainsbury's product URL
+
+    Returns:
+        str: Product slug
+    """
+    return urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def requested_quantities(product_urls):
+    """
+    Counts requested quantities; repeating a URL asks for one more unit
+
+    Args:
+        product_urls (list[str]): Requested product URLs
+
+    Returns:
+        dict[str, int]: Quantity per URL in request order
+    """
+    return dict(Counter(product_urls))
+
+
+def _run_batches(driver, script, items, batch_size):
+    if not items:
+        return {}
+    driver.set_script_timeout(TROLLEY_SCRIPT_TIMEOUT)
+    results = driver.execute_async_script(script, TROLLEY_API_BASE, items, batch_size)
+    return {result["key"]: result for result in results}
+
+
+def resolve_products(driver, urls, batch_size=TROLLEY_BATCH_SIZE):
+    """
+    Looks up product UIDs for product URLs through the product API, in parallel batches
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance on a Sainsbury's page
+        urls (Iterable[str]): Product URLs
+        batch_size (int): Number of parallel lookups
+
+    Returns:
+        dict[str, dict]: Result per URL with 'ok', 'product_uid' and 'error'
+    """
+    items = [{"key": url, "slug": product_slug(url)} for url in urls]
+    return _run_batches(driver, _RESOLVE_PRODUCTS_SCRIPT, items, batch_size)
+
+
+def add_items(driver, quantities, batch_size=TROLLEY_BATCH_SIZE):
+    """
+    Adds products through the site's own trolley API from the current page,
+    running batch_size requests in parallel within a single script call.
+    The browser must be on a Sainsbury's page of a signed-in session
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+        quantities (dict[str, int]): Quantity to add per product UID
+        batch_size (int): Number of parallel add requests
+
+    Returns:
+        dict[str, dict]: Result per product UID with 'ok' and 'error'
+    """
+    items = [{"key": product_uid, "quantity": quantity} for product_uid, quantity in quantities.items()]
+    return _run_batches(driver, _ADD_ITEMS_SCRIPT, items, batch_size)
+
+
+def set_quantities(driver, quantities):
+    """
+    Sets absolute quantities of trolley lines in one request; 0 removes a line
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+        quantities (dict[str, int]): Target quantity per product UID
+
+    Raises:
+        RuntimeError: If the trolley update failed
+    """
+    if not quantities:
+        return
+    items = [{"key": product_uid, "quantity": quantity} for product_uid, quantity in quantities.items()]
+    driver.set_script_timeout(TROLLEY_SCRIPT_TIMEOUT)
+    result = driver.execute_async_script(_SET_QUANTITIES_SCRIPT, TROLLEY_API_BASE, items)
+    if not result.get("ok"):
+        raise RuntimeError(f"Could not update trolley: {result.get('error')}")
+
+
+def basket_quantities(lines):
+    """
+    Sums trolley lines into a quantity per product UID
+
+    Args:
+        lines (list[dict]): Output of read_basket
+
+    Returns:
+        dict[str, int]: Quantity per product UID
+    """
+    quantities = Counter()
+    for line in lines:
+        if line.get("product_uid"):
+            quantities[line["product_uid"]] += line.get("quantity") or 0
+    return dict(quantities)
+
+
+def diff_trolley(current, wanted):
+    """
+    Compares the trolley with the requested items
+
+    Args:
+        current (dict[str, int]): Quantity per product UID currently in the trolley
+        wanted (dict[str, int]): Requested quantity per product UID
+
+    Returns:
+        tuple[dict, dict]: (units to add per UID, target quantity per UID for lines
+        that are not requested or exceed the requested quantity)
+    """
+    missing = {uid: quantity - current.get(uid, 0)
+               for uid, quantity in wanted.items() if current.get(uid, 0) < quantity}
+    extras = {uid: wanted.get(uid, 0)
+              for uid, quantity in current.items() if quantity > wanted.get(uid, 0)}
+    return missing, extras
+
+
+def read_basket(driver):
+    """
+    Reads the current trolley contents with one API call
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance
+
+    Returns:
+        list[dict]: Trolley lines with 'product_uid', 'url', 'name' and 'quantity'
+
+    Raises:
+        RuntimeError: If the trolley could not be read
+    """
+    driver.set_script_timeout(TROLLEY_SCRIPT_TIMEOUT)
+    result = driver.execute_async_script(_READ_BASKET_SCRIPT, TROLLEY_API_BASE)
+    if not result.get("ok"):
+        raise RuntimeError(f"Could not read trolley: {result.get('error')}")
+    return result["items"]
@@ -0,0 +1,274 @@
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+DB_HOST = os.getenv("DB_HOST")
+DB_PORT = os.getenv("DB_PORT")
+DB_NAME = os.getenv("DB_NAME")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+USER_REGISTRY_DB = os.getenv("USER_REGISTRY_DB", "user_registry.db")
+LEGACY_UUID_FILE = "user_uuids.txt"
+USERS_DIR = "users"
+
+
+def move_user_folder(old_uuid, new_uuid, users_dir=USERS_DIR):
+    """
+    Moves the data folder of a user whose uuid changed, users/<old> to users/<new>
+
+    Args:
+        old_uuid (str): Previous uuid
+        new_uuid (str): uuid the user is known by from now on
+        users_dir (str): Folder containing users/<uuid> folders
+
+    Returns:
+        bool: True if the folder was moved or there was nothing to move
+    """
+    old_folder = os.path.join(users_dir, old_uuid)
+    new_folder = os.path.join(users_dir, new_uuid)
+    if not os.path.exists(old_folder):
+        return True
+    if os.path.exists(new_folder):
+        print(f"Both {old_folder} and {new_folder} exist, merge them by hand")
+        return False
+    shutil.move(old_folder, new_folder)
+    print(f"Moved {old_folder} to {new_folder}")
+    return True
+
+
+class SQLiteUserBackend:
+    """
+    Local login-to-uuid table; imports the legacy user_uuids.txt on first use
+    """
+
+    writable = True
+
+    def __init__(self, path=USER_REGISTRY_DB, legacy_file=LEGACY_UUID_FILE):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    login TEXT PRIMARY KEY,
+                    uuid TEXT NOT NULL UNIQUE
+                )
+            """)
+            self._conn.commit()
+        self._import_legacy_file(legacy_file)
+
+    def _import_legacy_file(self, legacy_file):
+        if not os.path.exists(legacy_file):
+            return
+        with self._lock:
+            if self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]:
+                return
+            with open(legacy_file, "r", encoding="utf-8") as file:
+                rows = [line.strip().rsplit(":", 1) for line in file if ":" in line]
+            self._conn.executemany("INSERT OR IGNORE INTO users (login, uuid) VALUES (?, ?)", rows)
+            self._conn.commit()
+        print(f"Imported {len(rows)} users from {legacy_file}")
+
+    def find(self, reference):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT uuid, login FROM users WHERE login = ? UNION ALL "
+                "SELECT uuid, login FROM users WHERE uuid = ? LIMIT 1",
+                (reference, reference)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def password_hash(self, user_uuid):
+        return None
+
+    def register(self, login, user_uuid):
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO users (login, uuid) VALUES (?, ?)", (login, user_uuid))
+            self._conn.commit()
+
+    def replace(self, login, user_uuid):
+        with self._lock:
+            self._conn.execute("UPDATE users SET uuid = ? WHERE login = ?", (user_uuid, login))
+            self._conn.commit()
+
+
+class PostgresUserBackend:
+    """
+    Read access to the auth_server users table; rows are created by auth_server itself.
+    Lookups rely on the indexes from migrations/001_users_indexes.sql
+    """
+
+    writable = False
+
+    def _connect(self):
+        import psycopg2
+        return psycopg2.connect(
+            host=DB_HOST,
+            port=DB_PORT,
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD
+        )
+
+    def find(self, reference):
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT uuid, login FROM users WHERE login = %s OR uuid = %s LIMIT 1", (reference, reference))
+            row = cur.fetchone()
+            cur.close()
+            return (row[0], row[1]) if row else None
+        finally:
+            conn.close()
+
+    def password_hash(self, user_uuid):
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT password FROM users WHERE uuid = %s", (user_uuid,))
+            row = cur.fetchone()
+            cur.close()
+            return row[0] if row else None
+        finally:
+            conn.close()
+
+    def register(self, login, user_uuid):
+        pass
+
+
+class UserRegistry:
+    """
+    Resolves logins to user uuids through an in-process cache backed by indexed
+    stores: the auth_server Postgres users table when it is configured and a
+    local SQLite table for accounts that only exist on this machine. The first
+    backend that knows a login wins; a local row with another uuid is updated
+    and its users/<uuid> folder moved, so no user data is left behind
+    """
+
+    def __init__(self, backends):
+        self.backends = backends
+        self._by_login = {}
+        self._by_uuid = {}
+        self._lock = threading.Lock()
+
+    def _remember(self, user_uuid, login):
+        with self._lock:
+            self._by_login[login] = user_uuid
+            self._by_uuid[user_uuid] = login
+
+    def resolve(self, reference):
+        """
+        Finds an account by login or uuid
+
+        Args:
+            reference (str): Login or uuid
+
+        Returns:
+            tuple[str, str] | None: (uuid, login) or None if unknown
+        """
+        with self._lock:
+            if reference in self._by_login:
+                return self._by_login[reference], reference
+            if reference in self._by_uuid:
+                return reference, self._by_uuid[reference]
+
+        for backend in self.backends:
+            found = backend.find(reference)
+            if found:
+                found = self._reconcile(*found)
+                self._remember(*found)
+                return found
+        return None
+
+    def _reconcile(self, user_uuid, login):
+        known = [(backend, backend.find(login)) for backend in self.backends]
+        known = [(backend, row[0]) for backend, row in known if row and row[1] == login]
+        if not known:
+            return user_uuid, login
+        canonical_uuid = known[0][1]
+        for backend, local_uuid in known[1:]:
+            if local_uuid != canonical_uuid and backend.writable:
+                self._adopt(backend, login, local_uuid, canonical_uuid)
+        return canonical_uuid, login
+
+    @staticmethod
+    def _adopt(backend, login, old_uuid, new_uuid):
+        if move_user_folder(old_uuid, new_uuid):
+            backend.replace(login, new_uuid)
+
+    def get_uuid(self, login):
+        found = self.resolve(login)
+        return found[0] if found and found[1] == login else None
+
+    def register(self, login, user_uuid):
+        """
+        Records a login-to-uuid mapping in every writable backend and the cache
+        """
+        with self._lock:
+            if self._by_login.get(login) == user_uuid:
+                return
+        for backend in self.backends:
+            if not backend.writable:
+                continue
+            found = backend.find(login)
+            if found and found[1] == login and found[0] != user_uuid:
+                self._adopt(backend, login, found[0], user_uuid)
+            else:
+                backend.register(login, user_uuid)
+        self._remember(user_uuid, login)
+
+    def password_hash(self, user_uuid):
+        """
+        Returns the bcrypt hash auth_server stored for an account
+
+        Args:
+            user_uuid (str): User uuid
+
+        Returns:
+            str | None: Hash, or None if no backend keeps one for this account
+        """
+        for backend in self.backends:
+            stored_hash = backend.password_hash(user_uuid)
+            if stored_hash:
+                return stored_hash
+        return None
+
+    def get_or_create(self, login):
+        """
+        Returns the uuid of a login, creating and storing a new one if it is unknown
+
+        Args:
+            login (str): User email or ID
+
+        Returns:
+            str: UUID associated with the user
+        """
+        user_uuid = self.get_uuid(login)
+        if user_uuid:
+            return user_uuid
+        user_uuid = str(uuid.uuid4())
+        self.register(login, user_uuid)
+        return user_uuid
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """
+    Returns the process-wide registry, using Postgres first when DB_HOST is configured
+
+    Returns:
+        UserRegistry: Shared registry instance
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            backends = [PostgresUserBackend()] if DB_HOST else []
+            backends.append(SQLiteUserBackend())
+            _registry = UserRegistry(backends)
+    return _registry